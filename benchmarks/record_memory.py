@@ -0,0 +1,114 @@
+"""Measures the memory used per record by the Olex record classes.
+
+Each record class is compared against a copy of its original layout, which stored every attribute in a
+per-instance __dict__ and created an empty warnings list for every record.
+
+Run from the repository root with::
+
+    python -m benchmarks.record_memory [number of records]
+"""
+import struct
+import sys
+import tracemalloc
+
+from olexparser.rute_entry import RuteEntry
+from olexparser.segment_entry import SegmentEntry
+from olexparser.turtur_segment_summary import TurTurSegmentSummary
+
+
+class LegacySegmentEntry:
+    """The original SegmentEntry layout"""
+
+    def __init__(self, entry):
+        self.warnings = []
+        self.timestamp_int = int.from_bytes(entry[:4], "little")
+        self.lat_float = struct.unpack('f', entry[4:8])[0]
+        self.long_float = struct.unpack('f', entry[8:12])[0]
+        self.unknown = entry[12:]
+
+
+class LegacyRuteEntry:
+    """The original RuteEntry layout"""
+
+    def __init__(self, lat, long, timestamp, icon):
+        self.warnings = []
+        self.lat = float(lat)
+        self.long = float(long)
+        self.timestamp = int(timestamp)
+        self.icon = str(icon)
+
+
+class LegacyTurTurSegmentSummary:
+    """The original TurTurSegmentSummary layout"""
+
+    def __init__(self, seg_num, num_entries, smallest_lat, smallest_long, largest_lat, largest_long, smallest_time,
+                 largest_time):
+        self.warnings = []
+        self.seg_num = seg_num
+        self.num_entries = num_entries
+        self.smallest_lat = smallest_lat
+        self.smallest_long = smallest_long
+        self.largest_lat = largest_lat
+        self.largest_long = largest_long
+        self.smallest_time = smallest_time
+        self.largest_time = largest_time
+
+
+def bytes_per_record(factory, count):
+    """Returns the average number of bytes allocated for each record created by factory.
+
+    :param factory: a callable taking the record index and returning a new record
+    :type factory: callable
+    :param count: the number of records to create
+    :type count: int
+    :return: the average number of bytes allocated per record
+    :rtype: float
+    """
+    tracemalloc.start()
+    start = tracemalloc.take_snapshot()
+    records = [factory(i) for i in range(count)]
+    end = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in end.compare_to(start, "filename"))
+    # do not count the list holding the records
+    size -= sys.getsizeof(records)
+    return size / count
+
+
+def segment_entry_bytes(i):
+    return struct.pack("<Iff", 1417854557 + i, 2986.74 + i / 1000, -3246.82 - i / 1000) + b"\x00\x01\x02\x03"
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    # the raw entry bytes are created up front so they are not counted against either layout
+    entries = [segment_entry_bytes(i) for i in range(count)]
+    icons = ["Brunsirkel", "Kryss", "Rødsirkel"]
+
+    def icon(i):
+        # a new string for every record, as when the icons are read from a Ruter file
+        return "".join(icons[i % 3])
+
+    benchmarks = (
+        ("SegmentEntry",
+         lambda i: LegacySegmentEntry(entries[i]),
+         lambda i: SegmentEntry(entries[i])),
+        ("RuteEntry",
+         lambda i: LegacyRuteEntry("2986.74", "-3246.82", "1417854557", icon(i)),
+         lambda i: RuteEntry("2986.74", "-3246.82", "1417854557", icon(i))),
+        ("TurTurSegmentSummary",
+         lambda i: LegacyTurTurSegmentSummary(i, 1818, 2986.74, -3246.82, 3100.01, -3235.69, 1417854557, 1417862055),
+         lambda i: TurTurSegmentSummary(i, 1818, 2986.74, -3246.82, 3100.01, -3235.69, 1417854557, 1417862055)),
+    )
+
+    print("Bytes per record ({} records)".format(count))
+    print("{:<24}{:>12}{:>12}{:>12}".format("Class", "Before", "After", "Saved"))
+    for name, legacy, current in benchmarks:
+        before = bytes_per_record(legacy, count)
+        after = bytes_per_record(current, count)
+        print("{:<24}{:>12.1f}{:>12.1f}{:>11.0f}%".format(name, before, after, 100 * (before - after) / before))
+    return
+
+
+if __name__ == '__main__':
+    main()
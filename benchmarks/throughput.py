@@ -0,0 +1,158 @@
+"""Measures the throughput of the Olex parsers on synthetic archives of several sizes.
+
+Each archive is written with :func:`olexparser.synthetic.generate_archive`. For each size the benchmark measures
+the records per second and megabytes per second of:
+
+    1. SegmentFile, decoding every segment file.
+    2. TurDataFile, parsing the Turdata file.
+    3. RuterFile, parsing the Ruter file.
+    4. Association of the segment files to the Tur Turs.
+    5. GPX export of every point of every Tur Tur.
+
+Each measurement is the best of several repeats. The results are saved as JSON, and can be compared against the
+results of a previous run.
+
+Run from the repository root with::
+
+    python -m benchmarks.throughput [--sizes small medium] [--output results.json] [--compare previous.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+
+from olexparser.archive import OlexArchive
+from olexparser.gpx_writer import write_turdata_gpx
+from olexparser.ruter_file import RuterFile
+from olexparser.segment_file import SegmentFile
+from olexparser.synthetic import generate_archive
+from olexparser.turdata_file import TurDataFile
+
+#: The arguments of generate_archive for each archive size
+SIZES = {
+    "small": {"trips": 10, "segments_per_trip": 5, "entries_per_segment": 1000, "rutes": 100,
+              "points_per_rute": 20},
+    "medium": {"trips": 50, "segments_per_trip": 10, "entries_per_segment": 5000, "rutes": 1000,
+               "points_per_rute": 50},
+    "large": {"trips": 200, "segments_per_trip": 10, "entries_per_segment": 20000, "rutes": 5000,
+              "points_per_rute": 100},
+}
+
+
+def best_time(function, repeats):
+    """Returns the shortest wall time of several calls to function.
+
+    :param function: the function to time, called without arguments
+    :type function: callable
+    :param repeats: the number of calls
+    :type repeats: int
+    :return: the shortest wall time in seconds
+    :rtype: float
+    """
+    times = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run_size(folder, size, repeats):
+    """Generates an archive of one size and measures each stage on it.
+
+    :param folder: the folder the archive is written to
+    :type folder: str
+    :param size: the arguments of generate_archive
+    :type size: dict
+    :param repeats: the number of times each stage is repeated
+    :type repeats: int
+    :return: a dictionary with key:value - stage:{"seconds", "records", "bytes", "records_per_s", "mb_per_s"}
+    :rtype: dict
+    """
+    sizes = generate_archive(folder, **size)
+    archive = OlexArchive(folder)
+    segment_paths = sorted(archive.get_segment_paths().values())
+    turdata_path = archive.turdata_file[0]
+    ruter_path = archive.ruter_file[0]
+
+    def parse_segments():
+        for path in segment_paths:
+            SegmentFile(path)
+
+    def associate():
+        with OlexArchive(folder) as parsed:
+            parsed.get_turdata_files()
+            parsed.associate_segments()
+
+    def export_gpx():
+        with open(os.devnull, 'w') as f:
+            write_turdata_gpx(f, [turdata], archive.get_segment_paths())
+
+    turdata = TurDataFile(turdata_path)
+    stages = (
+        ("SegmentFile", parse_segments, sizes["entries"], sizes["segment_bytes"]),
+        ("TurDataFile", lambda: TurDataFile(turdata_path), sizes["segments"], sizes["turdata_bytes"]),
+        ("RuterFile", lambda: RuterFile(ruter_path), sizes["rute_points"], sizes["ruter_bytes"]),
+        ("association", associate, sizes["segments"], sizes["turdata_bytes"]),
+        ("GPX export", export_gpx, sizes["entries"], sizes["segment_bytes"]),
+    )
+    results = {}
+    for name, function, records, size_bytes in stages:
+        seconds = best_time(function, repeats)
+        results[name] = {"seconds": seconds, "records": records, "bytes": size_bytes,
+                         "records_per_s": records / seconds, "mb_per_s": size_bytes / seconds / 1024 / 1024}
+    return results
+
+
+def print_results(results, previous=None):
+    """Prints the results of each size and stage, and the change from previous results if given.
+
+    :param results: the results, with key:value - size:stage results as returned by :func:`run_size`
+    :type results: dict
+    :param previous: optional results of a previous run to compare against
+    :type previous: dict
+    """
+    print("{:<8}{:<14}{:>14}{:>12}{:>10}".format("Size", "Stage", "Records/s", "MB/s", "Change"))
+    for size, stages in results.items():
+        for stage, result in stages.items():
+            change = ""
+            if previous is not None and stage in previous.get(size, {}):
+                before = previous[size][stage]["records_per_s"]
+                change = "{:+.0f}%".format(100 * (result["records_per_s"] - before) / before)
+            print("{:<8}{:<14}{:>14.0f}{:>12.1f}{:>10}".format(size, stage, result["records_per_s"],
+                                                              result["mb_per_s"], change))
+    return
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the throughput of the Olex parsers.")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small", "medium"],
+                        help="the archive sizes to measure (default: small medium)")
+    parser.add_argument("--repeats", type=int, default=3, help="the number of repeats of each stage (default: 3)")
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--compare", metavar="FILE", help="compare against the results saved by a previous run")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    results = {}
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as folder:
+            results[size] = run_size(folder, SIZES[size], args.repeats)
+
+    previous = None
+    if args.compare is not None:
+        with open(args.compare, 'r') as f:
+            previous = json.load(f)["results"]
+    print_results(results, previous)
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(), "time": time.time(),
+                       "results": results}, f, indent=1)
+    return
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+import numpy as np
+from olexparser.segment_file import SegmentFile
+from olexparser.geo import get_distances, get_step_distances
+from olexparser.trip_stats import MAX_STEP_GAP, MAX_SPEED
+
+#: The kinds of anomaly, in the order of their codes in the kind field of :data:`ANOMALY_DTYPE`:
+#:
+#:     gap: the time between two entries is longer than max_gap seconds.
+#:     backwards: the timestamp of an entry is earlier than the latest timestamp before it.
+#:     duplicate: an entry has the same timestamp and position as the entry before it.
+#:     jump: the speed implied by two entries is above max_speed knots, or they have the same timestamp but
+#:     different positions.
+ANOMALY_KINDS = ("gap", "backwards", "duplicate", "jump")
+
+#: A numpy structured dtype describing an interval of anomalous entries. The interval runs from entry
+#: index_start of segment seg_start to entry index_end of segment seg_end, both included. time_start and
+#: time_end are the timestamps of these entries. value is the longest gap or backwards step in seconds, the
+#: number of duplicate entries, or the highest implied speed in knots.
+ANOMALY_DTYPE = np.dtype([("kind", "u1"), ("seg_start", "<u4"), ("index_start", "<u4"), ("seg_end", "<u4"),
+                          ("index_end", "<u4"), ("time_start", "<u4"), ("time_end", "<u4"), ("value", "<f8")])
+
+
+def classify_steps(timestamps, lats, longs, max_gap=MAX_STEP_GAP, max_speed=MAX_SPEED, time_max=None,
+                   latest_position=None):
+    """Classifies the steps between consecutive entries of a track.
+
+    The duration of each step is measured from the latest timestamp so far, not from the timestamp of the entry
+    before it, so an entry whose timestamp goes backwards does not hide a gap after it. E.g. for the timestamps
+    110, 105 and 2000 the second step is a gap of 1890 seconds. The distance of each step is measured from the
+    same entry, the one with the latest timestamp so far, so the implied speed is the speed since that entry.
+    A step measured from time_max without latest_position is never a duplicate or a jump.
+
+    :param timestamps: the timestamps of the entries
+    :type timestamps: numpy.ndarray
+    :param lats: the 'Olex float' latitudes of the entries
+    :type lats: numpy.ndarray
+    :param longs: the 'Olex float' longitudes of the entries
+    :type longs: numpy.ndarray
+    :param max_gap: the longest step in seconds which is not a gap. Defaults to MAX_STEP_GAP
+    :type max_gap: int
+    :param max_speed: the highest implied speed in knots which is not a jump. Defaults to MAX_SPEED
+    :type max_speed: float
+    :param time_max: the latest timestamp of the entries before the track, if it continues another track.
+                     Defaults to None
+    :type time_max: int
+    :param latest_position: the 'Olex float' latitude and longitude of the entry with the timestamp time_max.
+                            Defaults to None
+    :type latest_position: tuple
+    :return: for each step, the index in :data:`ANOMALY_KINDS` of its kind or -1 if it is not an anomaly, and the
+             value of each step as described in :data:`ANOMALY_DTYPE`
+    :rtype: tuple
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    lats = np.asarray(lats, dtype=np.float64)
+    longs = np.asarray(longs, dtype=np.float64)
+    latest = np.maximum.accumulate(timestamps)
+    # the index of the entry with the latest timestamp so far, the last one if several share it
+    indexes = np.arange(len(timestamps))
+    sources = np.maximum.accumulate(np.where(timestamps == latest, indexes, 0))[:-1]
+    before = np.zeros(len(sources), dtype=bool)
+    if time_max is not None:
+        before = time_max > latest[:-1]
+        latest = np.maximum(latest, time_max)
+    durations = timestamps[1:] - latest[:-1]
+
+    distances = get_step_distances(lats, longs)
+    behind = (sources != indexes[:-1]) & ~before
+    distances[behind] = get_distances(lats[sources[behind]], longs[sources[behind]], lats[1:][behind],
+                                      longs[1:][behind])
+    known = ~before
+    if latest_position is not None:
+        distances[before] = get_distances(latest_position[0], latest_position[1], lats[1:][before],
+                                          longs[1:][before])
+        known[:] = True
+    kinds = np.full(len(durations), -1, dtype=np.int8)
+    values = np.zeros(len(durations), dtype=np.float64)
+
+    forward = durations > 0
+    speeds = np.zeros(len(durations), dtype=np.float64)
+    speeds[forward] = distances[forward] / (durations[forward] / 3600)
+    same_time = durations == 0
+    moved = distances > 0
+
+    gaps = durations > max_gap
+    kinds[gaps] = ANOMALY_KINDS.index("gap")
+    values[gaps] = durations[gaps]
+
+    backwards = durations < 0
+    kinds[backwards] = ANOMALY_KINDS.index("backwards")
+    values[backwards] = -durations[backwards]
+
+    duplicates = same_time & ~moved & known
+    kinds[duplicates] = ANOMALY_KINDS.index("duplicate")
+    values[duplicates] = 1
+
+    # a jump over a gap is still a jump
+    jumps = ((forward & (speeds > max_speed)) | (same_time & moved)) & known
+    kinds[jumps] = ANOMALY_KINDS.index("jump")
+    values[jumps] = np.where(same_time[jumps], np.inf, speeds[jumps])
+    return kinds, values
+
+
+def get_intervals(kinds, values, seg_nums, indexes, timestamps):
+    """Internal function which merges runs of consecutive steps of the same kind into intervals.
+
+    The value of a run of duplicates is the number of duplicate entries, the value of any other run is its
+    largest value.
+
+    :param kinds: the kind of each step, as returned by :func:`classify_steps`
+    :type kinds: numpy.ndarray
+    :param values: the value of each step, as returned by :func:`classify_steps`
+    :type values: numpy.ndarray
+    :param seg_nums: the segment number of each entry
+    :type seg_nums: numpy.ndarray
+    :param indexes: the index of each entry in its segment file
+    :type indexes: numpy.ndarray
+    :param timestamps: the timestamp of each entry
+    :type timestamps: numpy.ndarray
+    :return: the intervals, as a numpy structured array of :data:`ANOMALY_DTYPE`
+    :rtype: numpy.ndarray
+    """
+    if len(kinds) == 0:
+        return np.empty(0, dtype=ANOMALY_DTYPE)
+    changes = np.flatnonzero(np.diff(kinds)) + 1
+    starts = np.concatenate([[0], changes])
+    ends = np.concatenate([changes, [len(kinds)]]) - 1
+    run_values = np.maximum.reduceat(values, starts)
+    flagged = kinds[starts] >= 0
+    starts = starts[flagged]
+    ends = ends[flagged]
+    run_values = run_values[flagged]
+    run_kinds = kinds[starts]
+
+    duplicates = run_kinds == ANOMALY_KINDS.index("duplicate")
+    run_values[duplicates] = (ends - starts + 1)[duplicates]
+
+    intervals = np.empty(len(starts), dtype=ANOMALY_DTYPE)
+    intervals["kind"] = run_kinds
+    intervals["seg_start"] = seg_nums[starts]
+    intervals["index_start"] = indexes[starts]
+    intervals["seg_end"] = seg_nums[ends + 1]
+    intervals["index_end"] = indexes[ends + 1]
+    intervals["time_start"] = timestamps[starts]
+    intervals["time_end"] = timestamps[ends + 1]
+    intervals["value"] = run_values
+    return intervals
+
+
+def find_anomalies(records, seg_num=0, max_gap=MAX_STEP_GAP, max_speed=MAX_SPEED, time_max=None,
+                   latest_position=None):
+    """Finds the anomalies in the entries of a segment file, in file order.
+
+    :param records: the entries of the segment file, as a numpy structured array of
+                    :data:`SEGMENT_DTYPE<olexparser.segment_file.SEGMENT_DTYPE>`
+    :type records: numpy.ndarray
+    :param seg_num: the segment number of the segment file. Defaults to 0
+    :type seg_num: int
+    :param max_gap: the longest step in seconds which is not a gap. Defaults to MAX_STEP_GAP
+    :type max_gap: int
+    :param max_speed: the highest implied speed in knots which is not a jump. Defaults to MAX_SPEED
+    :type max_speed: float
+    :param time_max: the latest timestamp of the entries before the segment file, if it continues another segment
+                     file. Defaults to None
+    :type time_max: int
+    :param latest_position: the 'Olex float' latitude and longitude of the entry with the timestamp time_max.
+                            Defaults to None
+    :type latest_position: tuple
+    :return: the intervals of anomalous entries, as a numpy structured array of :data:`ANOMALY_DTYPE`
+    :rtype: numpy.ndarray
+    """
+    if len(records) < 2:
+        return np.empty(0, dtype=ANOMALY_DTYPE)
+    kinds, values = classify_steps(records["timestamp"], records["lat"], records["long"], max_gap, max_speed,
+                                   time_max, latest_position)
+    return get_intervals(kinds, values, np.full(len(records), seg_num, dtype=np.uint32),
+                         np.arange(len(records), dtype=np.uint32), records["timestamp"])
+
+
+def find_turtur_anomalies(turtur, segment_paths, max_gap=MAX_STEP_GAP, max_speed=MAX_SPEED, diagnostics=None):
+    """Finds the anomalies in the segment files of a Tur Tur, in the order of their summaries.
+
+    Each segment file is memory mapped and checked on its own. The step from the last entry of each segment file
+    to the first entry of the next one is also checked, so anomalies at the boundaries between segment files are
+    found. Steps are measured from the latest timestamp of the Tur Tur so far, as in :func:`classify_steps`.
+    Summaries whose segment file was not found are skipped.
+
+    :param turtur: the Tur Tur
+    :type turtur: olexparser.turtur.TurTur
+    :param segment_paths: a dictionary with key:value - segment number:full file path of the segment file
+    :type segment_paths: dict
+    :param max_gap: the longest step in seconds which is not a gap. Defaults to MAX_STEP_GAP
+    :type max_gap: int
+    :param max_speed: the highest implied speed in knots which is not a jump. Defaults to MAX_SPEED
+    :type max_speed: float
+    :param diagnostics: an optional sink the warnings of the segment files are reported to. Defaults to None
+    :type diagnostics: olexparser.diagnostics.Diagnostics
+    :return: the intervals of anomalous entries, as a numpy structured array of :data:`ANOMALY_DTYPE`
+    :rtype: numpy.ndarray
+    """
+    segment_paths = {int(seg_num): path for seg_num, path in segment_paths.items()}
+    intervals = []
+    last = None
+    time_max = None
+    latest_position = None
+    for summary in turtur.get_segment_summaries():
+        seg_num = summary.get_seg_num()
+        if seg_num not in segment_paths:
+            continue
+        segment = SegmentFile(segment_paths[seg_num], use_mmap=True, diagnostics=diagnostics)
+        records = segment.get_records()
+        if len(records) > 0:
+            if last is not None:
+                boundary = np.concatenate([last[1], records[:1]])
+                kinds, values = classify_steps(boundary["timestamp"], boundary["lat"], boundary["long"], max_gap,
+                                               max_speed, time_max, latest_position)
+                intervals.append(get_intervals(kinds, values, np.array([last[0], seg_num], dtype=np.uint32),
+                                               np.array([last[2], 0], dtype=np.uint32), boundary["timestamp"]))
+            intervals.append(find_anomalies(records, seg_num, max_gap, max_speed, time_max, latest_position))
+            last = (seg_num, records[-1:].copy(), len(records) - 1)
+            timestamps = records["timestamp"]
+            index = len(timestamps) - 1 - int(np.argmax(timestamps[::-1]))
+            if time_max is None or int(timestamps[index]) >= time_max:
+                time_max = int(timestamps[index])
+                latest_position = (float(records["lat"][index]), float(records["long"][index]))
+        del records
+        segment.close()
+    if len(intervals) == 0:
+        return np.empty(0, dtype=ANOMALY_DTYPE)
+    return np.concatenate(intervals)
+
+
+def find_turdata_anomalies(turdata, segment_paths, max_gap=MAX_STEP_GAP, max_speed=MAX_SPEED, diagnostics=None):
+    """Finds the anomalies in the segment files of every Tur Tur of a Turdata file.
+
+    :param turdata: the Turdata file
+    :type turdata: olexparser.turdata_file.TurDataFile
+    :param segment_paths: a dictionary with key:value - segment number:full file path of the segment file
+    :type segment_paths: dict
+    :param max_gap: the longest step in seconds which is not a gap. Defaults to MAX_STEP_GAP
+    :type max_gap: int
+    :param max_speed: the highest implied speed in knots which is not a jump. Defaults to MAX_SPEED
+    :type max_speed: float
+    :param diagnostics: an optional sink the warnings of the segment files are reported to. Defaults to None
+    :type diagnostics: olexparser.diagnostics.Diagnostics
+    :return: a dictionary with key:value - Tur Tur number:numpy structured array of :data:`ANOMALY_DTYPE`
+    :rtype: dict
+    """
+    return {tur_num: find_turtur_anomalies(turdata.get_turtur(tur_num), segment_paths, max_gap, max_speed,
+                                           diagnostics)
+            for tur_num in turdata.get_tur_numbers()}
+
+
+def anomalies_to_dicts(anomalies):
+    """Converts intervals of anomalous entries to dictionaries which can be serialised to JSON.
+
+    :param anomalies: the intervals, as a numpy structured array of :data:`ANOMALY_DTYPE`
+    :type anomalies: numpy.ndarray
+    :return: a list with a dictionary for each interval, with the keys kind, seg_start, index_start, seg_end,
+             index_end, time_start, time_end and value
+    :rtype: list
+    """
+    return [{"kind": ANOMALY_KINDS[kind], "seg_start": seg_start, "index_start": index_start, "seg_end": seg_end,
+             "index_end": index_end, "time_start": time_start, "time_end": time_end,
+             "value": None if value == float("inf") else value}
+            for kind, seg_start, index_start, seg_end, index_end, time_start, time_end, value in anomalies.tolist()]
@@ -0,0 +1,504 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import gpxpy
+import olexparser.convert as convert
+from olexparser.turdata_file import TurDataFile
+from olexparser.ruter_file import RuterFile
+from olexparser.segment_file import SegmentFile, decode_segment_file
+from olexparser.metrics import Metrics
+from olexparser.diagnostics import Diagnostics
+from olexparser.time_index import TimeIndex
+from olexparser.spatial_index import SpatialIndex
+
+
+class OlexArchive:
+    """
+    A Class representing the Olex files found in one folder: the Turdata file, the Ruter file and the segment files.
+
+    The OlexArchive owns the discovery of the files, their parsing and the association of segment files to Tur Turs,
+    so several folders can be processed one after another, or side by side, in the same process.
+    The files are discovered when the OlexArchive is created. Files are parsed when first requested, e.g. with
+    :meth:`get_turdata_files`, or all at once with :meth:`parse`.
+
+    The OlexArchive can be used as a context manager, which calls :meth:`close` on exit.
+    A :class:`ParseCache<olexparser.parse_cache.ParseCache>` and a process pool can be shared between archives;
+    they are not closed by the OlexArchive.
+
+    :param folder: the folder containing the Olex files
+    :type folder: str
+    :param cache: an optional parse cache
+    :type cache: olexparser.parse_cache.ParseCache
+    :param metrics: an optional Metrics object measuring each stage of the parsing, and each file parsed
+    :type metrics: olexparser.metrics.Metrics
+    :param diagnostics: an optional sink the warnings of the archive, and of every file it parses, are reported
+                        to. Without one, a Diagnostics object of the archive keeps every warning
+    :type diagnostics: olexparser.diagnostics.Diagnostics
+    """
+
+    def __init__(self, folder, cache=None, metrics=None, diagnostics=None):
+        """A constructor method for the OlexArchive class.
+
+        :param folder: the folder containing the Olex files
+        :type folder: str
+        :param cache: an optional parse cache. Defaults to None
+        :type cache: olexparser.parse_cache.ParseCache
+        :param metrics: an optional Metrics object. Defaults to None, measuring nothing
+        :type metrics: olexparser.metrics.Metrics
+        :param diagnostics: an optional sink the warnings are reported to. Defaults to None
+        :type diagnostics: olexparser.diagnostics.Diagnostics
+        """
+        self.folder = folder
+        self.cache = cache
+        self.metrics = metrics if metrics is not None else Metrics(enabled=False)
+
+        self.turdata_file = []
+        self.tur_data_files_parsed = None
+
+        self.segment_files = {}
+        self.segment_files_parsed = {}
+        self.segment_files_no_turtur = None
+        self.segment_index = None
+        self.time_index = None
+        self.spatial_index = None
+
+        self.ruter_file = []
+        self.ruter_files_parsed = None
+
+        self.other_files = []
+
+        self.diagnostics = diagnostics if diagnostics is not None else Diagnostics(None, None)
+
+        self.walk_folder()
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def walk_folder(self):
+        """Parse a folder structure and identify OLEX files, including the Ruter file, the Turdata file,
+        and segment files
+        """
+        with self.metrics.stage("discovery") as record:
+            for (dir_path, dir_names, file_names) in os.walk(self.folder):
+                for filename in file_names:
+                    if filename == "Turdata":
+                        self.turdata_file.append(dir_path + "//" + filename)
+                    elif filename == "Ruter":
+                        self.ruter_file.append(dir_path + "//" + filename)
+                    elif filename.startswith("segment") and filename.endswith("_A") and \
+                            filename[len("segment"):-len("_A")].isdigit():
+                        self.segment_files[int(filename[len("segment"):-len("_A")])] = dir_path + "//" + filename
+                    else:
+                        self.other_files.append(dir_path + "//" + filename)
+                record.add(records=len(file_names))
+        return
+
+    def parse(self, jobs=1, executor=None):
+        """Parses every file of the archive and associates the segment files to their Tur Turs.
+
+        With jobs greater than 1, or a given executor, the segment files are decoded in a process pool while the
+        Turdata and Ruter files are parsed. A process pool created here is shut down before returning, even if
+        parsing fails.
+
+        Files which are already parsed are not parsed again, and the segment files are only associated once, so
+        calling parse again is cheap.
+
+        :param jobs: the number of processes used to parse segment files. Defaults to 1
+        :type jobs: int
+        :param executor: an optional process pool to use instead of creating one
+        :type executor: concurrent.futures.ProcessPoolExecutor
+        """
+        if self.segment_files_no_turtur is not None:
+            self.get_ruter_files()
+            return
+
+        own_executor = None
+        if executor is None and jobs > 1 and len(self.segment_files) > 0:
+            executor = own_executor = ProcessPoolExecutor(max_workers=jobs)
+
+        try:
+            # Segment files are decoded by the pool while the Turdata and Ruter files are parsed
+            if executor is not None:
+                segment_paths, segment_results = self.start_segment_parsing(executor, jobs)
+            self.get_turdata_files()
+            self.get_ruter_files()
+            if executor is not None:
+                self.finish_segment_parsing(segment_paths, segment_results)
+        finally:
+            if own_executor is not None:
+                own_executor.shutdown()
+
+        self.associate_segments()
+        return
+
+    def get_turdata_files(self):
+        """Returns the parsed Turdata files, parsing them the first time this method is called.
+
+        :return: a list of :class:`TurDataFile<olexparser.turdata_file.TurDataFile>` objects
+        :rtype: list
+        """
+        if self.tur_data_files_parsed is None:
+            self.tur_data_files_parsed = []
+            if len(self.turdata_file) != 1:
+                warn = "Warning, there should be exactly 1 Tur data file"
+                self.add_warning(warn, "archive-turdata")
+            for i in self.turdata_file:
+                with self.metrics.stage("turdata", i) as record:
+                    turdata = TurDataFile(i, self.cache, diagnostics=self.diagnostics)
+                    record.add(0 if turdata.is_cached() else get_file_size(i),
+                               sum(len(turdata.get_turtur(tur_num).get_segment_summaries())
+                                   for tur_num in turdata.get_tur_numbers()))
+                self.tur_data_files_parsed.append(turdata)
+        return self.tur_data_files_parsed
+
+    def get_ruter_files(self):
+        """Returns the parsed Ruter files, parsing them the first time this method is called.
+
+        :return: a list of :class:`RuterFile<olexparser.ruter_file.RuterFile>` objects
+        :rtype: list
+        """
+        if self.ruter_files_parsed is None:
+            self.ruter_files_parsed = []
+            if len(self.ruter_file) != 1:
+                warn = "Warning, there should be exactly 1 Ruter file"
+                self.add_warning(warn, "archive-ruter")
+            for i in self.ruter_file:
+                with self.metrics.stage("ruter", i) as record:
+                    ruter = RuterFile(i, self.cache, diagnostics=self.diagnostics)
+                    record.add(0 if ruter.is_cached() else get_file_size(i),
+                               sum(len(rute.get_rute_entries()) for rute in ruter.get_rutes()))
+                self.ruter_files_parsed.append(ruter)
+        return self.ruter_files_parsed
+
+    def start_segment_parsing(self, executor, jobs):
+        """Submits every discovered segment file to a process pool for decoding.
+
+        The segment files are submitted in sorted path order, so the results do not depend on the number of
+        workers. Segment files which are still valid in the cache are not submitted.
+
+        :param executor: the process pool used to decode the segment files
+        :type executor: concurrent.futures.ProcessPoolExecutor
+        :param jobs: the number of worker processes in the pool
+        :type jobs: int
+        :return: the segment file paths, and an iterator over their decoded records in the same order
+        :rtype: tuple
+        """
+        paths = [path for path in sorted(self.segment_files.values())
+                 if self.cache is None or not self.cache.contains(path, "segment")]
+        chunk_size = max(1, len(paths) // (max(jobs, 1) * 4))
+        return paths, executor.map(decode_segment_file, paths, chunksize=chunk_size)
+
+    def finish_segment_parsing(self, paths, results):
+        """Builds a SegmentFile for each segment decoded by :meth:`start_segment_parsing`.
+
+        :param paths: the segment file paths
+        :type paths: list
+        :param results: the decoded records of each segment file, in the same order as paths
+        :type results: iterator
+        """
+        for path, records in zip(paths, results):
+            with self.metrics.stage("segment", path) as record:
+                segment = SegmentFile(path, records=records, diagnostics=self.diagnostics)
+                if self.cache is not None and records is not None:
+                    self.cache.store(path, "segment", records)
+                record.add(segment.get_size(), len(segment))
+            self.segment_files_parsed[path] = segment
+        return
+
+    def get_segment_file(self, path):
+        """Returns the SegmentFile for a path, parsing it if it has not been parsed yet.
+
+        :param path: the full file path of the segment file
+        :type path: str
+        :return: the parsed segment file
+        :rtype: SegmentFile
+        """
+        if path not in self.segment_files_parsed:
+            with self.metrics.stage("segment", path) as record:
+                segment = SegmentFile(path, cache=self.cache, diagnostics=self.diagnostics)
+                record.add(0 if segment.is_cached() else segment.get_size(), len(segment))
+            self.segment_files_parsed[path] = segment
+        return self.segment_files_parsed[path]
+
+    def build_segment_index(self):
+        """Internal method which indexes the segment summaries of every Turdata file by segment number, in a single
+        pass over the summaries.
+
+        A warning is generated if a segment number is listed by more than one Tur Tur, the first one is indexed.
+        """
+        self.segment_index = {}
+        for turdata in self.get_turdata_files():
+            for tur_num in turdata.get_tur_numbers():
+                for summary in turdata.get_turtur(tur_num).get_segment_summaries():
+                    seg_num = summary.get_seg_num()
+                    if seg_num in self.segment_index:
+                        warn = "Warning, Segment {} is listed by Tur Tur {} and Tur Tur {}".format(
+                            seg_num, self.segment_index[seg_num][0], tur_num)
+                        self.add_warning(warn, "segment-duplicate")
+                        continue
+                    self.segment_index[seg_num] = (tur_num, summary, self.segment_files.get(seg_num), turdata)
+        return
+
+    def get_segment_index(self):
+        """Returns the index of the segment summaries, building it the first time this method is called.
+
+        :return: a dictionary with key:value - segment number:(Tur Tur number, segment summary, full file path of
+                 the segment file). The path is None if the segment file was not found in the folder
+        :rtype: dict
+        """
+        if self.segment_index is None:
+            self.build_segment_index()
+        return {seg_num: entry[:3] for seg_num, entry in self.segment_index.items()}
+
+    def associate_segments(self):
+        """Associates the segment files to the Tur Turs listing them in the Turdata files.
+
+        Segment files already decoded by the process pool are added to their Tur Tur. The other segment files are
+        attached to their Tur Tur without parsing them: each one is parsed the first time it is retrieved from the
+        Tur Tur, and only then loaded from or stored in the parse cache.
+        Segment files which are not listed by any Tur Tur are kept in a separate list, and a warning is generated
+        for each of them.
+        """
+        # the Turdata files are parsed first, so their parsing is not measured as part of the association
+        self.get_turdata_files()
+        with self.metrics.stage("association") as record:
+            if self.segment_index is None:
+                self.build_segment_index()
+            for seg_num, (tur_num, summary, path, turdata) in self.segment_index.items():
+                if path is None:
+                    continue
+                turtur = turdata.get_turtur(tur_num)
+                if path in self.segment_files_parsed:
+                    turtur.add_segment(seg_num, self.segment_files_parsed[path])
+                else:
+                    turtur.add_segment_path(seg_num, path, self.cache)
+            record.add(records=len(self.segment_index))
+
+        self.segment_files_no_turtur = []
+        for seg_num in sorted(self.segment_files.keys() - self.segment_index.keys()):
+            warn = "Warning, Segment at {} is not associated with a Tur Tur".format(self.segment_files[seg_num])
+            self.add_warning(warn, "segment-orphan", self.segment_files[seg_num])
+            self.segment_files_no_turtur.append(self.get_segment_file(self.segment_files[seg_num]))
+        return
+
+    def get_segment(self, seg_num):
+        """Returns the SegmentFile with a segment number, parsing it the first time it is retrieved.
+
+        :param seg_num: the segment number
+        :type seg_num: int
+        :return: the segment file, or None if no segment file with seg_num was found in the folder
+        :rtype: SegmentFile, None
+        """
+        if self.segment_files_no_turtur is None:
+            self.associate_segments()
+        if seg_num not in self.segment_files:
+            return None
+        if seg_num in self.segment_index:
+            tur_num, summary, path, turdata = self.segment_index[seg_num]
+            if path not in self.segment_files_parsed:
+                with self.metrics.stage("segment", path) as record:
+                    segment = turdata.get_turtur(tur_num).get_segment(seg_num, self.cache, self.diagnostics)
+                    record.add(0 if segment.is_cached() else segment.get_size(), len(segment))
+                self.segment_files_parsed[path] = segment
+            return self.segment_files_parsed[path]
+        return self.get_segment_file(self.segment_files[seg_num])
+
+    def get_time_index(self):
+        """Returns a time index over every segment file of the archive, building it the first time this method is
+        called. The index is seeded from the segment summaries, see :class:`TimeIndex
+        <olexparser.time_index.TimeIndex>`.
+
+        :return: the time index
+        :rtype: olexparser.time_index.TimeIndex
+        """
+        if self.time_index is None:
+            summaries = [summary for tur_num, summary, path in self.get_segment_index().values()]
+            self.time_index = TimeIndex(self.segment_files, summaries, self.cache, diagnostics=self.diagnostics)
+        return self.time_index
+
+    def get_spatial_index(self):
+        """Returns a spatial index over every segment file of the archive, building it the first time this method
+        is called. The index is seeded from the segment summaries, see :class:`SpatialIndex
+        <olexparser.spatial_index.SpatialIndex>`.
+
+        :return: the spatial index
+        :rtype: olexparser.spatial_index.SpatialIndex
+        """
+        if self.spatial_index is None:
+            summaries = [summary for tur_num, summary, path in self.get_segment_index().values()]
+            self.spatial_index = SpatialIndex(self.segment_files, summaries, cache=self.cache,
+                                              diagnostics=self.diagnostics)
+        return self.spatial_index
+
+    def get_segment_files_no_turtur(self):
+        """Returns the segment files which are not associated to a Tur Tur, associating them if needed.
+
+        :return: a list of :class:`SegmentFile<olexparser.segment_file.SegmentFile>` objects
+        :rtype: list
+        """
+        if self.segment_files_no_turtur is None:
+            self.associate_segments()
+        return self.segment_files_no_turtur
+
+    def get_segment_paths(self):
+        """
+        :return: a dictionary with key:value - segment number:full file path of every discovered segment file
+        :rtype: dict
+        """
+        return self.segment_files.copy()
+
+    def get_file_paths(self):
+        """
+        :return: the full paths of the discovered Turdata, Ruter and segment files
+        :rtype: list
+        """
+        return self.turdata_file + self.ruter_file + list(self.segment_files.values())
+
+    def parsed_turdata_data_to_gpx(self):
+        """Converts the contents of a parsed Turdata file into a GPX string
+
+        :return: a string containing the Turdata file contents as GPX format
+        :rtype: gpxpy.gpx.GPX()
+
+        .. todo:: complete gpx conversions
+        """
+        gpx = gpxpy.gpx.GPX()
+        for turdata in self.get_turdata_files():
+            for tur_tur_number in turdata.get_tur_numbers():
+                tur_tur = turdata.get_turtur(tur_tur_number)
+
+                trip = gpxpy.gpx.GPXTrack()
+                gpx.tracks.append(trip)
+
+                trip.name = "Tur Tur {}".format(tur_tur_number)
+                gpx_track_segment = gpxpy.gpx.GPXTrackSegment()
+                trip.segments.append(gpx_track_segment)
+                segments_summaries = tur_tur.get_segment_summaries()
+                if len(segments_summaries) == 0:
+                    continue
+                seg_nums = [summary.get_seg_num() for summary in segments_summaries]
+                lats = convert.get_lat_or_long_dd_array(
+                    [[summary.get_lat_start_float(), summary.get_lat_end_float()] for summary in segments_summaries])
+                longs = convert.get_lat_or_long_dd_array(
+                    [[summary.get_long_start_float(), summary.get_long_end_float()] for summary in segments_summaries])
+                times = convert.get_datetimes_from_ints(
+                    [time for summary in segments_summaries
+                     for time in (summary.get_time_start_int(), summary.get_time_end_int())])
+                for seg_num, (start_lat, stop_lat), (start_long, stop_long), start_time, stop_time in zip(
+                        seg_nums, lats.tolist(), longs.tolist(), times[0::2], times[1::2]):
+                    start_comment = "Segment {} start values".format(seg_num)
+                    start_point = gpxpy.gpx.GPXTrackPoint(start_lat, start_long, time=start_time,
+                                                          comment=start_comment)
+
+                    stop_comment = "Segment {} stop values".format(seg_num)
+                    stop_point = gpxpy.gpx.GPXTrackPoint(stop_lat, stop_long, time=stop_time, comment=stop_comment)
+
+                    gpx_track_segment.points.append(start_point)
+                    gpx_track_segment.points.append(stop_point)
+
+        return gpx
+
+    def print_ruters(self):
+        for i in self.get_ruter_files():
+            i.print_ruter()
+        return
+
+    def print_segments(self):
+        for i in self.get_segment_files_no_turtur():
+            i.print_segment()
+        return
+
+    def print_turdatas(self):
+        for i in self.get_turdata_files():
+            i.print_turdata()
+        return
+
+    def print_other(self):
+        if len(self.other_files) > 0:
+            print("Other files found in the folder:")
+            for i in self.other_files:
+                print(i)
+        return
+
+    def print_all(self):
+        self.print_turdatas()
+        print("********************")
+        self.print_segments()
+        print("********************")
+        self.print_ruters()
+        print("********************")
+        self.print_other()
+        print("********************")
+        self.print_warnings()
+        return
+
+    def print_warnings(self):
+        """Prints the warnings of the archive and of every file it parsed, one per line.
+
+        If the Diagnostics sink does not keep every report, its kept reports are printed instead, followed by the
+        number of reports of each code.
+        """
+        self.get_turdata_files()
+        self.get_ruter_files()
+        self.get_segment_files_no_turtur()
+        if self.diagnostics.max_stored is not None or self.diagnostics.max_per_code is not None:
+            self.diagnostics.print_diagnostics()
+            return
+        for warn in self.get_warnings():
+            print(warn)
+        return
+
+    def add_warning(self, warn, code, file=None):
+        """Reports a warning of the archive to its Diagnostics sink.
+
+        :param warn: the warning string, or the exception raised
+        :type warn: str, Exception
+        :param code: a short identifier of the kind of warning
+        :type code: str
+        :param file: the full path of the file the warning applies to. Defaults to None
+        :type file: str, None
+        """
+        self.diagnostics.report(code, warn, file)
+        return
+
+    def get_warnings(self):
+        """
+        Every file parsed by the archive reports its warnings to the Diagnostics sink of the archive. If a
+        Diagnostics sink was given, only the warnings it kept are returned, see
+        :class:`Diagnostics<olexparser.diagnostics.Diagnostics>`.
+
+        :return: a list of warnings generated by the OlexArchive, and the files it has parsed
+        :rtype: list
+        """
+        return [diagnostic.message for diagnostic in self.diagnostics.get_diagnostics()]
+
+    def close(self):
+        """Releases the parsed files of the archive, closing any memory mapped segment files."""
+        for segment in self.segment_files_parsed.values():
+            segment.close()
+        self.segment_files_parsed = {}
+        self.segment_files_no_turtur = None
+        self.segment_index = None
+        self.time_index = None
+        self.spatial_index = None
+        self.tur_data_files_parsed = None
+        self.ruter_files_parsed = None
+        return
+
+
+def get_file_size(file_path):
+    """Internal function which returns the size of a file, or 0 if it cannot be read.
+
+    :param file_path: the full path of the file
+    :type file_path: str
+    :return: the size of the file in bytes
+    :rtype: int
+    """
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return 0
@@ -0,0 +1,301 @@
+import os
+import sys
+import glob
+import json
+import hashlib
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from olexparser.archive import OlexArchive
+from olexparser.parse_cache import ParseCache
+from olexparser.metrics import Metrics
+from olexparser.diagnostics import Diagnostics
+from olexparser.segment_file import iter_segment_entries
+from olexparser.gpx_writer import write_turdata_gpx
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+#: The number of times an archive is retried after its worker process died, before it is reported as failed.
+MAX_RETRIES = 1
+
+#: The maximum number of warnings kept in the summary of each archive. Every warning is still counted.
+MAX_WARNINGS = 1000
+
+
+def find_archives(roots):
+    """Expands a list of archive roots, each either a folder or a glob pattern matching folders.
+
+    :param roots: folders or glob patterns
+    :type roots: list
+    :return: the sorted, de-duplicated list of archive folders
+    :rtype: list
+    """
+    folders = set()
+    for root in roots:
+        if glob.has_magic(root):
+            folders.update(path for path in glob.glob(root) if os.path.isdir(path))
+        elif os.path.isdir(root):
+            folders.add(root)
+    return sorted(folders)
+
+
+def get_output_names(folders):
+    """Internal function which gives every archive folder a unique name for its output directory.
+
+    The name is the base name of the folder followed by a hash of its absolute path, so an archive keeps the same
+    output and cache directories whichever other archives are in the batch.
+
+    :param folders: the archive folders
+    :type folders: list
+    :return: a dictionary with key:value - archive folder:output name
+    :rtype: dict
+    """
+    names = {}
+    for folder in folders:
+        path = os.path.abspath(folder)
+        base = os.path.basename(path) or "archive"
+        names[folder] = "{}-{}".format(base, hashlib.sha1(path.encode()).hexdigest()[:12])
+    return names
+
+
+def set_memory_limit(memory_limit):
+    """Internal function run in each worker process, limiting the address space of the process to memory_limit.
+
+    An archive needing more memory fails with a MemoryError, which is reported for that archive only.
+    The budget covers the whole address space of the worker, including the interpreter and numpy.
+    The limit is not applied on platforms without the :mod:`resource` module.
+
+    :param memory_limit: the memory budget in bytes, or None for no limit
+    :type memory_limit: int, None
+    """
+    if memory_limit is not None and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    return
+
+
+def make_pool(jobs, memory_limit):
+    """Internal function which creates a pool of worker processes, each limited to memory_limit.
+
+    :param jobs: the number of worker processes
+    :type jobs: int
+    :param memory_limit: the memory budget of each worker process in bytes, or None for no limit
+    :type memory_limit: int, None
+    :return: the pool of worker processes
+    :rtype: concurrent.futures.ProcessPoolExecutor
+    """
+    return ProcessPoolExecutor(max_workers=max(1, jobs), initializer=set_memory_limit, initargs=(memory_limit,))
+
+
+def summarize_archive(archive, chunk_size=65536):
+    """Counts the Tur Turs and segment entries of a parsed archive, and finds the time span of the entries.
+
+    The segment files are read in chunks, so memory use does not depend on the size of the archive.
+
+    :param archive: the parsed archive
+    :type archive: olexparser.archive.OlexArchive
+    :param chunk_size: the number of segment entries read at a time. Defaults to 65536
+    :type chunk_size: int
+    :return: a dictionary with the keys trips, segments, points, time_start and time_end. The times are Unix
+             timestamps, or None if the archive has no segment entries
+    :rtype: dict
+    """
+    trips = sum(len(turdata.get_tur_numbers()) for turdata in archive.get_turdata_files())
+    segment_paths = archive.get_segment_paths()
+    points = 0
+    time_start = None
+    time_end = None
+    for seg_num, chunk in iter_segment_entries(sorted(segment_paths.values()), chunk_size, archive.diagnostics):
+        if len(chunk) == 0:
+            continue
+        points += len(chunk)
+        chunk_start = int(chunk["timestamp"].min())
+        chunk_end = int(chunk["timestamp"].max())
+        time_start = chunk_start if time_start is None else min(time_start, chunk_start)
+        time_end = chunk_end if time_end is None else max(time_end, chunk_end)
+    return {"trips": trips, "segments": len(segment_paths), "points": points, "time_start": time_start,
+            "time_end": time_end}
+
+
+def process_archive(folder, output_dir, cache_dir=None, gpx=False, profile=False):
+    """Parses one archive and writes its summary, and optionally a GPX file and the measurements of each stage, to
+    output_dir.
+
+    Any exception raised while processing the archive is caught and reported in the returned summary, so that a
+    bad archive does not stop the batch.
+
+    :param folder: the archive folder
+    :type folder: str
+    :param output_dir: the directory the outputs of the archive are written to. It is created if it does not exist
+    :type output_dir: str
+    :param cache_dir: an optional parse cache directory for this archive. Defaults to None
+    :type cache_dir: str
+    :param gpx: also write every point of every Tur Tur to a GPX file. Defaults to False
+    :type gpx: bool
+    :param profile: also write the measurements of each stage and each file to profile.json, see
+                    :class:`Metrics<olexparser.metrics.Metrics>`. Defaults to False
+    :type profile: bool
+    :return: the summary of the archive, with the keys folder, status, seconds, warnings and warning_counts, and
+             either the keys returned by :func:`summarize_archive` or error. At most :data:`MAX_WARNINGS` warnings
+             are listed, warning_counts holds the number of warnings of each code
+    :rtype: dict
+    """
+    start = time.perf_counter()
+    summary = {"folder": folder, "status": "ok"}
+    metrics = Metrics(enabled=profile)
+    diagnostics = Diagnostics(MAX_WARNINGS)
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        cache = None
+        if cache_dir is not None:
+            cache = ParseCache(cache_dir, diagnostics=diagnostics)
+        with OlexArchive(folder, cache, metrics, diagnostics) as archive:
+            archive.parse()
+            summary.update(summarize_archive(archive))
+            if gpx:
+                with metrics.stage("export", os.path.join(output_dir, "tracks.gpx")):
+                    with open(os.path.join(output_dir, "tracks.gpx"), 'w', encoding="utf-8") as f:
+                        write_turdata_gpx(f, archive.get_turdata_files(), archive.get_segment_paths(),
+                                          diagnostics=diagnostics)
+            if cache is not None:
+                cache.flush()
+    except Exception as error:
+        summary["status"] = "failed"
+        summary["error"] = repr(error)
+    summary["warnings"] = [str(diagnostic) for diagnostic in diagnostics.get_diagnostics()]
+    summary["warning_counts"] = diagnostics.get_counts()
+    summary["seconds"] = time.perf_counter() - start
+
+    try:
+        with open(os.path.join(output_dir, "summary.json"), 'w') as f:
+            json.dump(summary, f, indent=1)
+        if profile:
+            metrics.save(os.path.join(output_dir, "profile.json"))
+    except OSError as error:
+        summary["warnings"].append(str(error))
+    return summary
+
+
+def run_batch(folders, output_dir, jobs=1, memory_limit=None, cache_dir=None, gpx=False, profile=False):
+    """Processes many archives in a bounded pool of worker processes.
+
+    Each worker process is reused for several archives, and handles one archive at a time within the memory
+    budget memory_limit. The outputs of each archive are written to its own directory in output_dir, see
+    :func:`process_archive`, and a combined summary.json of every archive is written to output_dir.
+
+    When a worker process dies, e.g. when killed by the operating system, every archive of the pool which has no
+    result yet is run again in a pool of its own, so that the other archives are not blamed for it. An archive
+    whose own worker process dies is retried :data:`MAX_RETRIES` times before being reported as failed. Its summary
+    then has the same keys as that of a failed archive, with no warnings and the seconds of its last attempt.
+
+    The output directory of an archive is named after its folder and a hash of its absolute path, see
+    :func:`get_output_names`, and the summary of each archive records its folder.
+
+    :param folders: the archive folders
+    :type folders: list
+    :param output_dir: the directory the outputs are written to
+    :type output_dir: str
+    :param jobs: the number of worker processes. Defaults to 1
+    :type jobs: int
+    :param memory_limit: the memory budget of each worker process in bytes, or None for no limit. Defaults to None
+    :type memory_limit: int, None
+    :param cache_dir: an optional directory holding a parse cache for each archive. Defaults to None
+    :type cache_dir: str
+    :param gpx: also write a GPX file for each archive. Defaults to False
+    :type gpx: bool
+    :param profile: also write the measurements of each stage for each archive. Defaults to False
+    :type profile: bool
+    :return: the combined summary, with the keys archives, failed, trips, points, time_start, time_end and
+             results, a list of the summary of each archive in the order of folders
+    :rtype: dict
+    """
+    names = get_output_names(folders)
+    arguments = {folder: (folder, os.path.join(output_dir, name),
+                          None if cache_dir is None else os.path.join(cache_dir, name), gpx, profile)
+                 for folder, name in names.items()}
+
+    results = {}
+    suspects = []
+    with make_pool(jobs, memory_limit) as executor:
+        futures = {executor.submit(process_archive, *arguments[folder]): folder for folder in folders}
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except BrokenProcessPool:
+                suspects.append(futures[future])
+
+    # a dead worker breaks the whole pool, so each archive left without a result is run again in a pool of its
+    # own, and only an archive which kills the worker of its own pool is charged a retry
+    retries = {folder: 0 for folder in suspects}
+    pending = [folder for folder in folders if folder in retries]
+    while len(pending) > 0:
+        running = [(folder, make_pool(1, memory_limit)) for folder in pending[:max(1, jobs)]]
+        pending = pending[max(1, jobs):]
+        start = time.perf_counter()
+        futures = [(folder, executor, executor.submit(process_archive, *arguments[folder]))
+                   for folder, executor in running]
+        for folder, executor, future in futures:
+            try:
+                results[folder] = future.result()
+            except BrokenProcessPool as error:
+                retries[folder] += 1
+                if retries[folder] > MAX_RETRIES:
+                    results[folder] = {"folder": folder, "status": "failed", "error": repr(error), "warnings": [],
+                                       "warning_counts": {}, "seconds": time.perf_counter() - start}
+                else:
+                    pending.append(folder)
+            finally:
+                executor.shutdown()
+
+    summary = {"archives": len(folders), "failed": 0, "trips": 0, "points": 0, "time_start": None,
+               "time_end": None, "results": [results[folder] for folder in folders]}
+    for result in summary["results"]:
+        if result["status"] != "ok":
+            summary["failed"] += 1
+            continue
+        summary["trips"] += result["trips"]
+        summary["points"] += result["points"]
+        if result["time_start"] is not None:
+            if summary["time_start"] is None or result["time_start"] < summary["time_start"]:
+                summary["time_start"] = result["time_start"]
+            if summary["time_end"] is None or result["time_end"] > summary["time_end"]:
+                summary["time_end"] = result["time_end"]
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "summary.json"), 'w') as f:
+        json.dump(summary, f, indent=1)
+    return summary
+
+
+def main(argv=None):
+    """Command line entry point to process many Olex folders in one run."""
+    parser = argparse.ArgumentParser(description="Parse many Olex folders concurrently.")
+    parser.add_argument("roots", nargs="+", help="Olex folders, or glob patterns matching Olex folders")
+    parser.add_argument("-o", "--output", required=True, help="the directory the outputs are written to")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="the number of archives processed at the same time (default: 1)")
+    parser.add_argument("--memory", type=int, metavar="MIB",
+                        help="the memory budget of each worker process in MiB (default: no limit)")
+    parser.add_argument("--cache-dir", help="a directory used to cache parsed files between runs")
+    parser.add_argument("--gpx", action="store_true", help="also write a GPX file for each archive")
+    parser.add_argument("--profile", action="store_true",
+                        help="also write the wall time, CPU time, bytes and records of each stage for each archive")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    folders = find_archives(args.roots)
+    memory_limit = None if args.memory is None else args.memory * 1024 * 1024
+    summary = run_batch(folders, args.output, args.jobs, memory_limit, args.cache_dir, args.gpx,
+                        args.profile)
+    print("Processed {} archives, {} failed: {} trips, {} points".format(
+        summary["archives"], summary["failed"], summary["trips"], summary["points"]))
+    for result in summary["results"]:
+        if result["status"] != "ok":
+            print("Failed {}: {}".format(result["folder"], result["error"]))
+    return summary
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 import datetime
 import math
 import pytz
+import numpy as np
 
 
 def get_timestamp_str_from_bytes(time_bytes, timezone=pytz.timezone("UTC")):
@@ -80,3 +81,114 @@ def get_lat_or_long_dd(lat_or_long):
     lat_m = (lat_or_long - (lat_d * 60)) / 60
     lat_dd = lat_d + lat_m
     return lat_dd
+
+
+def get_lat_or_long_dd_array(lats_or_longs):
+    """Takes an array of OLEX floats and converts them into DD notation (e.g. -74.003)
+
+    An 'Olex float' is a coordinate in minutes of arc, so this is equivalent to calling
+    :func:`get_lat_or_long_dd` on every element.
+
+    :param lats_or_longs: 'Olex floats' representing latitude or longitude coordinates.
+    :type lats_or_longs: numpy.ndarray
+    :return: DD notation coordinates
+    :rtype: numpy.ndarray
+    """
+    return np.asarray(lats_or_longs, dtype=np.float64) / 60
+
+
+def get_datetime64_from_ints(time_ints):
+    """Takes an array of integers representing Unix Timestamps and returns them as UTC datetime64 values
+
+    :param time_ints: integers representing Unix Timestamps
+    :type time_ints: numpy.ndarray
+    :return: the timestamps with a precision of one second
+    :rtype: numpy.ndarray
+    """
+    return np.asarray(time_ints, dtype=np.int64).astype("datetime64[s]")
+
+
+def get_datetimes_from_ints(time_ints):
+    """Takes an array of integers representing Unix Timestamps and returns them as UTC datetimes
+
+    :param time_ints: integers representing Unix Timestamps
+    :type time_ints: numpy.ndarray
+    :return: the timestamps as :class:`datetime.datetime` objects, the same as :func:`get_timestamp_str_from_int`
+             returns
+    :rtype: list
+    """
+    return [value.replace(tzinfo=pytz.utc) for value in get_datetime64_from_ints(time_ints).tolist()]
+
+
+def get_iso_timestamp_strs_from_ints(time_ints):
+    """Takes an array of integers representing Unix Timestamps and returns them as ISO 8601 UTC strings
+    (e.g. 2014-12-15T08:29:17Z)
+
+    :param time_ints: integers representing Unix Timestamps
+    :type time_ints: numpy.ndarray
+    :return: the timestamps as strings
+    :rtype: numpy.ndarray
+    """
+    return np.char.add(np.datetime_as_string(get_datetime64_from_ints(time_ints), unit="s"), "Z")
+
+
+def get_timestamp_strs_from_ints(time_ints):
+    """Takes an array of integers representing Unix Timestamps and returns them as UTC strings in the same format
+    as printing the result of :func:`get_timestamp_str_from_int` (e.g. 2014-12-15 08:29:17+00:00)
+
+    :param time_ints: integers representing Unix Timestamps
+    :type time_ints: numpy.ndarray
+    :return: the timestamps as strings
+    :rtype: numpy.ndarray
+    """
+    times = np.datetime_as_string(get_datetime64_from_ints(time_ints), unit="s")
+    return np.char.add(np.char.replace(times, "T", " "), "+00:00")
+
+
+def get_dmm_strs(olex_floats, positive, negative):
+    """Internal function which formats an array of OLEX floats in DMM notation.
+
+    The output is the same as calling :func:`get_lat_dmm` or :func:`get_long_dmm` on every element: the degrees
+    and minutes are computed for the whole array at once, and the minutes are then truncated to at most 3 decimal
+    places as text (e.g. 6.432, or 0.5 rather than 0.500).
+
+    :param olex_floats: 'Olex floats' representing latitude or longitude coordinates.
+    :type olex_floats: numpy.ndarray
+    :param positive: the hemisphere letter of positive values
+    :type positive: str
+    :param negative: the hemisphere letter of negative values
+    :type negative: str
+    :return: the coordinates as strings
+    :rtype: list
+    """
+    olex_floats = np.asarray(olex_floats, dtype=np.float64)
+    degrees = np.trunc(np.fabs(olex_floats / 60))
+    minutes = np.fabs(olex_floats) - degrees * 60
+    hemispheres = np.where(olex_floats > 0, positive, negative)
+    strs = []
+    for d, m, h in zip(degrees.astype(np.int64).tolist(), minutes.tolist(), hemispheres.tolist()):
+        m = str(m)
+        strs.append("{}'{} {}".format(d, m[:m.index('.') + 4], h))
+    return strs
+
+
+def get_lat_dmm_strs(lats):
+    """Takes an array of OLEX floats and converts them into DMM latitude notation (eg. 51'6.432 N)
+
+    :param lats: 'Olex floats' representing latitude coordinates.
+    :type lats: numpy.ndarray
+    :return: latitude coordinates (eg. 51'6.432 N)
+    :rtype: list
+    """
+    return get_dmm_strs(lats, "N", "S")
+
+
+def get_long_dmm_strs(longs):
+    """Takes an array of OLEX floats and converts them into DMM longitude notation (e.g. 51'6.432 W)
+
+    :param longs: 'Olex floats' representing longitude coordinates.
+    :type longs: numpy.ndarray
+    :return: longitude coordinates (e.g. 51'6.432 W)
+    :rtype: list
+    """
+    return get_dmm_strs(longs, "E", "W")
@@ -0,0 +1,279 @@
+INFO = "info"
+WARNING = "warning"
+ERROR = "error"
+
+
+class WarningList:
+    """
+    A mixin keeping the warnings of objects which are created in large numbers, such as segment entries.
+
+    The class using it declares a ``warnings`` slot and sets it to None. The list is only created when the first
+    warning is added.
+    """
+
+    __slots__ = ()
+
+    def add_warning(self, warn):
+        """Internal method which records a warning, creating the warnings list if needed.
+
+        :param warn: the warning to record
+        :type warn: str, Exception
+        """
+        if self.warnings is None:
+            self.warnings = []
+        self.warnings.append(warn)
+        return
+
+    def get_warnings(self):
+        """
+        :return: a list of warnings generated by the object
+        :rtype: list
+        """
+        if self.warnings is None:
+            return []
+        return self.warnings.copy()
+
+
+class WarningReporter:
+    """
+    A mixin reporting the warnings of a parsed file to a :class:`Diagnostics` sink.
+
+    The class using it sets ``full_path`` to the path of its file and calls :meth:`set_diagnostics`. Without a
+    sink, a Diagnostics object of its own keeps every warning. The warnings of child objects are reported to the
+    same sink when they are found, so :meth:`get_warnings` never has to gather them from the children.
+    """
+
+    def set_diagnostics(self, diagnostics):
+        """Internal method which sets the sink the warnings are reported to.
+
+        :param diagnostics: the sink, or None to keep every warning in a Diagnostics object of its own
+        :type diagnostics: Diagnostics, None
+        """
+        self.diagnostics = diagnostics if diagnostics is not None else Diagnostics(None, None)
+        self.warning_count = 0
+        return
+
+    def add_warning(self, warn, code, offset=None):
+        """Internal method which reports a warning to the Diagnostics sink.
+
+        :param warn: the warning string, or the exception raised
+        :type warn: str, Exception
+        :param code: a short identifier of the kind of warning
+        :type code: str
+        :param offset: the byte offset in the file the warning applies to. Defaults to None
+        :type offset: int, None
+        """
+        self.warning_count += 1
+        self.diagnostics.report(code, warn, self.full_path, offset)
+        return
+
+    def get_warnings(self):
+        """
+        If a shared Diagnostics sink was given, only the warnings it kept are returned.
+
+        :return: a list of warnings reported for the file
+        :rtype: list
+        """
+        return [diagnostic.message for diagnostic in self.diagnostics.get_diagnostics(file=self.full_path)]
+
+
+class Diagnostic:
+    """
+    A Class representing a single warning or error reported by a parser.
+
+    :param code: a short identifier of the kind of problem, e.g. "segment-size" or "turdata-summary"
+    :type code: str
+    :param severity: one of :data:`INFO`, :data:`WARNING` or :data:`ERROR`
+    :type severity: str
+    :param message: the warning string, or the exception raised
+    :type message: str, Exception
+    :param file: the full path of the file the problem was found in, or None
+    :type file: str, None
+    :param offset: the byte offset in the file the problem was found at, or None
+    :type offset: int, None
+    """
+
+    __slots__ = ("code", "severity", "message", "file", "offset")
+
+    def __init__(self, code, severity, message, file=None, offset=None):
+        """A constructor method for the Diagnostic class.
+
+        :param code: a short identifier of the kind of problem
+        :type code: str
+        :param severity: one of INFO, WARNING or ERROR
+        :type severity: str
+        :param message: the warning string, or the exception raised
+        :type message: str, Exception
+        :param file: the full path of the file the problem was found in. Defaults to None
+        :type file: str, None
+        :param offset: the byte offset in the file the problem was found at. Defaults to None
+        :type offset: int, None
+        """
+        self.code = code
+        self.severity = severity
+        self.message = message
+        self.file = file
+        self.offset = offset
+        return
+
+    def __str__(self):
+        """
+        :return: a one line description of the Diagnostic
+        :rtype: str
+        """
+        s = "[{}] {}: {}".format(self.severity, self.code, self.message)
+        if self.file is not None:
+            s = s + " ({}".format(self.file)
+            if self.offset is not None:
+                s = s + " at offset {}".format(self.offset)
+            s = s + ")"
+        return s
+
+    def to_dict(self):
+        """
+        :return: the Diagnostic as a dictionary which can be serialised to JSON
+        :rtype: dict
+        """
+        return {"code": self.code, "severity": self.severity, "message": str(self.message), "file": self.file,
+                "offset": self.offset}
+
+
+class Diagnostics:
+    """
+    A Class collecting the warnings and errors reported by the parsers of an archive into a single sink.
+
+    Parsers given a Diagnostics object report each problem to it, instead of keeping the warnings in their own
+    lists. This means the warnings of a whole archive never have to be gathered recursively from every object.
+
+    Every report is counted by code and by severity, so the totals are exact and can be read in constant time.
+    Only the first max_stored reports are kept, and at most max_per_code of each code, so a corrupt archive
+    reporting millions of problems uses bounded memory. The number of reports that were not kept is available
+    from :meth:`get_dropped`.
+
+    :param max_stored: the maximum number of reports kept, or None to keep every report. Defaults to 1000
+    :type max_stored: int, None
+    :param max_per_code: the maximum number of reports of each code kept, or None for no limit. Defaults to 100
+    :type max_per_code: int, None
+    """
+
+    def __init__(self, max_stored=1000, max_per_code=100):
+        """A constructor method for the Diagnostics class.
+
+        :param max_stored: the maximum number of reports kept, or None to keep every report. Defaults to 1000
+        :type max_stored: int, None
+        :param max_per_code: the maximum number of reports of each code kept, or None for no limit. Defaults to 100
+        :type max_per_code: int, None
+        """
+        self.max_stored = max_stored
+        self.max_per_code = max_per_code
+        self.diagnostics = []
+        self.counts = {}
+        self.stored_counts = {}
+        self.severity_counts = {INFO: 0, WARNING: 0, ERROR: 0}
+        self.total = 0
+        return
+
+    def __len__(self):
+        """
+        :return: the total number of reports, including those not kept
+        :rtype: int
+        """
+        return self.total
+
+    def report(self, code, message, file=None, offset=None, severity=None):
+        """Reports a problem.
+
+        :param code: a short identifier of the kind of problem, e.g. "segment-size"
+        :type code: str
+        :param message: the warning string, or the exception raised
+        :type message: str, Exception
+        :param file: the full path of the file the problem was found in. Defaults to None
+        :type file: str, None
+        :param offset: the byte offset in the file the problem was found at. Defaults to None
+        :type offset: int, None
+        :param severity: one of :data:`INFO`, :data:`WARNING` or :data:`ERROR`. Defaults to ERROR if message is
+                         an exception, WARNING otherwise
+        :type severity: str
+        """
+        if severity is None:
+            severity = ERROR if isinstance(message, Exception) else WARNING
+        self.total += 1
+        self.counts[code] = self.counts.get(code, 0) + 1
+        self.severity_counts[severity] = self.severity_counts.get(severity, 0) + 1
+
+        stored = self.stored_counts.get(code, 0)
+        if ((self.max_stored is None or len(self.diagnostics) < self.max_stored) and
+                (self.max_per_code is None or stored < self.max_per_code)):
+            self.diagnostics.append(Diagnostic(code, severity, message, file, offset))
+            self.stored_counts[code] = stored + 1
+        return
+
+    def get_count(self, code=None):
+        """
+        :param code: the code to count, or None to count every report. Defaults to None
+        :type code: str, None
+        :return: the number of reports of a code, including those not kept
+        :rtype: int
+        """
+        if code is None:
+            return self.total
+        return self.counts.get(code, 0)
+
+    def get_counts(self):
+        """
+        :return: a dictionary with key:value - code:number of reports
+        :rtype: dict
+        """
+        return self.counts.copy()
+
+    def get_severity_counts(self):
+        """
+        :return: a dictionary with key:value - severity:number of reports
+        :rtype: dict
+        """
+        return self.severity_counts.copy()
+
+    def has_errors(self):
+        """
+        :return: True if an :data:`ERROR` was reported, False otherwise
+        :rtype: bool
+        """
+        return self.severity_counts.get(ERROR, 0) > 0
+
+    def get_dropped(self):
+        """
+        :return: the number of reports which were counted but not kept
+        :rtype: int
+        """
+        return self.total - len(self.diagnostics)
+
+    def get_diagnostics(self, code=None, file=None):
+        """
+        :param code: only return the reports of this code, or None for every code. Defaults to None
+        :type code: str, None
+        :param file: only return the reports for this file, or None for every file. Defaults to None
+        :type file: str, None
+        :return: the kept :class:`Diagnostic` objects, in the order they were reported
+        :rtype: list
+        """
+        return [diagnostic for diagnostic in self.diagnostics if (code is None or diagnostic.code == code) and
+                (file is None or diagnostic.file == file)]
+
+    def to_dict(self):
+        """
+        :return: the counts and the kept reports, as a dictionary which can be serialised to JSON
+        :rtype: dict
+        """
+        return {"total": self.total, "dropped": self.get_dropped(), "counts": self.get_counts(),
+                "severities": self.get_severity_counts(),
+                "diagnostics": [diagnostic.to_dict() for diagnostic in self.diagnostics]}
+
+    def print_diagnostics(self):
+        """Prints the kept reports, followed by the number of reports of each code"""
+        for diagnostic in self.diagnostics:
+            print(diagnostic)
+        if self.get_dropped() > 0:
+            print("{} more reports not shown".format(self.get_dropped()))
+        for code, count in sorted(self.counts.items()):
+            print("{}: {}".format(code, count))
+        return
@@ -0,0 +1,47 @@
+import numpy as np
+
+#: The mean radius of the earth in nautical miles.
+EARTH_RADIUS_NM = 3440.065
+
+
+def get_distances(lats1, longs1, lats2, longs2):
+    """Returns the great circle distances between pairs of positions, using the haversine formula.
+
+    Either pair of positions may be a single position, which is then measured against every position of the other.
+
+    :param lats1: the 'Olex float' latitudes of the first positions
+    :type lats1: numpy.ndarray
+    :param longs1: the 'Olex float' longitudes of the first positions
+    :type longs1: numpy.ndarray
+    :param lats2: the 'Olex float' latitudes of the second positions
+    :type lats2: numpy.ndarray
+    :param longs2: the 'Olex float' longitudes of the second positions
+    :type longs2: numpy.ndarray
+    :return: the distances in nautical miles
+    :rtype: numpy.ndarray
+    """
+    lats1 = np.radians(np.asarray(lats1, dtype=np.float64) / 60)
+    lats2 = np.radians(np.asarray(lats2, dtype=np.float64) / 60)
+    d_longs = np.radians((np.asarray(longs2, dtype=np.float64) - np.asarray(longs1, dtype=np.float64)) / 60)
+    a = np.sin((lats2 - lats1) / 2) ** 2 + np.cos(lats1) * np.cos(lats2) * np.sin(d_longs / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def get_step_distances(lats, longs):
+    """Returns the great circle distances between consecutive positions of a track, using the haversine formula.
+
+    This is equivalent to ``get_distances(lats[:-1], longs[:-1], lats[1:], longs[1:])``, but converts each
+    position and computes its cosine only once.
+
+    :param lats: the 'Olex float' latitudes of the track
+    :type lats: numpy.ndarray
+    :param longs: the 'Olex float' longitudes of the track
+    :type longs: numpy.ndarray
+    :return: the distances in nautical miles, one shorter than the track
+    :rtype: numpy.ndarray
+    """
+    lats = np.radians(np.asarray(lats, dtype=np.float64) / 60)
+    longs = np.radians(np.asarray(longs, dtype=np.float64) / 60)
+    cos_lats = np.cos(lats)
+    a = np.sin(np.diff(lats) / 2) ** 2 + cos_lats[:-1] * cos_lats[1:] * np.sin(np.diff(longs) / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
@@ -0,0 +1,170 @@
+from xml.sax.saxutils import escape
+import olexparser.convert as convert
+from olexparser.segment_file import SegmentFile
+
+GPX_HEADER = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+              '<gpx version="1.1" creator="{}" xmlns="http://www.topografix.com/GPX/1/1">\n')
+GPX_FOOTER = '</gpx>\n'
+
+
+class GPXWriter:
+    """
+    A Class which writes a GPX file to a file handle as points are produced.
+
+    Unlike building a :class:`gpxpy.gpx.GPX` object, no object is created per point and nothing is kept in memory
+    once written, so tracks of any length can be exported with flat memory use.
+    Points are written in batches from the numpy arrays decoded from segment files.
+
+    The GPXWriter can be used as a context manager, which closes the document on exit::
+
+        with open("out.gpx", "w") as f, GPXWriter(f) as gpx:
+            gpx.start_track("Tur Tur 1")
+            gpx.start_segment()
+            gpx.write_records(segment.get_records())
+            gpx.end_segment()
+            gpx.end_track()
+
+    :param f: a text file handle the GPX document is written to
+    :type f: io.TextIOBase
+    :param creator: the creator attribute of the GPX document. Defaults to "olexparser"
+    :type creator: str
+    """
+
+    def __init__(self, f, creator="olexparser"):
+        """A constructor method for the GPXWriter class.
+
+        :param f: a text file handle the GPX document is written to
+        :type f: io.TextIOBase
+        :param creator: the creator attribute of the GPX document. Defaults to "olexparser"
+        :type creator: str
+        """
+        self.f = f
+        self.in_track = False
+        self.in_segment = False
+        self.closed = False
+        self.points_written = 0
+
+        self.f.write(GPX_HEADER.format(escape(creator, {'"': "&quot;"})))
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def start_track(self, name=None):
+        """Starts a new track (<trk>), ending the current track if there is one.
+
+        :param name: an optional name for the track
+        :type name: str
+        """
+        self.end_track()
+        self.f.write("<trk>\n")
+        if name is not None:
+            self.f.write("<name>{}</name>\n".format(escape(name)))
+        self.in_track = True
+        return
+
+    def start_segment(self):
+        """Starts a new track segment (<trkseg>) in the current track, ending the current segment if there is one.
+
+        A track is started if there is none.
+        """
+        if not self.in_track:
+            self.start_track()
+        self.end_segment()
+        self.f.write("<trkseg>\n")
+        self.in_segment = True
+        return
+
+    def write_points(self, lats, longs, timestamps):
+        """Writes a batch of points (<trkpt>) to the current track segment.
+
+        A track segment is started if there is none.
+
+        :param lats: the latitudes in decimal degrees
+        :type lats: numpy.ndarray
+        :param longs: the longitudes in decimal degrees
+        :type longs: numpy.ndarray
+        :param timestamps: the Unix timestamps of the points
+        :type timestamps: numpy.ndarray
+        """
+        if not self.in_segment:
+            self.start_segment()
+        times = convert.get_iso_timestamp_strs_from_ints(timestamps)
+        self.f.write("".join(['<trkpt lat="{:.6f}" lon="{:.6f}"><time>{}</time></trkpt>\n'.format(lat, long, time)
+                              for lat, long, time in zip(lats.tolist(), longs.tolist(), times.tolist())]))
+        self.points_written += len(times)
+        return
+
+    def write_records(self, records):
+        """Writes a batch of entries decoded from a segment file to the current track segment.
+
+        :param records: a numpy structured array of
+                        :data:`SEGMENT_DTYPE<olexparser.segment_file.SEGMENT_DTYPE>`
+        :type records: numpy.ndarray
+        """
+        self.write_points(convert.get_lat_or_long_dd_array(records["lat"]),
+                          convert.get_lat_or_long_dd_array(records["long"]), records["timestamp"])
+        return
+
+    def end_segment(self):
+        """Ends the current track segment, if there is one."""
+        if self.in_segment:
+            self.f.write("</trkseg>\n")
+            self.in_segment = False
+        return
+
+    def end_track(self):
+        """Ends the current track, if there is one."""
+        self.end_segment()
+        if self.in_track:
+            self.f.write("</trk>\n")
+            self.in_track = False
+        return
+
+    def close(self):
+        """Ends the current track and the GPX document. The file handle is not closed."""
+        if not self.closed:
+            self.end_track()
+            self.f.write(GPX_FOOTER)
+            self.closed = True
+        return
+
+
+def write_turdata_gpx(f, turdata_files, segment_paths, chunk_size=65536, diagnostics=None):
+    """Writes every point of every Tur Tur to a GPX file, reading the segment files in chunks.
+
+    Each Tur Tur becomes a track, and each of its segment files a track segment. Segment files are read with
+    :meth:`SegmentFile.iter_entries<olexparser.segment_file.SegmentFile.iter_entries>`, so memory use does not
+    depend on the size of the archive. Summaries whose segment file was not found are skipped.
+
+    :param f: a text file handle the GPX document is written to
+    :type f: io.TextIOBase
+    :param turdata_files: the parsed Turdata files
+    :type turdata_files: list
+    :param segment_paths: a dictionary with key:value - segment number:full file path of the segment file
+    :type segment_paths: dict
+    :param chunk_size: the number of segment entries read at a time. Defaults to 65536
+    :type chunk_size: int
+    :param diagnostics: an optional sink the warnings of the segment files are reported to. Defaults to None
+    :type diagnostics: olexparser.diagnostics.Diagnostics
+    """
+    segment_paths = {int(seg_num): path for seg_num, path in segment_paths.items()}
+    with GPXWriter(f) as gpx:
+        for turdata in turdata_files:
+            for tur_num in turdata.get_tur_numbers():
+                gpx.start_track("Tur Tur {}".format(tur_num))
+                for summary in turdata.get_turtur(tur_num).get_segment_summaries():
+                    if summary.get_seg_num() not in segment_paths:
+                        continue
+                    segment = SegmentFile(segment_paths[summary.get_seg_num()], use_mmap=True,
+                                          diagnostics=diagnostics)
+                    gpx.start_segment()
+                    for chunk in segment.iter_entries(chunk_size):
+                        gpx.write_records(chunk)
+                    gpx.end_segment()
+                gpx.end_track()
+    return
@@ -1,172 +1,290 @@
 import os
 import sys
-import gpxpy
-import olexparser.convert as convert
-from olexparser.turdata_file import TurDataFile
-from olexparser.ruter_file import RuterFile
-from olexparser.segment_file import SegmentFile
-
-turdata_file = []
-tur_data_files_parsed = []
-
-segment_files = {}
-segment_files_no_turtur = []
+import json
+import argparse
+import numpy as np
+from olexparser.archive import OlexArchive, get_file_size
+from olexparser.metrics import Metrics
+from olexparser.diagnostics import Diagnostics
+from olexparser.segment_file import SEGMENT_ENTRY_SIZE
+from olexparser.parse_cache import ParseCache
+from olexparser.manifest import Manifest
+from olexparser.verify import verify_turdata, write_report
+from olexparser.gpx_writer import write_turdata_gpx
+from olexparser.trip_stats import TripStats, get_turdata_stats, get_stats_cache_kind
+from olexparser.anomalies import ANOMALY_KINDS, find_turdata_anomalies, anomalies_to_dicts
+
+#: The archive of the last call to :func:`walk_folder` or :func:`main`, used by the module functions which are kept
+#: for compatibility with earlier versions. New code should use :class:`OlexArchive<olexparser.archive.OlexArchive>`.
+current_archive = None
+
+
+def rescan(manifest, archive, cache):
+    """Compares the discovered Turdata, Ruter and segment files against a manifest from a previous run.
+
+    The content hashes recorded by the manifest are passed on to the parse cache, so with ``--cache-hash`` a file
+    whose content did not change is loaded from the cache without being read, even if it was touched. The cache
+    entries of changed and removed files are dropped, as they can no longer be used.
+
+    :param manifest: the manifest of the previous run
+    :type manifest: Manifest
+    :param archive: the archive whose files are compared against the manifest
+    :type archive: OlexArchive
+    :param cache: the parse cache holding the results of the previous run
+    :type cache: ParseCache
+    """
+    manifest.scan(archive.get_file_paths())
+    for path, state in manifest.get_file_states().items():
+        if "hash" in state:
+            cache.set_content_hash(path, state["size"], state["mtime_ns"], state["hash"])
+    for path in manifest.get_changed_files() + manifest.get_removed_files():
+        cache.invalidate(path)
+    print("Rescan: {} new, {} changed, {} unchanged, {} removed files".format(
+        len(manifest.get_new_files()), len(manifest.get_changed_files()), len(manifest.get_unchanged_files()),
+        len(manifest.get_removed_files())))
+    return
 
-ruter_file = []
-ruter_files_parsed = []
 
-other_files = []
+def parse_args(argv):
+    """Parses the command line arguments.
 
-warnings = []
+    :param argv: the command line arguments, excluding the program name
+    :type argv: list
+    :return: the parsed arguments
+    :rtype: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description="Parse the files found in an Olex folder.")
+    parser.add_argument("folder", help="the folder containing the Olex files")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="the number of processes used to parse segment files (default: 1)")
+    parser.add_argument("--cache-dir", help="a directory used to cache parsed files between runs")
+    parser.add_argument("--cache-size", type=int, default=1024,
+                        help="the maximum size of the cache in MiB (default: 1024)")
+    parser.add_argument("--cache-hash", action="store_true",
+                        help="identify cached files by a hash of their content instead of their modification time")
+    parser.add_argument("--manifest", metavar="FILE",
+                        help="record the files parsed in a manifest, and on later runs only parse new or changed "
+                             "files. Parsed files are cached in --cache-dir, or next to the manifest if not given")
+    parser.add_argument("--verify", metavar="REPORT",
+                        help="check every Turdata segment summary against its segment file and write a JSON report")
+    parser.add_argument("--gpx", metavar="FILE",
+                        help="write every point of every Tur Tur to a GPX file, one track per Tur Tur")
+    parser.add_argument("--stats", metavar="FILE",
+                        help="write the distance, speeds, duration and bounding box of every Tur Tur to a JSON file")
+    parser.add_argument("--anomalies", metavar="FILE",
+                        help="write the time gaps, backwards timestamps, duplicate entries and impossible position "
+                             "jumps of every Tur Tur to a JSON file")
+    parser.add_argument("--time-range", type=int, nargs=2, metavar=("START", "END"),
+                        help="print the number of segment entries between two Unix timestamps, per segment file")
+    parser.add_argument("--bbox", type=float, nargs=4, metavar=("MIN_LAT", "MIN_LONG", "MAX_LAT", "MAX_LONG"),
+                        help="print the number of segment entries inside a box in decimal degrees, per segment file")
+    parser.add_argument("--max-warnings", type=int, metavar="N",
+                        help="collect the warnings of every file in one place, keeping at most N of them and "
+                             "counting the rest by kind")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="measure each stage and each file parsed, and write the measurements to a JSON file")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="also measure the peak memory of each stage with --profile. Slows parsing down")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Parses the files found in an Olex folder.
+
+    :param argv: the command line arguments, excluding the program name. Defaults to sys.argv[1:]
+    :type argv: list
+    :return: the parsed archive
+    :rtype: OlexArchive
+    """
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    # the warnings of every file, the cache and the manifest are reported to one sink
+    if args.max_warnings is not None:
+        diagnostics = Diagnostics(args.max_warnings)
+    else:
+        diagnostics = Diagnostics(None, None)
+
+    cache_dir = args.cache_dir
+    if cache_dir is None and args.manifest is not None:
+        cache_dir = os.path.splitext(args.manifest)[0] + "_cache"
+    cache = None
+    if cache_dir is not None:
+        cache = ParseCache(cache_dir, args.cache_size * 1024 * 1024, args.cache_hash, diagnostics)
+
+    metrics = None
+    if args.profile is not None:
+        metrics = Metrics(trace_memory=args.profile_memory)
+
+    global current_archive
+    archive = current_archive = OlexArchive(args.folder, cache, metrics, diagnostics)
+
+    manifest = None
+    if args.manifest is not None:
+        manifest = Manifest(args.manifest, args.cache_hash, diagnostics)
+        rescan(manifest, archive, cache)
+
+    archive.parse(args.jobs)
+
+    # the segment files read by the verification and the export
+    segment_bytes = sum(get_file_size(path) for tur_num, summary, path in archive.get_segment_index().values()
+                        if path is not None)
+
+    if args.verify is not None:
+        with archive.metrics.stage("verify") as record:
+            reports = [verify_turdata(turdata, archive.get_segment_paths(), args.jobs)
+                       for turdata in archive.get_turdata_files()]
+            write_report(reports, args.verify)
+            record.add(segment_bytes, segment_bytes // SEGMENT_ENTRY_SIZE)
+
+    if args.gpx is not None:
+        with archive.metrics.stage("export", args.gpx) as record:
+            with open(args.gpx, 'w', encoding="utf-8") as f:
+                write_turdata_gpx(f, archive.get_turdata_files(), archive.get_segment_paths(),
+                                  diagnostics=diagnostics)
+            record.add(segment_bytes, segment_bytes // SEGMENT_ENTRY_SIZE)
+
+    if args.stats is not None:
+        # only the segment files without cached statistics are read
+        stats_bytes = sum(get_file_size(path) for tur_num, summary, path in archive.get_segment_index().values()
+                          if path is not None and (cache is None or not cache.contains(path, get_stats_cache_kind())))
+        with archive.metrics.stage("stats") as record:
+            total = TripStats()
+            trips = {}
+            for turdata in archive.get_turdata_files():
+                for tur_num, stats in get_turdata_stats(turdata, archive.get_segment_paths(), cache=cache,
+                                                        diagnostics=diagnostics).items():
+                    trips[tur_num] = stats.to_dict()
+                    total.add(stats)
+            with open(args.stats, 'w') as f:
+                json.dump({"trips": trips, "total": total.to_dict()}, f, indent=1)
+            record.add(stats_bytes, total.points)
+
+    if args.anomalies is not None:
+        with archive.metrics.stage("anomalies", args.anomalies) as record:
+            counts = dict.fromkeys(ANOMALY_KINDS, 0)
+            trips = {}
+            for turdata in archive.get_turdata_files():
+                for tur_num, anomalies in find_turdata_anomalies(turdata, archive.get_segment_paths(),
+                                                                 diagnostics=diagnostics).items():
+                    trips[tur_num] = anomalies_to_dicts(anomalies)
+                    for anomaly in trips[tur_num]:
+                        counts[anomaly["kind"]] += 1
+            with open(args.anomalies, 'w') as f:
+                json.dump({"trips": trips, "counts": counts}, f, indent=1)
+            record.add(segment_bytes, segment_bytes // SEGMENT_ENTRY_SIZE)
+
+    if args.time_range is not None:
+        with archive.metrics.stage("time-query") as record:
+            time_index = archive.get_time_index()
+            entries = time_index.query(*args.time_range)
+            print("{} segment entries between {} and {}".format(len(entries), *args.time_range))
+            seg_nums, counts = np.unique(entries["seg_num"], return_counts=True)
+            for seg_num, count in zip(seg_nums.tolist(), counts.tolist()):
+                print("Segment {}: {} entries".format(seg_num, count))
+            record.add(records=len(entries))
+
+    if args.bbox is not None:
+        with archive.metrics.stage("spatial-query") as record:
+            spatial_index = archive.get_spatial_index()
+            # the index works in 'Olex floats', minutes of arc
+            hits = spatial_index.query_bbox(*(value * 60 for value in args.bbox))
+            print("{} segment entries inside {}".format(len(hits), tuple(args.bbox)))
+            seg_nums, counts = np.unique(hits["seg_num"], return_counts=True)
+            for seg_num, count in zip(seg_nums.tolist(), counts.tolist()):
+                print("Segment {}: {} entries".format(seg_num, count))
+            record.add(records=len(hits))
+
+    if cache is not None:
+        cache.flush()
+    if manifest is not None:
+        manifest.save()
+    if metrics is not None:
+        metrics.save(args.profile)
+    return archive
 
 
 def walk_folder(folder):
     """Parse a folder structure and identify OLEX files, including the Ruter file, the Turdata file,
-    and segment files
+    and segment files. Kept for compatibility, see :class:`OlexArchive<olexparser.archive.OlexArchive>`.
 
     :param folder: Source folder for Olex files
     :type folder: str
+    :return: the archive of the folder, which the other module functions use from now on
+    :rtype: OlexArchive
     """
-    for (dir_path, dir_names, file_names) in os.walk(folder):
-        for filename in file_names:
-            if filename == "Turdata":
-                turdata_file.append(dir_path + "//" + filename)
-            elif filename == "Ruter":
-                ruter_file.append(dir_path + "//" + filename)
-            elif filename.endswith("_A"):
-                segment_files[filename.strip("segment").strip("_A")] = dir_path + "//" + filename
-            else:
-                other_files.append(dir_path + "//" + filename)
-    return
+    global current_archive
+    current_archive = OlexArchive(folder)
+    return current_archive
 
 
-def parsed_turdata_data_to_gpx():
-    """Converts the contents of a parsed Turdata file into a GPX string
+def get_current_archive(archive=None):
+    """Internal function which returns the archive used by the module functions kept for compatibility.
 
+    :param archive: the archive to use. Defaults to None, using the archive of the last call to
+                    :func:`walk_folder` or :func:`main`
+    :type archive: OlexArchive
+    :return: the archive
+    :rtype: OlexArchive
+    :raises RuntimeError: if no archive was given and no folder was walked yet
+    """
+    if archive is None:
+        archive = current_archive
+    if archive is None:
+        raise RuntimeError("No Olex folder was walked, call walk_folder or main first")
+    return archive
+
+
+def parsed_turdata_data_to_gpx(archive=None):
+    """Converts the contents of a parsed Turdata file into a GPX string. Kept for compatibility, see
+    :meth:`OlexArchive.parsed_turdata_data_to_gpx<olexparser.archive.OlexArchive.parsed_turdata_data_to_gpx>`.
+
+    :param archive: the archive. Defaults to None, using the archive of the last call to walk_folder or main
+    :type archive: OlexArchive
     :return: a string containing the Turdata file contents as GPX format
     :rtype: gpxpy.gpx.GPX()
-
-    .. todo:: complete gpx conversions
     """
-    gpx = gpxpy.gpx.GPX()
-    for turdata in tur_data_files_parsed:
-        for tur_tur_number in turdata.get_tur_numbers():
-            tur_tur = turdata.get_turtur(tur_tur_number)
-
-            trip = gpxpy.gpx.GPXTrack()
-            gpx.tracks.append(trip)
-
-            trip.name = "Tur Tur {}".format(tur_tur_number)
-            gpx_track_segment = gpxpy.gpx.GPXTrackSegment()
-            trip.segments.append(gpx_track_segment)
-            segments_summaries = tur_tur.get_segment_summaries()
-            for summary in segments_summaries:
-                start_lat = convert.get_lat_or_long_dd(summary.get_lat_start_float())
-                start_long = convert.get_lat_or_long_dd(summary.get_long_start_float())
-                start_time = convert.get_timestamp_str_from_int(summary.get_time_start_int())
-                start_comment = "Segment {} start values".format(summary.get_seg_num())
-                start_point = gpxpy.gpx.GPXTrackPoint(start_lat, start_long, time=start_time, comment=start_comment)
-
-                stop_lat = convert.get_lat_or_long_dd(summary.get_lat_end_float())
-                stop_long = convert.get_lat_or_long_dd(summary.get_long_end_float())
-                stop_time = convert.get_timestamp_str_from_int(summary.get_time_end_int())
-                stop_comment = "Segment {} stop values".format(summary.get_seg_num())
-                stop_point = gpxpy.gpx.GPXTrackPoint(stop_lat, stop_long, time=stop_time, comment=stop_comment)
-
-                gpx_track_segment.points.append(start_point)
-                gpx_track_segment.points.append(stop_point)
-
-    return gpx
-
-
-def print_ruters():
-    for i in ruter_files_parsed:
-        i.print_ruter()
-    return
+    return get_current_archive(archive).parsed_turdata_data_to_gpx()
 
 
-def print_segments():
-    for i in segment_files_no_turtur:
-        i.print_segment()
+def print_ruters(archive=None):
+    """Prints the Ruter files. Kept for compatibility, see
+    :meth:`OlexArchive.print_ruters<olexparser.archive.OlexArchive.print_ruters>`."""
+    get_current_archive(archive).print_ruters()
     return
 
 
-def print_turdatas():
-    for i in tur_data_files_parsed:
-        i.print_turdata()
+def print_segments(archive=None):
+    """Prints the segment files not associated to a Tur Tur. Kept for compatibility, see
+    :meth:`OlexArchive.print_segments<olexparser.archive.OlexArchive.print_segments>`."""
+    get_current_archive(archive).print_segments()
     return
 
 
-def print_other():
-    if len(other_files) > 0:
-        print("Other files found in the folder:")
-        for i in other_files:
-            print(i)
+def print_turdatas(archive=None):
+    """Prints the Turdata files. Kept for compatibility, see
+    :meth:`OlexArchive.print_turdatas<olexparser.archive.OlexArchive.print_turdatas>`."""
+    get_current_archive(archive).print_turdatas()
     return
 
 
-def print_all():
-    print_turdatas()
-    print("********************")
-    print_segments()
-    print("********************")
-    print_ruters()
-    print("********************")
-    print_other()
-    print("********************")
-    print_warnings()
+def print_other(archive=None):
+    """Prints the other files found in the folder. Kept for compatibility, see
+    :meth:`OlexArchive.print_other<olexparser.archive.OlexArchive.print_other>`."""
+    get_current_archive(archive).print_other()
     return
 
 
-def print_warnings():
-    for i in warnings:
-        print(i)
-    for turdata in tur_data_files_parsed:
-        print(turdata.get_warnings())
-    for ruter in ruter_files_parsed:
-        print(ruter.get_warnings())
-    for seg in segment_files_no_turtur:
-        print(seg.get_warnings())
+def print_all(archive=None):
+    """Prints every file and warning of the archive. Kept for compatibility, see
+    :meth:`OlexArchive.print_all<olexparser.archive.OlexArchive.print_all>`."""
+    get_current_archive(archive).print_all()
     return
 
 
-def main():
-    if len(sys.argv) < 2:
-        usage()
-        return
-
-    walk_folder(sys.argv[1])
-
-    if len(turdata_file) != 1:
-        warn = "Warning, there should be exactly 1 Tur data file"
-        warnings.append(warn)
-    for i in turdata_file:
-        turdata = TurDataFile(i)
-        tur_data_files_parsed.append(turdata)
-
-    if len(ruter_file) != 1:
-        warn = "Warning, there should be exactly 1 Ruter file"
-        warnings.append(warn)
-    for i in ruter_file:
-        ruter = RuterFile(i)
-        ruter_files_parsed.append(ruter)
-
-    # ..todo:: test associate segment files to tur turs
-
-    for turdatafile in tur_data_files_parsed:
-        turnums = turdatafile.get_tur_numbers()
-        for turnum in turnums:
-            turtur = turdatafile.get_turtur(turnum)
-            for seg_num in turtur.get_segment_numbers():
-                if seg_num in segment_files.keys():
-                    turtur.add_segment(seg_num, SegmentFile(segment_files[seg_num]))
-                    segment_files.pop(seg_num)
-
-    if len(segment_files) > 0:
-        for i in segment_files.keys():
-            warn = "Warning, Segment at {} is not associated with a Tur Tur".format(segment_files[i])
-            warnings.append(warn)
-            segment_files_no_turtur.append(SegmentFile(segment_files[i]))
+def print_warnings(archive=None):
+    """Prints the warnings of the archive. Kept for compatibility, see
+    :meth:`OlexArchive.print_warnings<olexparser.archive.OlexArchive.print_warnings>`."""
+    get_current_archive(archive).print_warnings()
     return
 
 
@@ -176,6 +294,5 @@ def usage():
 
 
 if __name__ == '__main__':
-    main()
-    print_all()
-    print_warnings()
+    olex_archive = main()
+    olex_archive.print_all()
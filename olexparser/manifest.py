@@ -0,0 +1,167 @@
+import os
+import json
+import hashlib
+from olexparser.diagnostics import WarningReporter
+
+#: Increase when the format of the manifest changes, so that old manifests are no longer used.
+MANIFEST_VERSION = 1
+
+
+class Manifest(WarningReporter):
+    """
+    A Class representing a manifest of the files found in an Olex folder.
+
+    The manifest records the size and modification time of each file, and optionally a SHA-1 hash of its content.
+    Comparing a new scan of the folder against the manifest tells which files are new, changed, unchanged or
+    removed since the previous run, so that only new or changed files have to be parsed again.
+
+    If use_hash is True, a file whose size or modification time changed but whose content hash did not is
+    considered unchanged. Files whose size and modification time did not change are never hashed again.
+
+    :param manifest_path: the full path of the JSON file the manifest is stored in
+    :type manifest_path: str
+    :param use_hash: also compare a hash of the file content. Defaults to False
+    :type use_hash: bool
+    :param diagnostics: an optional sink the warnings are reported to, shared with other files
+    :type diagnostics: olexparser.diagnostics.Diagnostics
+    """
+
+    def __init__(self, manifest_path, use_hash=False, diagnostics=None):
+        """A constructor method for the Manifest class.
+
+        :param manifest_path: the full path of the JSON file the manifest is stored in
+        :type manifest_path: str
+        :param use_hash: also compare a hash of the file content. Defaults to False
+        :type use_hash: bool
+        :param diagnostics: an optional sink the warnings are reported to. Defaults to None
+        :type diagnostics: olexparser.diagnostics.Diagnostics
+        """
+        self.manifest_path = manifest_path
+        self.full_path = manifest_path
+        self.use_hash = use_hash
+        self.files = {}
+        self.new_files = []
+        self.changed_files = []
+        self.unchanged_files = []
+        self.removed_files = []
+
+        self.set_diagnostics(diagnostics)
+
+        self.read_manifest()
+        return
+
+    def read_manifest(self):
+        """Internal method which reads the manifest from disk, if it exists."""
+        if not os.path.isfile(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get("version") == MANIFEST_VERSION:
+                self.files = manifest["files"]
+        except (OSError, ValueError, KeyError) as error:
+            self.add_warning(error, "manifest-read")
+        return
+
+    def save(self):
+        """Writes the manifest to disk, replacing the previous manifest only once it has been completely written."""
+        tmp_path = self.manifest_path + ".{}.tmp".format(os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": MANIFEST_VERSION, "files": self.files}, f, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+        return
+
+    def get_hash(self, file_path):
+        """Internal method which returns the SHA-1 hash of a file's content.
+
+        :param file_path: the full path of the file
+        :type file_path: str
+        :return: the hex digest of the hash
+        :rtype: str
+        """
+        file_hash = hashlib.sha1()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                file_hash.update(block)
+        return file_hash.hexdigest()
+
+    def scan(self, file_paths):
+        """Compares files against the manifest and updates the manifest with their current state.
+
+        The result of the comparison is available from :meth:`get_new_files`, :meth:`get_changed_files`,
+        :meth:`get_unchanged_files` and :meth:`get_removed_files`. Call :meth:`save` to persist the updated
+        manifest.
+
+        :param file_paths: the full paths of every file currently in the folder
+        :type file_paths: iterable
+        """
+        self.new_files = []
+        self.changed_files = []
+        self.unchanged_files = []
+        files = {}
+        for file_path in file_paths:
+            key = os.path.abspath(file_path)
+            try:
+                stat = os.stat(file_path)
+            except OSError as error:
+                self.add_warning(error, "manifest-scan")
+                continue
+            entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            previous = self.files.get(key)
+
+            if previous is None:
+                self.new_files.append(file_path)
+            elif previous["size"] == entry["size"] and previous["mtime_ns"] == entry["mtime_ns"]:
+                self.unchanged_files.append(file_path)
+                if "hash" in previous:
+                    entry["hash"] = previous["hash"]
+            elif self.use_hash and "hash" in previous and previous["size"] == entry["size"] and \
+                    previous["hash"] == self.get_hash(file_path):
+                self.unchanged_files.append(file_path)
+                entry["hash"] = previous["hash"]
+            else:
+                self.changed_files.append(file_path)
+
+            if self.use_hash and "hash" not in entry:
+                entry["hash"] = self.get_hash(file_path)
+            files[key] = entry
+
+        self.removed_files = [file_path for file_path in self.files if file_path not in files]
+        self.files = files
+        return
+
+    def get_new_files(self):
+        """
+        :return: the files found by the last scan which were not in the manifest
+        :rtype: list
+        """
+        return self.new_files.copy()
+
+    def get_changed_files(self):
+        """
+        :return: the files found by the last scan which changed since the manifest was written
+        :rtype: list
+        """
+        return self.changed_files.copy()
+
+    def get_unchanged_files(self):
+        """
+        :return: the files found by the last scan which did not change since the manifest was written
+        :rtype: list
+        """
+        return self.unchanged_files.copy()
+
+    def get_removed_files(self):
+        """
+        :return: the files in the manifest which were not found by the last scan
+        :rtype: list
+        """
+        return self.removed_files.copy()
+
+    def get_file_states(self):
+        """
+        :return: a dictionary with key:value - absolute file path:dictionary with the keys size and mtime_ns, and
+                 hash if use_hash is True, for every file found by the last scan
+        :rtype: dict
+        """
+        return {file_path: entry.copy() for file_path, entry in self.files.items()}
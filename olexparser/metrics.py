@@ -0,0 +1,254 @@
+import json
+import time
+import tracemalloc
+
+
+class StageRecord:
+    """
+    A Class representing one measured run of a pipeline stage, optionally for a single file.
+
+    The wall time, CPU time and peak memory are measured by :meth:`Metrics.stage`. The bytes read and records
+    decoded are reported by the code running the stage with :meth:`add`.
+
+    :param stage: the name of the stage, e.g. "turdata" or "segment"
+    :type stage: str
+    :param file: the full path of the file processed, or None if the stage is not for a single file
+    :type file: str, None
+    """
+
+    __slots__ = ("stage", "file", "wall_time", "cpu_time", "bytes_read", "records", "peak_memory")
+
+    def __init__(self, stage, file=None):
+        """A constructor method for the StageRecord class.
+
+        :param stage: the name of the stage
+        :type stage: str
+        :param file: the full path of the file processed. Defaults to None
+        :type file: str, None
+        """
+        self.stage = stage
+        self.file = file
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.bytes_read = 0
+        self.records = 0
+        self.peak_memory = None
+        return
+
+    def add(self, bytes_read=0, records=0):
+        """Adds to the bytes read and records decoded by the stage.
+
+        :param bytes_read: the number of bytes read. Defaults to 0
+        :type bytes_read: int
+        :param records: the number of records decoded. Defaults to 0
+        :type records: int
+        """
+        self.bytes_read += bytes_read
+        self.records += records
+        return
+
+    def to_dict(self):
+        """
+        :return: the measurements, as a dictionary which can be serialised to JSON
+        :rtype: dict
+        """
+        return {"stage": self.stage, "file": self.file, "wall_time": self.wall_time, "cpu_time": self.cpu_time,
+                "bytes_read": self.bytes_read, "records": self.records, "peak_memory": self.peak_memory}
+
+
+class StageTimer:
+    """
+    An internal context manager which measures a StageRecord and adds it to a Metrics object on exit.
+
+    :param metrics: the Metrics object the record is added to
+    :type metrics: Metrics
+    :param record: the record being measured
+    :type record: StageRecord
+    """
+
+    def __init__(self, metrics, record):
+        self.metrics = metrics
+        self.record = record
+        self.wall_start = None
+        self.cpu_start = None
+        return
+
+    def __enter__(self):
+        self.metrics.start_peak()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        return self.record
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.record.wall_time = time.perf_counter() - self.wall_start
+        self.record.cpu_time = time.process_time() - self.cpu_start
+        self.record.peak_memory = self.metrics.end_peak()
+        self.metrics.records.append(self.record)
+        return False
+
+
+class NullTimer:
+    """An internal context manager used when metrics are disabled. It measures nothing, and each stage gets a
+    record of its own which is then discarded."""
+
+    def __init__(self):
+        self.record = StageRecord(None)
+        return
+
+    def __enter__(self):
+        return self.record
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class Metrics:
+    """
+    A Class collecting per-stage and per-file measurements of the parsing pipeline.
+
+    Each stage of the pipeline, e.g. discovery, Turdata parsing or GPX export, is run inside :meth:`stage`, which
+    measures its wall time and CPU time. The stage reports the bytes it read and the records it decoded, a file
+    loaded from the parse cache counts no bytes read. Stages processing a single file record the path of the file,
+    so slow files can be found.
+
+    Peak memory is measured with :mod:`tracemalloc` if trace_memory is True. Tracing slows parsing down, so it
+    is off by default. Peak memory is then None. Nested stages are supported; the peak of a stage includes the
+    peaks of the stages nested in it.
+
+    A disabled Metrics object measures nothing, so the pipeline can always be instrumented at no cost.
+
+    Segment files decoded in a process pool are measured as they are collected from the pool, so their wall
+    time is the time spent waiting for the pool and their CPU time does not include the worker processes.
+
+    :param enabled: measure the stages. Defaults to True
+    :type enabled: bool
+    :param trace_memory: measure the peak memory of each stage with tracemalloc. Defaults to False
+    :type trace_memory: bool
+    """
+
+    def __init__(self, enabled=True, trace_memory=False):
+        """A constructor method for the Metrics class.
+
+        :param enabled: measure the stages. Defaults to True
+        :type enabled: bool
+        :param trace_memory: measure the peak memory of each stage with tracemalloc. Defaults to False
+        :type trace_memory: bool
+        """
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.records = []
+        self.peaks = []
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        return
+
+    def stage(self, name, file=None):
+        """Returns a context manager measuring a stage. The context manager returns a
+        :class:`StageRecord`, to which the stage adds the bytes it read and the records it decoded::
+
+            with metrics.stage("segment", path) as record:
+                segment = SegmentFile(path)
+                record.add(segment.get_size(), len(segment))
+
+        :param name: the name of the stage
+        :type name: str
+        :param file: the full path of the file processed, or None if the stage is not for a single file.
+                     Defaults to None
+        :type file: str, None
+        :return: a context manager
+        :rtype: StageTimer, NullTimer
+        """
+        if not self.enabled:
+            return NullTimer()
+        return StageTimer(self, StageRecord(name, file))
+
+    def start_peak(self):
+        """Internal method which starts measuring the peak memory of a stage."""
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            if len(self.peaks) > 0:
+                self.peaks[-1] = max(self.peaks[-1], peak)
+            tracemalloc.reset_peak()
+            self.peaks.append(0)
+        return
+
+    def end_peak(self):
+        """Internal method which ends measuring the peak memory of a stage.
+
+        :return: the peak memory of the stage in bytes, or None if memory is not traced
+        :rtype: int, None
+        """
+        if not self.trace_memory:
+            return None
+        peak = max(self.peaks.pop(), tracemalloc.get_traced_memory()[1])
+        if len(self.peaks) > 0:
+            self.peaks[-1] = max(self.peaks[-1], peak)
+        tracemalloc.reset_peak()
+        return peak
+
+    def get_records(self):
+        """
+        :return: every measured StageRecord, in the order the stages ended
+        :rtype: list
+        """
+        return self.records.copy()
+
+    def get_stage_totals(self):
+        """Returns the measurements of each stage, summed over its files.
+
+        :return: a dictionary with key:value - stage name:dictionary with the keys runs, wall_time, cpu_time,
+                 bytes_read, records and peak_memory. The peak memory is the largest peak of the runs
+        :rtype: dict
+        """
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record.stage, {"runs": 0, "wall_time": 0.0, "cpu_time": 0.0,
+                                                     "bytes_read": 0, "records": 0, "peak_memory": None})
+            total["runs"] += 1
+            total["wall_time"] += record.wall_time
+            total["cpu_time"] += record.cpu_time
+            total["bytes_read"] += record.bytes_read
+            total["records"] += record.records
+            if record.peak_memory is not None:
+                total["peak_memory"] = max(total["peak_memory"] or 0, record.peak_memory)
+        return totals
+
+    def get_slowest_files(self, count=10):
+        """
+        :param count: the number of files to return. Defaults to 10
+        :type count: int
+        :return: the StageRecords of the files with the longest wall time, slowest first
+        :rtype: list
+        """
+        records = [record for record in self.records if record.file is not None]
+        return sorted(records, key=lambda record: record.wall_time, reverse=True)[:count]
+
+    def to_dict(self):
+        """
+        :return: the stage totals and the measurements of every file, as a dictionary which can be serialised to
+                 JSON
+        :rtype: dict
+        """
+        return {"stages": self.get_stage_totals(),
+                "files": [record.to_dict() for record in self.records if record.file is not None]}
+
+    def save(self, path):
+        """Writes the measurements to a JSON file, see :meth:`to_dict`.
+
+        :param path: the full path of the JSON file
+        :type path: str
+        """
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1)
+        return
+
+    def print_metrics(self):
+        """Prints the totals of each stage"""
+        print("{:<14}{:>6}{:>12}{:>12}{:>14}{:>12}".format("Stage", "Runs", "Wall (s)", "CPU (s)", "Bytes",
+                                                          "Records"))
+        for name, total in self.get_stage_totals().items():
+            print("{:<14}{:>6}{:>12.3f}{:>12.3f}{:>14}{:>12}".format(name, total["runs"], total["wall_time"],
+                                                                    total["cpu_time"], total["bytes_read"],
+                                                                    total["records"]))
+        return
@@ -0,0 +1,368 @@
+import os
+import sys
+import json
+import time
+import pickle
+import hashlib
+import argparse
+import numpy as np
+from olexparser.diagnostics import WarningReporter
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+#: Increase when the format of the cached data changes, so that old entries are no longer used.
+CACHE_VERSION = 5
+
+
+class ParseCache(WarningReporter):
+    """
+    A Class representing a persistent on-disk cache of parsed Olex files.
+
+    The cache stores the decoded entries of segment files, the Tur Turs parsed from Turdata files and the Rutes
+    parsed from Ruter files, so that unchanged files do not have to be parsed again.
+
+    Each entry is keyed by a fingerprint of the source file: its kind, absolute path, size and modification time.
+    If use_hash is True, a SHA-1 hash of its content is used instead of the modification time, so a file which was
+    touched but not changed is still found in the cache. An entry is only used while the fingerprint of the source
+    file still matches. When the total size of the cache exceeds max_size, the least recently used entries are removed.
+
+    Segment entries are stored as ``.npy`` files, Tur Turs and Rutes are stored with :mod:`pickle`. Only use a
+    cache directory that is not writable by others.
+
+    Cache files which cannot be read or written are reported to the Diagnostics sink against the cache directory.
+
+    Several processes may share a cache directory. :meth:`flush` merges the index with the one on disk under a lock
+    on ``index.lock``, so the entries stored by each process are kept. The lock is not taken on platforms without
+    the :mod:`fcntl` module.
+
+    :param cache_dir: the directory the cache is stored in. It is created if it does not exist
+    :type cache_dir: str
+    :param max_size: the maximum total size of the cached data in bytes. Defaults to 1 GiB
+    :type max_size: int
+    :param use_hash: include a hash of the file content in the fingerprint. Defaults to False
+    :type use_hash: bool
+    :param diagnostics: an optional sink the warnings are reported to, shared with other files
+    :type diagnostics: olexparser.diagnostics.Diagnostics
+    """
+
+    def __init__(self, cache_dir, max_size=1024 ** 3, use_hash=False, diagnostics=None):
+        """A constructor method for the ParseCache class.
+
+        :param cache_dir: the directory the cache is stored in. It is created if it does not exist
+        :type cache_dir: str
+        :param max_size: the maximum total size of the cached data in bytes. Defaults to 1 GiB
+        :type max_size: int
+        :param use_hash: include a hash of the file content in the fingerprint. Defaults to False
+        :type use_hash: bool
+        :param diagnostics: an optional sink the warnings are reported to. Defaults to None
+        :type diagnostics: olexparser.diagnostics.Diagnostics
+        """
+        self.cache_dir = cache_dir
+        self.full_path = cache_dir
+        self.max_size = max_size
+        self.use_hash = use_hash
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.lock_path = os.path.join(cache_dir, "index.lock")
+        self.entries = {}
+        self.removed = set()
+        self.content_hashes = {}
+        self.hits = 0
+        self.misses = 0
+
+        self.set_diagnostics(diagnostics)
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.read_index()
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+        return False
+
+    def read_index(self):
+        """Internal method which reads the index of cached entries from the cache directory."""
+        self.entries = self.read_index_entries()
+        return
+
+    def read_index_entries(self):
+        """Internal method which reads the entries of the index in the cache directory.
+
+        :return: the entries of the index, or an empty dictionary if there is no valid index
+        :rtype: dict
+        """
+        if not os.path.isfile(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+            if index.get("version") == CACHE_VERSION:
+                return index["entries"]
+        except (OSError, ValueError, KeyError) as error:
+            self.add_warning(error, "cache-index")
+        return {}
+
+    def flush(self):
+        """Writes the index of cached entries to the cache directory.
+
+        The index on disk is read again and merged with the entries of this ParseCache, so the entries stored by
+        other processes sharing the cache directory are kept, and the entries removed by this one stay removed.
+        The merge holds a lock on ``index.lock``. The index is written to a temporary file first and then moved
+        into place, so a reader never sees a partially written index.
+        """
+        with open(self.lock_path, 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                entries = self.read_index_entries()
+                for key in self.removed:
+                    entries.pop(key, None)
+                for key, entry in self.entries.items():
+                    if key in entries:
+                        entry["last_used"] = max(entry["last_used"], entries[key]["last_used"])
+                    elif not os.path.isfile(os.path.join(self.cache_dir, entry["file"])):
+                        # removed by another process
+                        continue
+                    entries[key] = entry
+                self.entries = entries
+                self.removed = set()
+                self.evict()
+
+                tmp_path = self.index_path + ".{}.tmp".format(os.getpid())
+                with open(tmp_path, 'w') as f:
+                    json.dump({"version": CACHE_VERSION, "entries": self.entries}, f)
+                os.replace(tmp_path, self.index_path)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        return
+
+    def get_fingerprint(self, file_path, kind):
+        """Returns the fingerprint of a source file, used as the key of its cache entry.
+
+        :param file_path: the full path of the source file
+        :type file_path: str
+        :param kind: the kind of parsed data, e.g. "segment", "turdata" or "ruter"
+        :type kind: str
+        :return: the fingerprint of the source file, or None if the file does not exist
+        :rtype: str, None
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        if self.use_hash:
+            version = self.get_content_hash(file_path, stat)
+        else:
+            version = stat.st_mtime_ns
+        key = "{}\0{}\0{}\0{}\0{}".format(CACHE_VERSION, kind, os.path.abspath(file_path), stat.st_size, version)
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    def get_content_hash(self, file_path, stat):
+        """Internal method which returns the SHA-1 hash of the content of a source file.
+
+        The hash is remembered for the life of the ParseCache while the size and modification time of the file
+        are unchanged, so a file is only read once when it is looked up and then stored.
+
+        :param file_path: the full path of the source file
+        :type file_path: str
+        :param stat: the result of :func:`os.stat` for the source file
+        :type stat: os.stat_result
+        :return: the hex digest of the content of the source file
+        :rtype: str
+        """
+        key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        if key not in self.content_hashes:
+            content_hash = hashlib.sha1()
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    content_hash.update(block)
+            self.content_hashes[key] = content_hash.hexdigest()
+        return self.content_hashes[key]
+
+    def set_content_hash(self, file_path, size, mtime_ns, content_hash):
+        """Records the SHA-1 hash of the content of a source file which is already known, e.g. from a
+        :class:`Manifest<olexparser.manifest.Manifest>`, so the file does not have to be read to find its cache
+        entry.
+
+        :param file_path: the full path of the source file
+        :type file_path: str
+        :param size: the size of the source file when it was hashed
+        :type size: int
+        :param mtime_ns: the modification time of the source file in nanoseconds when it was hashed
+        :type mtime_ns: int
+        :param content_hash: the hex digest of the content of the source file
+        :type content_hash: str
+        """
+        self.content_hashes[(os.path.abspath(file_path), size, mtime_ns)] = content_hash
+        return
+
+    def contains(self, file_path, kind):
+        """
+        :param file_path: the full path of the source file
+        :type file_path: str
+        :param kind: the kind of parsed data, e.g. "segment", "turdata" or "ruter"
+        :type kind: str
+        :return: True if the cache holds a valid entry for the source file, False otherwise
+        :rtype: bool
+        """
+        return self.get_fingerprint(file_path, kind) in self.entries
+
+    def load(self, file_path, kind):
+        """Returns the cached data of a source file if the cache entry is still valid.
+
+        :param file_path: the full path of the source file
+        :type file_path: str
+        :param kind: the kind of parsed data, e.g. "segment", "turdata" or "ruter"
+        :type kind: str
+        :return: the cached data, or None if there is no valid entry
+        :rtype: object, None
+        """
+        key = self.get_fingerprint(file_path, kind)
+        if key not in self.entries:
+            self.misses += 1
+            return None
+
+        entry = self.entries[key]
+        data_path = os.path.join(self.cache_dir, entry["file"])
+        try:
+            if entry["file"].endswith(".npy"):
+                data = np.load(data_path, allow_pickle=False)
+            else:
+                with open(data_path, 'rb') as f:
+                    data = pickle.load(f)
+        except Exception as error:
+            self.add_warning(error, "cache-load")
+            self.remove(key)
+            self.misses += 1
+            return None
+
+        entry["last_used"] = time.time()
+        self.hits += 1
+        return data
+
+    def store(self, file_path, kind, data):
+        """Stores the parsed data of a source file, then evicts old entries if the cache is too large.
+
+        numpy arrays are stored as ``.npy`` files, anything else is pickled.
+
+        :param file_path: the full path of the source file
+        :type file_path: str
+        :param kind: the kind of parsed data, e.g. "segment", "turdata" or "ruter"
+        :type kind: str
+        :param data: the parsed data
+        :type data: object
+        """
+        key = self.get_fingerprint(file_path, kind)
+        if key is None:
+            return
+        self.remove(key)
+
+        if isinstance(data, np.ndarray):
+            file_name = key + ".npy"
+        else:
+            file_name = key + ".pickle"
+        data_path = os.path.join(self.cache_dir, file_name)
+        tmp_path = data_path + ".{}.tmp".format(os.getpid())
+        try:
+            with open(tmp_path, 'wb') as f:
+                if isinstance(data, np.ndarray):
+                    np.save(f, data, allow_pickle=False)
+                else:
+                    pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, data_path)
+        except Exception as error:
+            self.add_warning(error, "cache-store")
+            return
+
+        self.entries[key] = {"file": file_name, "source": os.path.abspath(file_path), "kind": kind,
+                             "size": os.path.getsize(data_path), "last_used": time.time()}
+        self.evict()
+        return
+
+    def remove(self, key):
+        """Internal method which removes a cache entry and its data file.
+
+        :param key: the fingerprint of the entry
+        :type key: str
+        """
+        entry = self.entries.pop(key, None)
+        self.removed.add(key)
+        if entry is not None:
+            try:
+                os.remove(os.path.join(self.cache_dir, entry["file"]))
+            except OSError:
+                pass
+        return
+
+    def evict(self):
+        """Removes the least recently used entries until the cache is no larger than max_size."""
+        total = self.get_size()
+        if total <= self.max_size:
+            return
+        for key in sorted(self.entries, key=lambda k: self.entries[k]["last_used"]):
+            total -= self.entries[key]["size"]
+            self.remove(key)
+            if total <= self.max_size:
+                break
+        return
+
+    def invalidate(self, file_path):
+        """Removes every cache entry for a source file, whatever its fingerprint.
+
+        :param file_path: the full path of the source file
+        :type file_path: str
+        :return: the number of entries removed
+        :rtype: int
+        """
+        source = os.path.abspath(file_path)
+        keys = [key for key, entry in self.entries.items() if entry["source"] == source]
+        for key in keys:
+            self.remove(key)
+        return len(keys)
+
+    def clear(self):
+        """Removes every entry from the cache, including those stored by other processes since it was opened."""
+        self.read_index()
+        for key in list(self.entries):
+            self.remove(key)
+        self.flush()
+        return
+
+    def get_size(self):
+        """
+        :return: the total size of the cached data in bytes
+        :rtype: int
+        """
+        return sum(entry["size"] for entry in self.entries.values())
+
+
+def main(argv=None):
+    """Command line entry point to inspect and invalidate a parse cache."""
+    parser = argparse.ArgumentParser(description="Inspect or invalidate an Olex parse cache.")
+    parser.add_argument("cache_dir", help="the cache directory")
+    parser.add_argument("--clear", action="store_true", help="remove every entry from the cache")
+    parser.add_argument("--invalidate", nargs="+", default=[], metavar="FILE",
+                        help="remove the entries for these source files")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    cache = ParseCache(args.cache_dir)
+    if args.clear:
+        cache.clear()
+        print("Cleared cache {}".format(args.cache_dir))
+    elif args.invalidate:
+        removed = sum(cache.invalidate(file_path) for file_path in args.invalidate)
+        cache.flush()
+        print("Removed {} cache entries".format(removed))
+    else:
+        print("Cache {} holds {} entries, {} bytes".format(args.cache_dir, len(cache.entries), cache.get_size()))
+    return
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,42 @@
 import re
+import sys
 import math
+import numpy as np
 
-from olexparser.rute_entry import RuteEntry
+import olexparser.convert as convert
+from olexparser.rute_entry import RuteEntry, describe_rute_entries
+from olexparser.diagnostics import WarningList
 
+PLOT_LAYER_NAMES = ("A", "B", "C", "D", "E", "F", "G", "H", "I", "J",
+                    "A1", "B1", "C1", "D1", "E1", "F1", "G1", "H1", "I1", "J1",
+                    "A2", "B2", "C2", "D2", "E2", "F2", "G2", "H2", "I2", "J2",
+                    "A3", "B3", "C3", "D3", "E3", "F3", "G3", "H3", "I3", "J3",
+                    "A4", "B4", "C4", "D4", "E4", "F4", "G4", "H4", "I4", "J4",
+                    "A5", "B5", "C5", "D5", "E5", "F5", "G5", "H5", "I5", "J5")
 
-class Rute:
+# Rute Name; Rute type; Line Color; Plot Layer; Positions
+PLOT_LAYER_RE = re.compile(r'Plottsett (\d*)')  # Plottsett
+RUTE_ENTRY_RE = re.compile(r'([-\d.]+) ([-\d.]+) (\d+) (.+)')  # Rute Data points
+
+# A line can only be a Rute Data point if it starts with one of these characters
+POINT_FIRST_CHARS = frozenset("-.0123456789")
+
+
+class Rute(WarningList):
     """A class used to represent a Rute found in the :class:`Olex Ruter file<olexparser.ruter_file.RuterFile>`
 
     :param rute: a string containing a Rute from the Ruter file
     :type rute: str
+    :param columnar: store the points of the Rute in numpy arrays instead of :class:`RuteEntry` objects
+    :type columnar: bool
+    :param offset: the byte offset of the Rute in the Ruter file, if known
+    :type offset: int, None
+
+    The points of a Rute can be retrieved as arrays with :meth:`get_lats`, :meth:`get_longs`,
+    :meth:`get_timestamps` and :meth:`get_icon_codes`. In columnar mode only these arrays are stored, and the
+    RuteEntry objects are created the first time :meth:`get_rute_entries` is called.
+    Icons are stored as codes into a small per-Rute table of icon names, see :meth:`get_icon_names`.
+    Rute uses __slots__, like the other classes using :class:`WarningList<olexparser.diagnostics.WarningList>`.
 
     .. note::
         The plottsett value corresponds to the Layer name in Olex.
@@ -26,27 +54,31 @@ class Rute:
 
     .. todo:: check for more possible rute options
     """
-    def __init__(self, rute):
+
+    __slots__ = ("columnar", "offset", "rute_entries", "lats", "longs", "timestamps", "icon_codes", "icon_names",
+                 "icon_lookup", "plottsett", "layer", "rute_type", "rute_color", "rute_name", "notes_text", "counts",
+                 "last_line", "last_line_is_note", "warnings")
+
+    def __init__(self, rute=None, columnar=False, offset=None):
         """A constructor method for the Rute class
 
-        :param rute: a string containing a Rute from the Ruter file
+        :param rute: a string containing a Rute from the Ruter file. If None, the lines of the Rute are added with
+                     :meth:`add_line` and :meth:`finish` is called once the last line has been added.
         :type rute: str
+        :param columnar: store the points in numpy arrays instead of RuteEntry objects. Defaults to False
+        :type columnar: bool
+        :param offset: the byte offset of the Rute in the Ruter file. Defaults to None
+        :type offset: int, None
         """
-        plot_layer_names = ("A", "B", "C", "D", "E", "F", "G", "H", "I", "J",
-                            "A1", "B1", "C1", "D1", "E1", "F1", "G1", "H1", "I1", "J1",
-                            "A2", "B2", "C2", "D2", "E2", "F2", "G2", "H2", "I2", "J2",
-                            "A3", "B3", "C3", "D3", "E3", "F3", "G3", "H3", "I3", "J3",
-                            "A4", "B4", "C4", "D4", "E4", "F4", "G4", "H4", "I4", "J4",
-                            "A5", "B5", "C5", "D5", "E5", "F5", "G5", "H5", "I5", "J5")
-
-        # Rute Name; Rute type; Line Color; Plot Layer; Positions
-        plot_layer_re = r'Plottsett (\d*)'  # Plottsett
-        rute_type_re = r'Rutetype (.*)'  # Rutetype
-        line_color_re = r'Linjefarge (.*)'  # Linjefarge
-        rute_name_re = r'Rute (.*)'  # Rute name
-        rute_entry_re = r'([-\d.]+) ([-\d.]+) (\d+) (.+)'  # Rute Data points
-
+        self.columnar = columnar
+        self.offset = offset
         self.rute_entries = []
+        self.lats = []
+        self.longs = []
+        self.timestamps = []
+        self.icon_codes = []
+        self.icon_names = []
+        self.icon_lookup = {}
         self.plottsett = -1  # all plottsett are a positive value
         self.layer = ""
         self.rute_type = ""
@@ -54,50 +86,134 @@ class Rute:
         self.rute_name = ""
         self.notes_text = ""
 
-        self.warnings = []
+        # the number of times each value was found, each should be found exactly once
+        self.counts = {"Plottsett": 0, "Rutetype": 0, "Linjefarge": 0, "Rute": 0}
+        self.last_line = ""
+        self.last_line_is_note = False
+
+        self.warnings = None
+
+        if rute is not None:
+            for line in rute.split("\n"):
+                if line != "":
+                    self.add_line(line)
+            self.finish()
+
+    def add_line(self, line):
+        """Internal method which classifies a single non-empty line of the Rute and stores its value.
+
+        Each line is one of: Plottsett, Rutetype, Linjefarge, Rute name, a point (a :class:`RuteEntry`), or a note.
+
+        :param line: a line of the Rute, without the line ending
+        :type line: str
+        """
+        self.last_line = line
+        self.last_line_is_note = False
+
+        keyword, _, value = line.partition(" ")
+        if keyword in self.counts:
+            self.counts[keyword] += 1
+            if self.counts[keyword] > 1:
+                return
+            if keyword == "Plottsett":
+                match = PLOT_LAYER_RE.match(line)
+                if match is not None:
+                    self.set_plottsett(match.group(1))
+            elif keyword == "Rutetype":
+                self.rute_type = value
+            elif keyword == "Linjefarge":
+                self.rute_color = value
+            else:
+                self.rute_name = value
+            return
 
-        layer_matches = re.findall(plot_layer_re, rute)
-        if len(layer_matches) == 1:
-            layer_number = int(layer_matches[0])
+        if line[0] in POINT_FIRST_CHARS:
+            match = RUTE_ENTRY_RE.match(line)
+            if match is not None:
+                if self.columnar:
+                    self.add_point(*match.groups())
+                else:
+                    entry = RuteEntry(*match.groups())
+                    for warn in entry.get_warnings():
+                        self.add_warning(warn)
+                    self.rute_entries.append(entry)
+                return
+        self.last_line_is_note = True
+        return
+
+    def add_point(self, lat, long, timestamp, icon):
+        """Internal method which stores a point of a columnar Rute.
+
+        :param lat: the "Olex float" of a latitude coordinate
+        :type lat: str
+        :param long: the "Olex float" of a longitude coordinate
+        :type long: str
+        :param timestamp: a Unix timestamp
+        :type timestamp: str
+        :param icon: a string describing the icon used for the point
+        :type icon: str
+        """
+        code = self.icon_lookup.get(icon)
+        if code is None:
+            code = len(self.icon_names)
+            self.icon_lookup[icon] = code
+            self.icon_names.append(sys.intern(icon))
+        self.lats.append(float(lat))
+        self.longs.append(float(long))
+        self.timestamps.append(int(timestamp))
+        self.icon_codes.append(code)
+        return
+
+    def set_plottsett(self, plottsett):
+        """Internal method which stores the plottsett number and converts it to the Layer name.
+
+        :param plottsett: the plottsett number
+        :type plottsett: str
+        """
+        try:
+            layer_number = int(plottsett)
+            self.layer = PLOT_LAYER_NAMES[int(math.log(layer_number, 2))]
             self.plottsett = layer_number
-            self.layer = plot_layer_names[int(math.log(layer_number, 2))]
-        else:
-            warn = "Warning, only 1 Layer should be present in a Rute"
-            self.warnings.append(warn)
+        except (ValueError, IndexError):
+            warn = "Warning, invalid Plottsett {} in Rute".format(plottsett)
+            self.add_warning(warn)
+        return
 
-        type_matches = re.findall(rute_type_re, rute)
-        if len(type_matches) == 1:
-            self.rute_type = type_matches[0]
-        else:
-            warn = "Warning, only 1 Rute Type should be present in a Rute"
-            self.warnings.append(warn)
+    def finish(self):
+        """Internal method called after the last line of the Rute has been added.
 
-        color_matches = re.findall(line_color_re, rute)
-        if len(color_matches) == 1:
-            self.rute_color = color_matches[0]
-        else:
+        Generates a warning for each value which was not found exactly once, and discards those values.
+        The last line of the Rute is kept as the notes if it is not a point or one of the values above.
+        """
+        if self.counts["Plottsett"] != 1:
+            self.plottsett = -1
+            self.layer = ""
+            warn = "Warning, only 1 Layer should be present in a Rute"
+            self.add_warning(warn)
+        if self.counts["Rutetype"] != 1:
+            self.rute_type = ""
+            warn = "Warning, only 1 Rute Type should be present in a Rute"
+            self.add_warning(warn)
+        if self.counts["Linjefarge"] != 1:
+            self.rute_color = ""
             warn = "Warning, only 1 Color Type should be present in a Rute"
-            self.warnings.append(warn)
-
-        name_matches = re.findall(rute_name_re, rute)
-        if len(name_matches) == 1:
-            self.rute_name = name_matches[0]
-        else:
+            self.add_warning(warn)
+        if self.counts["Rute"] != 1:
+            self.rute_name = ""
             warn = "Warning, only 1 Rute Name should be present in a Rute"
-            self.warnings.append(warn)
+            self.add_warning(warn)
 
-        rute_entry_matches = re.findall(rute_entry_re, rute)
-        for i in rute_entry_matches:
-            self.rute_entries.append(RuteEntry(i[0], i[1], i[2], i[3]))
+        if self.last_line_is_note:
+            self.notes_text = self.last_line
 
-        # Hacky work around to find the notes, a proper RE would be preferred
-        # Strips whitespace and checks if last line is a rute entry
-        # If not it assumes it is a note
-        notes = rute.split("\n")
-        while "" in notes:
-            notes.remove("")
-        if re.match(rute_entry_re, notes[-1]) is None:
-            self.notes_text = notes[-1]
+        if self.columnar:
+            self.lats = np.array(self.lats, dtype=np.float64)
+            self.longs = np.array(self.longs, dtype=np.float64)
+            self.timestamps = np.array(self.timestamps, dtype=np.int64)
+            self.icon_codes = np.array(self.icon_codes, dtype=np.uint32)
+            self.icon_names = tuple(self.icon_names)
+            self.icon_lookup = None
+        return
 
     def __str__(self):
         """A descriptive string representation of the Rute class
@@ -111,10 +227,11 @@ class Rute:
             s = s + "\nLine Color: {}".format(self.rute_color)
         if self.layer != "":
             s = s + "\nRute Layer: {} (Converted from Plottsett: {})".format(self.layer, self.plottsett)
-        if len(self.rute_entries) > 0:
+        descriptions = self.describe_entries()
+        if len(descriptions) > 0:
             s = s + "\nRute Entries:"
-            for i in self.rute_entries:
-                s = s + i.__str__()
+            for lines in descriptions:
+                s = s + "".join("\n" + line for line in lines)
         if self.notes_text != "":
             s = s + "\nRute Notes: {}".format(self.notes_text)
         return s
@@ -131,11 +248,13 @@ class Rute:
             print("Line Color: {}".format(self.rute_color))
         if self.layer != "":
             print("Rute Layer: {} (Converted from Plottsett: {})".format(self.layer, self.plottsett))
-        if len(self.rute_entries) > 0:
+        descriptions = self.describe_entries()
+        if len(descriptions) > 0:
             print("Rute Entries:")
             print("**")
-            for i in self.rute_entries:
-                i.print_rute_entry()
+            for lines in descriptions:
+                for line in lines:
+                    print(line)
                 print("**")
         if self.notes_text != "":
             print("Rute Notes: {}".format(self.notes_text))
@@ -143,13 +262,92 @@ class Rute:
         print()
         return
 
+    def describe_entries(self):
+        """Internal method which describes every point of the Rute, converting the values in batches.
+
+        The descriptions match :meth:`RuteEntry.print_rute_entry<olexparser.rute_entry.RuteEntry.print_rute_entry>`,
+        without creating a RuteEntry per point in columnar mode.
+
+        :return: a list of description lines for every point
+        :rtype: list
+        """
+        icon_names = self.get_icon_names()
+        icons = [icon_names[code] for code in self.get_icon_codes().tolist()]
+        return describe_rute_entries(self.get_lats(), self.get_longs(), self.get_timestamps(), icons)
+
     def get_rute_entries(self):
         """
+        In columnar mode the RuteEntry objects are created from the arrays the first time this method is called.
+
         :return: the list of identified :class:`RuteEntry` objects
         :rtype: list
         """
+        if self.columnar and len(self.rute_entries) != len(self.lats):
+            self.rute_entries = [RuteEntry(lat, long, timestamp, self.icon_names[code]) for lat, long, timestamp, code
+                                 in zip(self.lats.tolist(), self.longs.tolist(), self.timestamps.tolist(),
+                                        self.icon_codes.tolist())]
         return self.rute_entries
 
+    def get_lats(self):
+        """
+        :return: the 'Olex float' latitude of every point
+        :rtype: numpy.ndarray
+        """
+        if self.columnar:
+            return self.lats
+        return np.array([entry.get_lat_float() for entry in self.rute_entries], dtype=np.float64)
+
+    def get_longs(self):
+        """
+        :return: the 'Olex float' longitude of every point
+        :rtype: numpy.ndarray
+        """
+        if self.columnar:
+            return self.longs
+        return np.array([entry.get_long_float() for entry in self.rute_entries], dtype=np.float64)
+
+    def get_timestamps(self):
+        """
+        :return: the Unix timestamp of every point
+        :rtype: numpy.ndarray
+        """
+        if self.columnar:
+            return self.timestamps
+        return np.array([entry.get_timestamp_int() for entry in self.rute_entries], dtype=np.int64)
+
+    def get_icon_names(self):
+        """
+        :return: the distinct icon names of the points, indexed by the codes returned by :meth:`get_icon_codes`
+        :rtype: tuple
+        """
+        if self.columnar:
+            return self.icon_names
+        return tuple(dict.fromkeys(entry.get_icon_str() for entry in self.rute_entries))
+
+    def get_icon_codes(self):
+        """
+        :return: the icon code of every point, an index into :meth:`get_icon_names`
+        :rtype: numpy.ndarray
+        """
+        if self.columnar:
+            return self.icon_codes
+        lookup = {name: code for code, name in enumerate(self.get_icon_names())}
+        return np.array([lookup[entry.get_icon_str()] for entry in self.rute_entries], dtype=np.uint32)
+
+    def get_lats_dd(self):
+        """
+        :return: the latitude of every point in DD notation
+        :rtype: numpy.ndarray
+        """
+        return convert.get_lat_or_long_dd_array(self.get_lats())
+
+    def get_longs_dd(self):
+        """
+        :return: the longitude of every point in DD notation
+        :rtype: numpy.ndarray
+        """
+        return convert.get_lat_or_long_dd_array(self.get_longs())
+
     def get_plottsett(self):
         """
         :return: the plottsett (Plot Layer) number, or -1 if there was an error
@@ -192,12 +390,9 @@ class Rute:
         """
         return self.notes_text
 
-    def get_warnings(self):
+    def get_offset(self):
         """
-        :return: a list of warnings generated by the Rute, and it's child objects
-        :rtype: list
+        :return: the byte offset of the Rute in the Ruter file, or None if it is not known
+        :rtype: int, None
         """
-        warn = self.warnings.copy()
-        for entry in self.rute_entries:
-            warn.extend(entry.get_warnings())
-        return warn
+        return self.offset
@@ -1,7 +1,10 @@
+import sys
+import numpy as np
 import olexparser.convert as convert
+from olexparser.diagnostics import WarningList
 
 
-class RuteEntry:
+class RuteEntry(WarningList):
     """
     A class used to represent a Rute Entry from the :class:`Olex Ruter file<olexparser.ruter_file.RuterFile>`
 
@@ -21,8 +24,12 @@ class RuteEntry:
     :type timestamp: int
     :param icon: a string describing the icon used for the entry
     :type icon: str
+
+    RuteEntry uses __slots__, and interns its icon string so that entries with the same icon share it.
     """
 
+    __slots__ = ("lat", "long", "timestamp", "icon", "warnings")
+
     def __init__(self, lat, long, timestamp, icon):
         """A constructor for the RuteEntry class
 
@@ -35,39 +42,36 @@ class RuteEntry:
         :param icon: a string describing the icon used for the entry
         :type icon: str
         """
-        self.warnings = []
+        self.warnings = None
 
         self.lat = float(lat)
         self.long = float(long)
         self.timestamp = int(timestamp)
-        self.icon = str(icon)
+        self.icon = sys.intern(str(icon))
 
     def __str__(self):
         """A descriptive string representation of the Rute class
         :return: String representation of the Rute class
         :rtype: str
         """
-        s = "\nRute Entry Latitude float: {} Latitude coordinate: {}".format(
-            self.lat, convert.get_lat_dmm(self.lat))
-        s = s + "\nRute Entry Longitude float: {} Longitude coordinate: {}".format(
-            self.long, convert.get_lat_dmm(self.long))
-        s = s + "\nRute Entry Unix Timestamp: {} Timestamp converted to UTC: {}".format(
-            self.timestamp, convert.get_timestamp_str_from_int(self.timestamp))
-        s = s + "\nRute Entry Icon: {}".format(self.icon)
-        return s
+        return "".join("\n" + line for line in self.describe())
 
     def print_rute_entry(self):
         """Prints a description of the RuteEntry contents.
         """
-        print("Rute Entry Latitude float: {} Latitude coordinate: {}".format(
-            self.lat, convert.get_lat_dmm(self.lat)))
-        print("Rute Entry Longitude float: {} Longitude coordinate: {}".format(
-            self.long, convert.get_lat_dmm(self.long)))
-        print("Rute Entry Unix Timestamp: {} Timestamp converted to UTC: {}".format(
-            self.timestamp, convert.get_timestamp_str_from_int(self.timestamp)))
-        print("Rute Entry Icon: {}".format(self.icon))
+        for line in self.describe():
+            print(line)
         return
 
+    def describe(self):
+        """Internal method which describes the RuteEntry, in the same format as
+        :meth:`Rute.describe_entries<olexparser.rute.Rute.describe_entries>`.
+
+        :return: the description lines
+        :rtype: list
+        """
+        return describe_rute_entries([self.lat], [self.long], [self.timestamp], [self.icon])[0]
+
     def get_lat_float(self):
         """
         :return: the 'Olex float' representing the latitude coordinate
@@ -96,9 +100,28 @@ class RuteEntry:
         """
         return self.icon
 
-    def get_warnings(self):
-        """
-        :return: A list of warnings generated by the RuteEntry
-        :rtype: list
-        """
-        return self.warnings.copy()
+
+def describe_rute_entries(lats, longs, timestamps, icons):
+    """Internal function which describes Rute entries, converting the values in batches.
+
+    :param lats: the 'Olex float' latitude of every entry
+    :type lats: numpy.ndarray
+    :param longs: the 'Olex float' longitude of every entry
+    :type longs: numpy.ndarray
+    :param timestamps: the Unix timestamp of every entry
+    :type timestamps: numpy.ndarray
+    :param icons: the icon string of every entry
+    :type icons: iterable
+    :return: a list of description lines for every entry
+    :rtype: list
+    """
+    lat_dmms = convert.get_lat_dmm_strs(lats)
+    long_dmms = convert.get_long_dmm_strs(longs)
+    times = convert.get_timestamp_strs_from_ints(timestamps).tolist()
+    return [["Rute Entry Latitude float: {} Latitude coordinate: {}".format(lat, lat_dmm),
+             "Rute Entry Longitude float: {} Longitude coordinate: {}".format(long, long_dmm),
+             "Rute Entry Unix Timestamp: {} Timestamp converted to UTC: {}".format(timestamp, time_str),
+             "Rute Entry Icon: {}".format(icon)]
+            for lat, lat_dmm, long, long_dmm, timestamp, time_str, icon in
+            zip(np.asarray(lats, dtype=np.float64).tolist(), lat_dmms, np.asarray(longs, dtype=np.float64).tolist(),
+                long_dmms, np.asarray(timestamps, dtype=np.int64).tolist(), times, icons)]
@@ -1,33 +1,149 @@
-import re
 from olexparser.rute import Rute
+from olexparser.diagnostics import WarningReporter
 
+RUTER_HEADER = "Ferdig forenklet\n"
 
-class RuterFile:
+#: The encodings a line of a Ruter file is decoded with, in order. Latin-1 decodes any bytes, so older files
+#: written with a Norwegian single byte encoding are read too.
+RUTER_ENCODINGS = ("utf-8", "latin-1")
+
+
+def decode_line(line):
+    """Internal function which decodes a line of a Ruter file, trying each of :data:`RUTER_ENCODINGS` in turn.
+
+    :param line: the line as read from the file
+    :type line: bytes
+    :return: the decoded line
+    :rtype: str
+    """
+    for encoding in RUTER_ENCODINGS[:-1]:
+        try:
+            return line.decode(encoding)
+        except UnicodeDecodeError:
+            pass
+    return line.decode(RUTER_ENCODINGS[-1])
+
+
+def iter_rutes(lines, columnar=False, offset=0):
+    """Yields a :class:`Rute<olexparser.rute.Rute>` for each Rute found in the lines of a Ruter file.
+
+    The lines are read in a single pass. A Rute starts with a line beginning with "Rute" and ends at the next
+    empty line, or at the end of the lines. Each line of a Rute is classified as it is read, see
+    :meth:`Rute.add_line<olexparser.rute.Rute.add_line>`.
+
+    :param lines: the lines of a Ruter file, e.g. a file opened in binary mode. Each line is decoded with
+                  :func:`decode_line`
+    :type lines: iterable
+    :param columnar: create columnar Rutes, see :class:`Rute<olexparser.rute.Rute>`. Defaults to False
+    :type columnar: bool
+    :param offset: the byte offset of the first line, used to find the offset of each Rute. Defaults to 0
+    :type offset: int
+    :return: a generator of Rute objects
+    :rtype: generator
+    """
+    rute = None
+    for line in lines:
+        line_offset = offset
+        offset += len(line)
+        line = decode_line(line).rstrip("\r\n")
+        if rute is None:
+            if line.startswith("Rute"):
+                rute = Rute(columnar=columnar, offset=line_offset)
+                rute.add_line(line)
+        elif line == "":
+            rute.finish()
+            yield rute
+            rute = None
+        else:
+            rute.add_line(line)
+    if rute is not None:
+        rute.finish()
+        yield rute
+    return
+
+
+def iter_ruter_file(file_path, warnings=None, columnar=False):
+    """Yields a :class:`Rute<olexparser.rute.Rute>` for each Rute found in a Ruter file, opening it only once.
+
+    Nothing is yielded if the file does not start with the Ruter header.
+
+    :param file_path: the full file path of the Ruter file
+    :type file_path: str
+    :param warnings: an optional list which a warning is added to if the header is not valid
+    :type warnings: list
+    :param columnar: create columnar Rutes, see :class:`Rute<olexparser.rute.Rute>`. Defaults to False
+    :type columnar: bool
+    :return: a generator of Rute objects
+    :rtype: generator
+    """
+    with open(file_path, 'rb') as data:
+        header = data.readline()
+        if decode_line(header).rstrip("\r\n") + "\n" != RUTER_HEADER:
+            if warnings is not None:
+                warn = "Warning, Ruter file does not have proper header: {}".format(file_path)
+                warnings.append(warn)
+            return
+        yield from iter_rutes(data, columnar, len(header))
+    return
+
+
+class RuterFile(WarningReporter):
     """A class representing a Ruter file.
 
     A ruter file consists of a number of Rutes (Routes).
     See :class:`olexparser.rute.Rute` for a description of a Rute.
 
     The Ruter file is a text file. The first line of the file will be  "Ferdig forenklet" ("Completely simplified").
-    This line may also appear elsewhere in the file.
+    This line may also appear elsewhere in the file. The file is read as bytes and each line is decoded on its own,
+    see :data:`RUTER_ENCODINGS`.
 
     :param file: the full file path of the Ruter file
     :type file: str
+    :param cache: an optional cache the parsed Rutes are loaded from and stored in
+    :type cache: olexparser.parse_cache.ParseCache
+    :param columnar: store the points of each Rute in numpy arrays, see :class:`olexparser.rute.Rute`
+    :type columnar: bool
+    :param diagnostics: an optional sink the warnings are reported to, shared with other files. The warnings of
+                        each Rute are reported at its offset once the file has been parsed, and are also kept by
+                        the Rute
+    :type diagnostics: olexparser.diagnostics.Diagnostics
 
     .. todo:: more Ruter file research. # of rutes between ferdig? ais? saving trips as rutes?
     """
 
-    def __init__(self, file):
+    def __init__(self, file, cache=None, columnar=False, diagnostics=None):
         """ A constructor method
 
         :param file: the full file path of the Ruter file
         :type file: str
+        :param cache: an optional cache the parsed Rutes are loaded from and stored in. Defaults to None
+        :type cache: olexparser.parse_cache.ParseCache
+        :param columnar: store the points of each Rute in numpy arrays. Defaults to False
+        :type columnar: bool
+        :param diagnostics: an optional sink the warnings are reported to. Defaults to None
+        :type diagnostics: olexparser.diagnostics.Diagnostics
         """
         self.full_path = file
+        self.columnar = columnar
         self.rutes = []
-        self.warnings = []
+        self.set_diagnostics(diagnostics)
+
+        # Parse the Ruter file, unless it is still valid in the cache
+        cached = None
+        cache_kind = "ruter_columnar" if columnar else "ruter"
+        if cache is not None:
+            cached = cache.load(file, cache_kind)
+        self.cached = cached is not None
+        if cached is not None:
+            self.rutes = cached
+        else:
+            self.find_rutes()
+            if cache is not None and self.warning_count == 0:
+                cache.store(file, cache_kind, self.rutes)
 
-        self.find_rutes()
+        for rute in self.rutes:
+            for warn in rute.get_warnings():
+                self.add_warning(warn, "rute", rute.get_offset())
         return
 
     def __str__(self):
@@ -60,40 +176,29 @@ class RuterFile:
         print("**********")
         return
 
-    def check_header(self):
-        """Internal method to check if the file is a valid Ruter file
-
-        :return: True is valid, false otherwise
-        :rtype: bool
-        """
-        with open(self.full_path, 'r') as data:
-            header = data.readline()
-        if header != "Ferdig forenklet\n":
-            return False
-        else:
-            return True
-
     def find_rutes(self):
-        """Internal method to parse the Ruter file and identify individual Rutes based on a regular expression.
+        """Internal method to parse the Ruter file and identify individual Rutes.
 
-        Identified Rutes are stored in a list.
+        The file is opened once and read line by line with :func:`iter_rutes`. Identified Rutes are stored in a
+        list.
         """
-        if self.check_header():
-            rute_re = r'Rute.*?\n\n'
-            try:
-                with open(self.full_path, 'r') as data:
-                    ruter_file_data = data.read()
-                rute_matches = re.findall(rute_re, ruter_file_data, re.DOTALL)
-
-                for rute in rute_matches:
-                    self.rutes.append(Rute(rute))
-            except Exception as error:
-                self.warnings.append(error)
-        else:
-            warn = "Warning, Ruter file does not have proper header: {}".format(self.full_path)
-            self.warnings.append(warn)
+        header_warnings = []
+        try:
+            for rute in iter_ruter_file(self.full_path, header_warnings, self.columnar):
+                self.rutes.append(rute)
+        except Exception as error:
+            self.add_warning(error, "ruter-read")
+        for warn in header_warnings:
+            self.add_warning(warn, "ruter-header", 0)
         return
 
+    def is_cached(self):
+        """
+        :return: True if the Rutes were loaded from the parse cache instead of reading the file, False otherwise
+        :rtype: bool
+        """
+        return self.cached
+
     def get_full_path(self):
         """
         :return: The full path of the Ruter File
@@ -107,13 +212,3 @@ class RuterFile:
         :rtype: list
         """
         return self.rutes.copy()
-
-    def get_warnings(self):
-        """
-        :return: A list of warnings generated by the RuterFile, and it's child objects
-        :rtype: list
-        """
-        warn = self.warnings.copy()
-        for rute in self.rutes:
-            warn.extend(rute.get_warnings())
-        return warn
@@ -1,8 +1,9 @@
 import struct
 import olexparser.convert as convert
+from olexparser.diagnostics import WarningList
 
 
-class SegmentEntry:
+class SegmentEntry(WarningList):
     """
     A class representing a 16 byte entry from a segment file
 
@@ -11,8 +12,12 @@ class SegmentEntry:
     The unix timestamp is stored as a 4 byte integer. The latitude and longitude are stored as 4 byte floats.
 
     Any errors generated can be retrieved using get_warnings()
+
+    SegmentEntry uses __slots__, keeping the memory use of each entry small.
     """
 
+    __slots__ = ("timestamp_int", "lat_float", "long_float", "unknown", "warnings")
+
     def __init__(self, entry):
         """A constructor method for the SegmentEntry.
 
@@ -20,34 +25,34 @@ class SegmentEntry:
         :type entry: bytes
         """
 
-        self.warnings = []
+        self.warnings = None
         if len(entry) != 16:
             warn = "Error, Segment Entry is not 16 byte length"
-            self.warnings.append(warn)
+            self.add_warning(warn)
         else:
             try:
                 # convert the bytes into an int.
                 self.timestamp_int = int.from_bytes(entry[:4], "little")
             except Exception as error:
-                self.warnings.append(error)
+                self.add_warning(error)
 
             try:
                 # convert the bytes into a float
                 self.lat_float = struct.unpack('f', entry[4:8])[0]
             except Exception as error:
-                self.warnings.append(error)
+                self.add_warning(error)
 
             try:
                 # convert the bytes into a float
                 self.long_float = struct.unpack('f', entry[8:12])[0]
             except Exception as error:
-                self.warnings.append(error)
+                self.add_warning(error)
 
             try:
                 # store the 4 unknown bytes as bytes
                 self.unknown = entry[12:]
             except Exception as error:
-                self.warnings.append(error)
+                self.add_warning(error)
 
     def __str__(self):
         """A descriptive String representation of the SegmentEntry.
@@ -55,26 +60,29 @@ class SegmentEntry:
         :return: A descriptive string with known values converted.
         :rtype: str
         """
-        s = "\nUnix Timestamp: {} Timestamp converted UTC: {}".format(
-            self.timestamp_int, convert.get_timestamp_str_from_int(self.timestamp_int))
-        s = s + "\nLatitude float: {} Latitude coordinate: {}".format(
-            self.lat_float, convert.get_lat_dmm(self.lat_float))
-        s = s + "\nLongitude float: {} Longitude coordinate: {}".format(
-            self.long_float, convert.get_long_dmm(self.long_float))
-        s = s + "\n4 bytes of unknown purpose: {}".format(self.unknown)
-        return s
+        return "".join("\n" + line for line in self.describe())
 
     def print_segment_entry(self):
         """Prints the converted data from the 16 bytes"""
-        print("Unix Timestamp: {} Timestamp converted UTC: {}".format(
-            self.timestamp_int, convert.get_timestamp_str_from_int(self.timestamp_int)))
-        print("Latitude float: {} Latitude coordinate: {}".format(
-            self.lat_float, convert.get_lat_dmm(self.lat_float)))
-        print("Longitude float: {} Longitude coordinate: {}".format(
-            self.long_float, convert.get_long_dmm(self.long_float)))
-        print("4 bytes of unknown purpose: {}".format(self.unknown))
+        for line in self.describe():
+            print(line)
         return
 
+    def describe(self):
+        """Internal method which describes the SegmentEntry, in the same format as
+        :meth:`SegmentFile.describe_entries<olexparser.segment_file.SegmentFile.describe_entries>`.
+
+        :return: the description lines
+        :rtype: list
+        """
+        time_str = convert.get_timestamp_strs_from_ints([self.timestamp_int])[0]
+        lat_dmm = convert.get_lat_dmm_strs([self.lat_float])[0]
+        long_dmm = convert.get_long_dmm_strs([self.long_float])[0]
+        return ["Unix Timestamp: {} Timestamp converted UTC: {}".format(self.timestamp_int, time_str),
+                "Latitude float: {} Latitude coordinate: {}".format(self.lat_float, lat_dmm),
+                "Longitude float: {} Longitude coordinate: {}".format(self.long_float, long_dmm),
+                "4 bytes of unknown purpose: {}".format(self.unknown)]
+
     def get_lat_float(self):
         """
         :return float: the 'Olex float' representing a latitude coordinate
@@ -105,10 +113,3 @@ class SegmentEntry:
         :rtype: int
         """
         return self.timestamp_int
-
-    def get_warnings(self):
-        """
-        :return: A list of warnings generated by the SegmentEntry
-        :rtype: list
-        """
-        return self.warnings.copy()
@@ -1,33 +1,90 @@
 import os
+import mmap
+import time
+import asyncio
+import numpy as np
+import olexparser.convert as convert
 from olexparser.segment_entry import SegmentEntry
+from olexparser.diagnostics import WarningReporter
 
+#: The size in bytes of a single entry in a segment file.
+SEGMENT_ENTRY_SIZE = 16
 
-class SegmentFile:
+#: A numpy structured dtype describing a single 16 byte segment entry.
+#: See :class:`SegmentEntry<olexparser.segment_entry.SegmentEntry>` for a description of the fields.
+SEGMENT_DTYPE = np.dtype([("timestamp", "<u4"), ("lat", "<f4"), ("long", "<f4"), ("unknown", "V4")])
+
+
+class SegmentFile(WarningReporter):
     """
     A Class representing a Segment file.
 
     A Segment file consists of a number of 16 byte entries.
     See :class:`olexparser.segment_entry.SegmentEntry` for a description of a segment entry.
 
+    The entries are decoded in a single pass into a numpy structured array (see :data:`SEGMENT_DTYPE`), which
+    can be retrieved as a whole with :meth:`get_records` or one column at a time with :meth:`get_timestamps`,
+    :meth:`get_lats`, :meth:`get_longs` and :meth:`get_unknowns`.
+    :class:`SegmentEntry<olexparser.segment_entry.SegmentEntry>` objects are only created when requested
+    through :meth:`get_seg_entries`, by index (``segment[i]``) or by slice (``segment[i:j]``).
+
+    A segment file which is still being written by Olex can be followed with :meth:`read_new_entries`,
+    :meth:`follow`, :meth:`watch` or :meth:`afollow`, which only decode the entries appended since the last read.
+
+    If use_mmap is True the file is only inspected with :func:`os.stat` when the SegmentFile is created.
+    The file is memory mapped the first time its entries are accessed and entries are decoded on demand,
+    without copying the file into memory. Use :meth:`close` to release the mapping.
+
     :param file_path: the full file path of the Segment file
     :type file_path: str
+    :param use_mmap: memory map the file and decode entries on demand. Defaults to False
+    :type use_mmap: bool
+    :param records: entries which have already been decoded from the file, e.g. by :func:`decode_segment_file` in
+                    a worker process. If given, the file is only inspected with :func:`os.stat`.
+    :type records: numpy.ndarray
+    :param cache: an optional cache the decoded entries are loaded from and stored in. Not used with use_mmap
+    :type cache: olexparser.parse_cache.ParseCache
+    :param diagnostics: an optional sink the warnings are reported to, shared with other files. The warnings of
+                        each :class:`SegmentEntry<olexparser.segment_entry.SegmentEntry>` are reported when it is
+                        created
+    :type diagnostics: olexparser.diagnostics.Diagnostics
     """
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, use_mmap=False, records=None, cache=None, diagnostics=None):
         """A constructor method for the SegmentFile class.
 
         :param file_path: the full file path of the Segment file
         :type file_path: str
+        :param use_mmap: memory map the file and decode entries on demand. Defaults to False
+        :type use_mmap: bool
+        :param records: entries which have already been decoded from the file. Defaults to None
+        :type records: numpy.ndarray
+        :param cache: an optional cache the decoded entries are loaded from and stored in. Defaults to None
+        :type cache: olexparser.parse_cache.ParseCache
+        :param diagnostics: an optional sink the warnings are reported to. Defaults to None
+        :type diagnostics: olexparser.diagnostics.Diagnostics
         """
         self.seg_num = 0
+        self.records = np.empty(0, dtype=SEGMENT_DTYPE)
         self.seg_entries = {}
         self.full_path = file_path
         self.file_size = 0
+        self.use_mmap = use_mmap and records is None
+        self.mmap = None
+        self.tail_offset = None
+        self.read_error = False
+        self.size_warned = False
 
-        self.warnings = []
+        self.set_diagnostics(diagnostics)
 
-        # parse the segment file
-        self.parse_segment_file()
+        # parse the segment file, unless it is still valid in the cache
+        use_cache = cache is not None and records is None and not use_mmap
+        if use_cache:
+            records = cache.load(file_path, "segment")
+        self.cached = use_cache and records is not None
+        self.parse_segment_file(records)
+        if use_cache and records is None and not self.read_error and os.path.isfile(file_path):
+            cache.store(file_path, "segment", self.records)
 
         return
 
@@ -41,24 +98,59 @@ class SegmentFile:
         s = "\nSegment filepath: {}".format(self.full_path)
         s = s + "\nSegment number: {}".format(self.seg_num)
         s = s + "\nSegment file size: {}".format(self.file_size)
-        if len(self.seg_entries.keys()) > 0:
-            for i in self.seg_entries.keys():
-                s = s + "\nSegment Entry at offset {} contains:".format(i)
-                s = s + self.seg_entries[i].__str__()
+        if len(self) > 0:
+            for offset, lines in self.describe_entries():
+                s = s + "\nSegment Entry at offset {} contains:".format(offset)
+                s = s + "\n" + "\n".join(lines)
         else:
             s = s + "\nNo Segment entries found in this Segment."
 
         return s
 
-    def get_warnings(self):
+    def __len__(self):
+        """
+        :return: the number of complete 16 byte entries in the segment file
+        :rtype: int
         """
-        :return: a list of warnings generated by the SegmentFile, and it's child objects
-        :rtype: list
+        if self.use_mmap and self.mmap is None:
+            return self.file_size // SEGMENT_ENTRY_SIZE
+        return len(self.records)
+
+    def __getitem__(self, key):
+        """Returns the SegmentEntry at an index, or a list of SegmentEntry objects for a slice.
+
+        :param key: the index of the entry (i.e. the file offset divided by 16), or a slice of indexes
+        :type key: int, slice
+        :return: the SegmentEntry at the index, or a list of SegmentEntry objects for a slice
+        :rtype: SegmentEntry, list
         """
-        warn = self.warnings.copy()
-        for seg_sum in self.seg_entries.values():
-            warn.extend(seg_sum.get_warnings())
-        return warn
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(len(self)))]
+
+        records = self.get_records()
+        if key < 0:
+            key += len(records)
+        if key < 0 or key >= len(records):
+            raise IndexError("Segment {} has no entry at index {}".format(self.seg_num, key))
+        offset = key * SEGMENT_ENTRY_SIZE
+        if offset not in self.seg_entries:
+            self.seg_entries[offset] = self.make_seg_entry(records[key], offset)
+        return self.seg_entries[offset]
+
+    def close(self):
+        """Releases the memory map of a SegmentFile created with use_mmap.
+
+        The file will be mapped again if its entries are accessed after closing.
+        """
+        if self.mmap is not None:
+            self.records = np.empty(0, dtype=SEGMENT_DTYPE)
+            try:
+                self.mmap.close()
+            except BufferError:
+                # arrays returned by get_records() still reference the map, it is released once they are freed
+                pass
+            self.mmap = None
+        return
 
     def print_segment(self):
         """Prints the contents of the segment file"""
@@ -66,22 +158,52 @@ class SegmentFile:
         print("Segment filepath: {}".format(self.full_path))
         print("Segment number: {}".format(self.seg_num))
         print("Segment file size: {}".format(self.file_size))
-        if len(self.seg_entries.keys()) > 0:
-            for i in self.seg_entries.keys():
+        if len(self) > 0:
+            for offset, lines in self.describe_entries():
                 print()
-                print("Segment Entry at offset {} contains:".format(i))
-                self.seg_entries[i].print_segment_entry()
+                print("Segment Entry at offset {} contains:".format(offset))
+                for line in lines:
+                    print(line)
         else:
             print("No Segment entries found in this Segment.")
         print("**********")
         return
 
-    def parse_segment_file(self):
+    def describe_entries(self):
+        """Internal method which describes every entry in the segment file, converting the values in batches.
+
+        The descriptions match :meth:`SegmentEntry.print_segment_entry
+        <olexparser.segment_entry.SegmentEntry.print_segment_entry>`, without creating a SegmentEntry per entry.
+
+        :return: a generator of (file offset, list of description lines) tuples
+        :rtype: generator
+        """
+        records = self.get_records()
+        times = convert.get_timestamp_strs_from_ints(records["timestamp"]).tolist()
+        lat_dmms = convert.get_lat_dmm_strs(records["lat"])
+        long_dmms = convert.get_long_dmm_strs(records["long"])
+        values = zip(records["timestamp"].tolist(), times, records["lat"].tolist(), lat_dmms,
+                     records["long"].tolist(), long_dmms, records["unknown"].tolist())
+        for i, (timestamp, time_str, lat, lat_dmm, long, long_dmm, unknown) in enumerate(values):
+            lines = ["Unix Timestamp: {} Timestamp converted UTC: {}".format(timestamp, time_str),
+                     "Latitude float: {} Latitude coordinate: {}".format(lat, lat_dmm),
+                     "Longitude float: {} Longitude coordinate: {}".format(long, long_dmm),
+                     "4 bytes of unknown purpose: {}".format(unknown)]
+            yield i * SEGMENT_ENTRY_SIZE, lines
+        return
+
+    def parse_segment_file(self, records=None):
         """ Internal method which parses the segment file.
 
-        parse_segment_file reads the segment file as a binary stream and creates a SegmentEntry object
-        for each 16 byte line in the file. A warning is generated if the file is not divisible by 16,
-        and the remaining bytes are ignored.
+        parse_segment_file reads the segment file as a binary stream and decodes every 16 byte entry at once into
+        a numpy structured array of :data:`SEGMENT_DTYPE`. A warning is generated if the file is not divisible by
+        16, and the remaining bytes are ignored.
+
+        If the SegmentFile was created with use_mmap, only the file size is read here and the entries are decoded
+        when first accessed. If records are given they are used instead of reading the file.
+
+        :param records: entries which have already been decoded from the file. Defaults to None
+        :type records: numpy.ndarray
 
         See :class:`SegmentEntry<olexparser.segment_entry.SegmentEntry>` for a description of a segment entry.
         """
@@ -90,26 +212,171 @@ class SegmentFile:
             self.seg_num = int(os.path.basename(self.full_path).strip("_A").strip("segment"))
             self.file_size = os.path.getsize(self.full_path)
 
+            size_diff = self.file_size % SEGMENT_ENTRY_SIZE
+            if size_diff != 0:
+                warn = "Warning, file size of Segment {} not divisible by 16. May not be valid Segment file or " \
+                       "corrupt. The last {} bytes will not be parsed.".format(self.seg_num, size_diff)
+                self.add_warning(warn, "segment-size", self.file_size - size_diff)
+                self.size_warned = True
+
+            if records is not None:
+                self.records = records
+                return
+            if self.use_mmap:
+                return
             try:
                 with open(self.full_path, 'rb') as f:
                     data = f.read()
-                size_diff = self.file_size % 16
-                if size_diff != 0:
-                    warn = "Warning, file size of Segment {} not divisible by 16. May not be valid Segment file or " \
-                           "corrupt. The last {} bytes will not be parsed.".format(self.seg_num, size_diff)
-                    self.warnings.append(warn)
-                    data = data[:-size_diff]
-                offset = 0
-                while offset < len(data):
-                    self.seg_entries[offset] = SegmentEntry(data[offset:offset+16])
-                    offset += 16
+                self.records = np.frombuffer(data, dtype=SEGMENT_DTYPE, count=len(data) // SEGMENT_ENTRY_SIZE)
             except Exception as e:
-                self.warnings.append(e)
-                pass
+                self.read_error = True
+                self.add_warning(e, "segment-read")
 
         else:
             warn = "Warning, Segment {0} is not a file".format(self.full_path)
-            self.warnings.append(warn)
+            self.add_warning(warn, "segment-missing")
+        return
+
+    def iter_entries(self, chunk_size=4096):
+        """Yields the entries of the segment file in batches, reading at most chunk_size entries at a time.
+
+        The file is read directly from disk, so memory use is bounded by chunk_size regardless of the file size.
+        Each batch is a numpy structured array of :data:`SEGMENT_DTYPE`; the last batch may be shorter.
+        If the file ends with a partial entry, a warning is generated and the remaining bytes are ignored.
+
+        :param chunk_size: the maximum number of entries in each batch. Defaults to 4096
+        :type chunk_size: int
+        :return: a generator of numpy structured arrays
+        :rtype: generator
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        if not os.path.isfile(self.full_path):
+            return
+
+        chunk_bytes = chunk_size * SEGMENT_ENTRY_SIZE
+        try:
+            with open(self.full_path, 'rb') as f:
+                while True:
+                    data = f.read(chunk_bytes)
+                    size_diff = len(data) % SEGMENT_ENTRY_SIZE
+                    if size_diff != 0 and not self.size_warned:
+                        warn = "Warning, file size of Segment {} not divisible by 16. May not be valid Segment file " \
+                               "or corrupt. The last {} bytes will not be parsed.".format(self.seg_num, size_diff)
+                        self.add_warning(warn, "segment-size", f.tell() - size_diff)
+                        self.size_warned = True
+                    if len(data) >= SEGMENT_ENTRY_SIZE:
+                        yield np.frombuffer(data, dtype=SEGMENT_DTYPE, count=len(data) // SEGMENT_ENTRY_SIZE)
+                    if len(data) < chunk_bytes:
+                        break
+        except OSError as e:
+            self.add_warning(e, "segment-read")
+        return
+
+    def read_new_entries(self):
+        """Decodes the entries appended to the segment file since the last call.
+
+        The first call returns the entries appended since the SegmentFile was created, i.e. after the entries
+        counted by ``len(segment)``. Only whole entries are decoded: a partial entry at the end of the file is held
+        back until the rest of it has been written. If the file became shorter, it is assumed to have been
+        replaced and is read again from the start.
+
+        The entries returned are not added to :meth:`get_records`.
+
+        :return: the new entries, as a numpy structured array of :data:`SEGMENT_DTYPE`
+        :rtype: numpy.ndarray
+        """
+        if self.tail_offset is None:
+            self.tail_offset = len(self) * SEGMENT_ENTRY_SIZE
+
+        try:
+            with open(self.full_path, 'rb') as f:
+                size = f.seek(0, 2)
+                if size < self.tail_offset:
+                    warn = "Warning, Segment {} became shorter while being followed, reading it again from the " \
+                           "start".format(self.seg_num)
+                    self.add_warning(warn, "segment-truncated", size)
+                    self.tail_offset = 0
+                num_entries = (size - self.tail_offset) // SEGMENT_ENTRY_SIZE
+                f.seek(self.tail_offset)
+                data = f.read(num_entries * SEGMENT_ENTRY_SIZE)
+        except OSError as e:
+            self.add_warning(e, "segment-read")
+            return np.empty(0, dtype=SEGMENT_DTYPE)
+
+        num_entries = len(data) // SEGMENT_ENTRY_SIZE
+        self.tail_offset += num_entries * SEGMENT_ENTRY_SIZE
+        return np.frombuffer(data, dtype=SEGMENT_DTYPE, count=num_entries)
+
+    def follow(self, interval=1.0, stop=None):
+        """Yields the entries appended to the segment file as they are written.
+
+        The file is polled every interval seconds with :meth:`read_new_entries`, and each non-empty batch of new
+        entries is yielded.
+
+        :param interval: the number of seconds to wait between polls. Defaults to 1.0
+        :type interval: float
+        :param stop: an optional callable, e.g. :meth:`threading.Event.is_set`, which ends the generator when it
+                     returns True
+        :type stop: callable
+        :return: a generator of numpy structured arrays of :data:`SEGMENT_DTYPE`
+        :rtype: generator
+        """
+        while stop is None or not stop():
+            entries = self.read_new_entries()
+            if len(entries) > 0:
+                yield entries
+            else:
+                time.sleep(interval)
+        return
+
+    def watch(self, callback, interval=1.0, stop=None):
+        """Calls callback with each batch of entries appended to the segment file, see :meth:`follow`.
+
+        :param callback: a callable taking a numpy structured array of :data:`SEGMENT_DTYPE`
+        :type callback: callable
+        :param interval: the number of seconds to wait between polls. Defaults to 1.0
+        :type interval: float
+        :param stop: an optional callable which stops watching when it returns True
+        :type stop: callable
+        """
+        for entries in self.follow(interval, stop):
+            callback(entries)
+        return
+
+    async def afollow(self, interval=1.0, stop=None):
+        """An asynchronous iterator version of :meth:`follow`, which waits with :func:`asyncio.sleep`.
+
+        :param interval: the number of seconds to wait between polls. Defaults to 1.0
+        :type interval: float
+        :param stop: an optional callable which ends the iterator when it returns True
+        :type stop: callable
+        :return: an asynchronous generator of numpy structured arrays of :data:`SEGMENT_DTYPE`
+        :rtype: async_generator
+        """
+        while stop is None or not stop():
+            entries = self.read_new_entries()
+            if len(entries) > 0:
+                yield entries
+            else:
+                await asyncio.sleep(interval)
+
+    def map_segment_file(self):
+        """Internal method which memory maps the segment file and creates a zero copy view of its entries.
+
+        Empty files cannot be memory mapped, so no map is created for them. If the file cannot be mapped a warning
+        is generated once, and the SegmentFile has no entries from then on.
+        """
+        num_entries = self.file_size // SEGMENT_ENTRY_SIZE
+        if num_entries == 0:
+            return
+        try:
+            with open(self.full_path, 'rb') as f:
+                self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.records = np.frombuffer(self.mmap, dtype=SEGMENT_DTYPE, count=num_entries)
+        except Exception as e:
+            self.read_error = True
+            self.add_warning(e, "segment-read")
         return
 
     def get_size(self):
@@ -131,11 +398,94 @@ class SegmentFile:
     def get_seg_entries(self):
         """Returns the dictionary of SegmentEntry objects with key:value - file_offset:SegmentEntry
 
+        The SegmentEntry objects are created from the decoded records the first time this method is called.
+        Prefer :meth:`get_records` when working with large segment files.
+
         :return: the dictionary of SegmentEntry objects with key:value - file_offset:SegmentEntry
         :rtype: dict
         """
+        records = self.get_records()
+        if len(self.seg_entries) != len(records):
+            self.seg_entries = {i * SEGMENT_ENTRY_SIZE: self.seg_entries.get(i * SEGMENT_ENTRY_SIZE) or
+                                self.make_seg_entry(records[i], i * SEGMENT_ENTRY_SIZE) for i in range(len(records))}
         return self.seg_entries
 
+    def make_seg_entry(self, record, offset):
+        """Internal method which creates the SegmentEntry of a decoded entry, and reports its warnings.
+
+        :param record: the decoded entry
+        :type record: numpy.void
+        :param offset: the file offset of the entry
+        :type offset: int
+        :return: the SegmentEntry
+        :rtype: SegmentEntry
+        """
+        entry = SegmentEntry(record.tobytes())
+        for warn in entry.get_warnings():
+            self.add_warning(warn, "segment-entry", offset)
+        return entry
+
+    def get_seg_entry(self, offset):
+        """Returns the SegmentEntry at a file offset, decoding only that entry.
+
+        :param offset: the file offset of the entry, a multiple of 16
+        :type offset: int
+        :return: the SegmentEntry at the file offset
+        :rtype: SegmentEntry
+        :raises KeyError: if there is no entry at the offset
+        """
+        if offset % SEGMENT_ENTRY_SIZE != 0 or not 0 <= offset < len(self) * SEGMENT_ENTRY_SIZE:
+            raise KeyError(offset)
+        return self[offset // SEGMENT_ENTRY_SIZE]
+
+    def get_records(self):
+        """Returns the decoded entries of the segment file as a numpy structured array.
+
+        The array has one element per 16 byte entry with the fields ``timestamp``, ``lat``, ``long`` and
+        ``unknown``. See :data:`SEGMENT_DTYPE`.
+
+        :return: the decoded entries of the segment file
+        :rtype: numpy.ndarray
+        """
+        if self.use_mmap and self.mmap is None and not self.read_error:
+            self.map_segment_file()
+        return self.records
+
+    def get_timestamps(self):
+        """
+        :return: the Unix timestamp of every entry in the segment file
+        :rtype: numpy.ndarray
+        """
+        return self.get_records()["timestamp"]
+
+    def get_lats(self):
+        """
+        :return: the 'Olex float' latitude of every entry in the segment file
+        :rtype: numpy.ndarray
+        """
+        return self.get_records()["lat"]
+
+    def get_longs(self):
+        """
+        :return: the 'Olex float' longitude of every entry in the segment file
+        :rtype: numpy.ndarray
+        """
+        return self.get_records()["long"]
+
+    def get_unknowns(self):
+        """
+        :return: the 4 unknown bytes of every entry in the segment file
+        :rtype: numpy.ndarray
+        """
+        return self.get_records()["unknown"]
+
+    def is_cached(self):
+        """
+        :return: True if the entries were loaded from the parse cache instead of reading the file, False otherwise
+        :rtype: bool
+        """
+        return self.cached
+
     def get_full_path(self):
         """Returns the full file path for the segment file.
 
@@ -143,3 +493,45 @@ class SegmentFile:
         :rtype: str
         """
         return self.full_path
+
+
+def decode_segment_file(file_path):
+    """Decodes the entries of a segment file without building a SegmentFile for the caller.
+
+    Intended to be run in a worker process: only the compact structured array is returned, and a
+    :class:`SegmentFile` can be rebuilt from it with ``SegmentFile(file_path, records=records)``.
+
+    :param file_path: the full file path of the segment file
+    :type file_path: str
+    :return: the decoded entries, or None if the file could not be read
+    :rtype: numpy.ndarray, None
+    """
+    segment = SegmentFile(file_path)
+    for warn in segment.get_warnings():
+        if isinstance(warn, Exception):
+            return None
+    if not os.path.isfile(file_path):
+        return None
+    return segment.get_records()
+
+
+def iter_segment_entries(file_paths, chunk_size=4096, diagnostics=None):
+    """Yields the entries of several segment files in batches, one file after another.
+
+    Each file is read with :meth:`SegmentFile.iter_entries`, so memory use is bounded by chunk_size regardless
+    of the number or size of the files.
+
+    :param file_paths: the full file paths of the segment files
+    :type file_paths: iterable
+    :param chunk_size: the maximum number of entries in each batch. Defaults to 4096
+    :type chunk_size: int
+    :param diagnostics: an optional sink the warnings of each segment file are reported to. Defaults to None
+    :type diagnostics: olexparser.diagnostics.Diagnostics
+    :return: a generator of (segment number, numpy structured array) tuples
+    :rtype: generator
+    """
+    for file_path in file_paths:
+        segment = SegmentFile(file_path, use_mmap=True, diagnostics=diagnostics)
+        for chunk in segment.iter_entries(chunk_size):
+            yield segment.get_seg_num(), chunk
+    return
@@ -0,0 +1,294 @@
+import math
+from collections import OrderedDict
+import numpy as np
+from olexparser.segment_file import SegmentFile
+from olexparser.geo import get_distances
+from olexparser.diagnostics import Diagnostics
+
+#: A numpy structured dtype describing a hit returned by a query: the segment number and the index of the entry
+#: in its segment file.
+HIT_DTYPE = np.dtype([("seg_num", "<u4"), ("index", "<u4")])
+
+#: The Turdata file rounds the extents in a segment summary to 2 decimal places, so they are widened by this much
+#: (in minutes of arc) before being used to prune segment files.
+SUMMARY_TOLERANCE = 0.01
+
+#: The default number of gridded segment files kept in memory between queries.
+MAX_SEGMENTS = 64
+
+
+class SpatialIndex:
+    """
+    A Class representing a spatial index over the entries of every segment file of an Olex archive.
+
+    Positions are indexed in 'Olex float' coordinates (minutes of arc) on a uniform grid of cell_size by cell_size
+    minutes. The index is seeded from the latitude and longitude extents of each
+    :class:`TurTurSegmentSummary<olexparser.turtur_segment_summary.TurTurSegmentSummary>`, so no segment file is
+    read when the index is created. A query only opens the segment files whose extents overlap the query. The
+    first time a segment file is opened its entries are sorted into grid cells, and a query then only checks the
+    entries in the cells it covers. At most max_segments gridded segment files are kept for later queries, the
+    least recently used ones are dropped first.
+
+    Segment files without a summary are memory mapped when the index is created to find their extents.
+
+    The warnings of the segment files are reported to the Diagnostics sink the first time each file is opened, not
+    again when it is opened after being dropped.
+
+    :param segment_paths: a dictionary with key:value - segment number:full file path of the segment file
+    :type segment_paths: dict
+    :param summaries: the TurTurSegmentSummary objects of the archive
+    :type summaries: iterable
+    :param cell_size: the size of a grid cell in minutes of arc. Defaults to 1.0
+    :type cell_size: float
+    :param cache: an optional parse cache used when segment files are opened
+    :type cache: olexparser.parse_cache.ParseCache
+    :param max_segments: the maximum number of gridded segment files kept in memory. Defaults to MAX_SEGMENTS
+    :type max_segments: int
+    :param diagnostics: an optional sink the warnings of the segment files are reported to
+    :type diagnostics: olexparser.diagnostics.Diagnostics
+    """
+
+    def __init__(self, segment_paths, summaries, cell_size=1.0, cache=None, max_segments=MAX_SEGMENTS,
+                 diagnostics=None):
+        """A constructor method for the SpatialIndex class.
+
+        :param segment_paths: a dictionary with key:value - segment number:full file path of the segment file
+        :type segment_paths: dict
+        :param summaries: the TurTurSegmentSummary objects of the archive
+        :type summaries: iterable
+        :param cell_size: the size of a grid cell in minutes of arc. Defaults to 1.0
+        :type cell_size: float
+        :param cache: an optional parse cache used when segment files are opened. Defaults to None
+        :type cache: olexparser.parse_cache.ParseCache
+        :param max_segments: the maximum number of gridded segment files kept in memory. Defaults to MAX_SEGMENTS
+        :type max_segments: int
+        :param diagnostics: an optional sink the warnings are reported to. Defaults to None
+        :type diagnostics: olexparser.diagnostics.Diagnostics
+        """
+        if cell_size <= 0:
+            raise ValueError("cell_size must be greater than 0")
+        self.segment_paths = {int(seg_num): path for seg_num, path in segment_paths.items()}
+        self.cell_size = cell_size
+        self.cache = cache
+        self.max_segments = max_segments
+        self.grids = OrderedDict()
+
+        self.diagnostics = diagnostics if diagnostics is not None else Diagnostics(None, None)
+        self.opened_paths = set()
+
+        extents = {}
+        for summary in summaries:
+            seg_num = summary.get_seg_num()
+            if seg_num in self.segment_paths and seg_num not in extents:
+                extents[seg_num] = (summary.get_lat_start_float(), summary.get_long_start_float(),
+                                    summary.get_lat_end_float(), summary.get_long_end_float())
+        for seg_num, path in self.segment_paths.items():
+            if seg_num not in extents:
+                segment = self.open_segment(path, use_mmap=True)
+                lats = segment.get_lats()
+                longs = segment.get_longs()
+                if len(lats) > 0:
+                    extents[seg_num] = (float(lats.min()), float(longs.min()), float(lats.max()), float(longs.max()))
+                segment.close()
+
+        self.seg_nums = np.array(list(extents.keys()), dtype=np.int64)
+        extents = np.array(list(extents.values()), dtype=np.float64).reshape(-1, 4)
+        self.min_lats, self.min_longs, self.max_lats, self.max_longs = extents.T
+        self.min_lats = self.min_lats - SUMMARY_TOLERANCE
+        self.min_longs = self.min_longs - SUMMARY_TOLERANCE
+        self.max_lats = self.max_lats + SUMMARY_TOLERANCE
+        self.max_longs = self.max_longs + SUMMARY_TOLERANCE
+        return
+
+    def __len__(self):
+        """
+        :return: the number of segment files in the index
+        :rtype: int
+        """
+        return len(self.seg_nums)
+
+    def get_cell_keys(self, lats, longs):
+        """Internal method which returns the grid cell key of each position.
+
+        :param lats: 'Olex float' latitudes
+        :type lats: numpy.ndarray
+        :param longs: 'Olex float' longitudes
+        :type longs: numpy.ndarray
+        :return: the cell key of each position
+        :rtype: numpy.ndarray
+        """
+        rows = np.floor(np.asarray(lats, dtype=np.float64) / self.cell_size).astype(np.int64)
+        cols = np.floor(np.asarray(longs, dtype=np.float64) / self.cell_size).astype(np.int64)
+        return rows * 2 ** 32 + (cols + 2 ** 31)
+
+    def get_overlapping_segments(self, min_lat, min_long, max_lat, max_long):
+        """Returns the numbers of the segment files whose extents overlap a bounding box.
+
+        :param min_lat: the smallest 'Olex float' latitude of the box
+        :type min_lat: float
+        :param min_long: the smallest 'Olex float' longitude of the box
+        :type min_long: float
+        :param max_lat: the largest 'Olex float' latitude of the box
+        :type max_lat: float
+        :param max_long: the largest 'Olex float' longitude of the box
+        :type max_long: float
+        :return: the segment numbers
+        :rtype: list
+        """
+        overlapping = ((self.min_lats <= max_lat) & (self.max_lats >= min_lat) &
+                       (self.min_longs <= max_long) & (self.max_longs >= min_long))
+        return [int(seg_num) for seg_num in self.seg_nums[overlapping]]
+
+    def open_segment(self, path, use_mmap=False):
+        """Internal method which opens a segment file. Its warnings are only reported the first time it is opened.
+
+        :param path: the full file path of the segment file
+        :type path: str
+        :param use_mmap: memory map the file instead of using the parse cache. Defaults to False
+        :type use_mmap: bool
+        :return: the segment file
+        :rtype: SegmentFile
+        """
+        diagnostics = self.diagnostics if path not in self.opened_paths else Diagnostics(0, 0)
+        self.opened_paths.add(path)
+        if use_mmap:
+            return SegmentFile(path, use_mmap=True, diagnostics=diagnostics)
+        return SegmentFile(path, cache=self.cache, diagnostics=diagnostics)
+
+    def get_segment_grid(self, seg_num):
+        """Internal method which opens a segment file and sorts its entries into grid cells, unless it is still
+        kept from an earlier query.
+
+        :param seg_num: the segment number
+        :type seg_num: int
+        :return: the decoded entries, the indexes which sort them by cell, and a dictionary with
+                 key:value - cell key:(first, last) position in the sorted indexes
+        :rtype: tuple
+        """
+        if seg_num not in self.grids:
+            segment = self.open_segment(self.segment_paths[seg_num])
+            records = segment.get_records()
+            keys = self.get_cell_keys(records["lat"], records["long"])
+            order = np.argsort(keys, kind="stable")
+            cell_keys, firsts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+            cells = {int(key): (int(first), int(first + count)) for key, first, count in
+                     zip(cell_keys, firsts, counts)}
+            self.grids[seg_num] = (records, order, cells)
+            while len(self.grids) > max(self.max_segments, 1):
+                self.grids.popitem(last=False)
+        self.grids.move_to_end(seg_num)
+        records, order, cells = self.grids[seg_num]
+        return records, order, cells
+
+    def get_candidates(self, seg_num, min_lat, min_long, max_lat, max_long):
+        """Internal method which returns the indexes of the entries of a segment in the cells covering a box.
+
+        If the box covers more cells than the segment occupies, every entry is returned instead.
+
+        :return: the decoded entries of the segment, and the indexes of the candidate entries
+        :rtype: tuple
+        """
+        records, order, cells = self.get_segment_grid(seg_num)
+        first_row, last_row = (int(math.floor(v / self.cell_size)) for v in (min_lat, max_lat))
+        first_col, last_col = (int(math.floor(v / self.cell_size)) for v in (min_long, max_long))
+        num_cells = (last_row - first_row + 1) * (last_col - first_col + 1)
+        if num_cells > len(cells):
+            return records, np.arange(len(records))
+
+        ranges = []
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                cell = cells.get(row * 2 ** 32 + (col + 2 ** 31))
+                if cell is not None:
+                    ranges.append(order[cell[0]:cell[1]])
+        if len(ranges) == 0:
+            return records, np.empty(0, dtype=np.int64)
+        return records, np.concatenate(ranges)
+
+    def query_bbox(self, min_lat, min_long, max_lat, max_long):
+        """Returns every segment entry inside a bounding box.
+
+        :param min_lat: the smallest 'Olex float' latitude of the box
+        :type min_lat: float
+        :param min_long: the smallest 'Olex float' longitude of the box
+        :type min_long: float
+        :param max_lat: the largest 'Olex float' latitude of the box
+        :type max_lat: float
+        :param max_long: the largest 'Olex float' longitude of the box
+        :type max_long: float
+        :return: the segment number and entry index of each hit, as a numpy structured array of :data:`HIT_DTYPE`
+        :rtype: numpy.ndarray
+        """
+        hits = []
+        for seg_num in self.get_overlapping_segments(min_lat, min_long, max_lat, max_long):
+            records, candidates = self.get_candidates(seg_num, min_lat, min_long, max_lat, max_long)
+            lats = records["lat"][candidates]
+            longs = records["long"][candidates]
+            inside = (lats >= min_lat) & (lats <= max_lat) & (longs >= min_long) & (longs <= max_long)
+            hits.append(self.make_hits(seg_num, candidates[inside]))
+        return self.join_hits(hits)
+
+    def query_radius(self, lat, long, radius):
+        """Returns every segment entry within a great circle distance of a position.
+
+        :param lat: the 'Olex float' latitude of the centre
+        :type lat: float
+        :param long: the 'Olex float' longitude of the centre
+        :type long: float
+        :param radius: the radius in nautical miles
+        :type radius: float
+        :return: the segment number and entry index of each hit, as a numpy structured array of :data:`HIT_DTYPE`
+        :rtype: numpy.ndarray
+        """
+        # one minute of latitude is one nautical mile, a minute of longitude shrinks with the cosine of latitude
+        cos_lat = math.cos(math.radians(lat / 60))
+        long_radius = radius / cos_lat if cos_lat > 1e-9 else 180 * 60
+        min_lat, max_lat = lat - radius, lat + radius
+        min_long, max_long = long - long_radius, long + long_radius
+
+        hits = []
+        for seg_num in self.get_overlapping_segments(min_lat, min_long, max_lat, max_long):
+            records, candidates = self.get_candidates(seg_num, min_lat, min_long, max_lat, max_long)
+            distance = get_distances(lat, long, records["lat"][candidates], records["long"][candidates])
+            hits.append(self.make_hits(seg_num, candidates[distance <= radius]))
+        return self.join_hits(hits)
+
+    def query_segments(self, min_lat, min_long, max_lat, max_long):
+        """Returns the numbers of the segment files with at least one entry inside a bounding box.
+
+        :return: the segment numbers
+        :rtype: list
+        """
+        hits = self.query_bbox(min_lat, min_long, max_lat, max_long)
+        return [int(seg_num) for seg_num in np.unique(hits["seg_num"])]
+
+    def make_hits(self, seg_num, indexes):
+        """Internal method which builds the hits of a segment from the indexes of the matching entries.
+
+        :return: the hits, ordered by entry index
+        :rtype: numpy.ndarray
+        """
+        hits = np.empty(len(indexes), dtype=HIT_DTYPE)
+        hits["seg_num"] = seg_num
+        hits["index"] = np.sort(indexes)
+        return hits
+
+    def join_hits(self, hits):
+        """Internal method which joins the hits of several segments into a single array.
+
+        :return: the hits
+        :rtype: numpy.ndarray
+        """
+        if len(hits) == 0:
+            return np.empty(0, dtype=HIT_DTYPE)
+        return np.concatenate(hits)
+
+    def get_warnings(self):
+        """
+        If a shared Diagnostics sink was given, only the warnings it kept are returned.
+
+        :return: a list of warnings generated by the segment files the SpatialIndex opened
+        :rtype: list
+        """
+        return [diagnostic.message for diagnostic in self.diagnostics.get_diagnostics()
+                if diagnostic.file in self.opened_paths]
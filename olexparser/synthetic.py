@@ -0,0 +1,171 @@
+import os
+import sys
+import argparse
+import numpy as np
+from olexparser.segment_file import SEGMENT_DTYPE
+from olexparser.ruter_file import RUTER_HEADER
+
+#: The time of the first generated segment entry, as a Unix timestamp
+START_TIME = 1417854557
+
+#: The latitude and longitude of the first generated segment entry, as "Olex floats" (minutes of arc)
+START_POSITION = (2986.74, -3246.82)
+
+RUTE_TYPES = ("Strek", "Punkt")
+LINE_COLOURS = ("Svart", "Gul", "Hvit")
+ICON_NAMES = ("Brunsirkel", "Kryss", "Fisk", "Hvitsirkel")
+
+
+def generate_track(rng, count, start_time, start_position, interval=5):
+    """Generates the entries of a segment file along a random walk.
+
+    The vessel heading changes slowly and its speed varies between drifting and steaming, so the positions look
+    like a real track. The entries are one interval apart in time.
+
+    :param rng: the random number generator
+    :type rng: numpy.random.Generator
+    :param count: the number of entries
+    :type count: int
+    :param start_time: the Unix timestamp of the first entry
+    :type start_time: int
+    :param start_position: the latitude and longitude of the first entry, in minutes of arc
+    :type start_position: tuple
+    :param interval: the number of seconds between entries. Defaults to 5
+    :type interval: int
+    :return: a numpy structured array of :data:`SEGMENT_DTYPE<olexparser.segment_file.SEGMENT_DTYPE>`
+    :rtype: numpy.ndarray
+    """
+    heading = rng.uniform(0, 2 * np.pi) + np.cumsum(rng.normal(0, 0.05, count))
+    # speed in knots, i.e. minutes of latitude per hour
+    speed = np.clip(rng.normal(6, 3, count), 0, 12)
+    step = speed * interval / 3600
+    lat_steps = step * np.cos(heading)
+    lats = start_position[0] + np.cumsum(lat_steps) - lat_steps[0]
+    long_steps = step * np.sin(heading) / np.cos(np.radians(lats / 60))
+    longs = start_position[1] + np.cumsum(long_steps) - long_steps[0]
+
+    records = np.zeros(count, dtype=SEGMENT_DTYPE)
+    records["timestamp"] = start_time + interval * np.arange(count, dtype=np.uint32)
+    records["lat"] = lats
+    records["long"] = longs
+    records["unknown"] = np.frombuffer(rng.bytes(4 * count), dtype="V4")
+    return records
+
+
+def get_summary_line(seg_num, records):
+    """Returns the "Segment ..." line of the Turdata file describing the entries of a segment file.
+
+    :param seg_num: the segment number
+    :type seg_num: int
+    :param records: the entries of the segment file
+    :type records: numpy.ndarray
+    :return: the segment summary line
+    :rtype: str
+    """
+    if len(records) == 0:
+        return "Segment {} 0 0.00 0.00 0.00 0.00 0 0\n".format(seg_num)
+    return "Segment {} {} {:.2f} {:.2f} {:.2f} {:.2f} {} {}\n".format(
+        seg_num, len(records), float(records["lat"].min()), float(records["long"].min()),
+        float(records["lat"].max()), float(records["long"].max()), int(records["timestamp"].min()),
+        int(records["timestamp"].max()))
+
+
+def generate_archive(folder, trips=3, segments_per_trip=3, entries_per_segment=1000, rutes=10, points_per_rute=20,
+                     orphans=0, seed=0):
+    """Writes a synthetic Olex archive: segment files, a Turdata file summarising them, and a Ruter file.
+
+    The same arguments always produce the same files. Every segment is listed by exactly one Tur Tur, except the
+    orphans, which are written as segment files but not listed in the Turdata file. Segments follow on from each
+    other in time and position, in the order they are numbered.
+
+    :param folder: the folder the archive is written to. It is created if it does not exist
+    :type folder: str
+    :param trips: the number of Tur Turs. Defaults to 3
+    :type trips: int
+    :param segments_per_trip: the number of segment files of each Tur Tur. Defaults to 3
+    :type segments_per_trip: int
+    :param entries_per_segment: the number of entries of each segment file. Defaults to 1000
+    :type entries_per_segment: int
+    :param rutes: the number of Rutes in the Ruter file. Defaults to 10
+    :type rutes: int
+    :param points_per_rute: the number of Rute Data points of each Rute. Defaults to 20
+    :type points_per_rute: int
+    :param orphans: the number of segment files not listed by any Tur Tur. Defaults to 0
+    :type orphans: int
+    :param seed: the seed of the random number generator. Defaults to 0
+    :type seed: int
+    :return: a dictionary with the keys segments, entries, rute_points, segment_bytes, turdata_bytes and
+             ruter_bytes
+    :rtype: dict
+    """
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    time = START_TIME
+    position = START_POSITION
+
+    turdata = []
+    seg_num = 1
+    segments = trips * segments_per_trip + orphans
+    for i in range(segments):
+        records = generate_track(rng, entries_per_segment, time, position)
+        records.tofile(os.path.join(folder, "segment{}_A".format(seg_num)))
+        if i < trips * segments_per_trip:
+            if i % segments_per_trip == 0:
+                turdata.append("Tur Tur {}\n".format(i // segments_per_trip + 1))
+            turdata.append(get_summary_line(seg_num, records))
+            if i % segments_per_trip == segments_per_trip - 1:
+                turdata.append("\n")
+        if len(records) > 0:
+            time = int(records["timestamp"][-1]) + 5
+            position = (float(records["lat"][-1]), float(records["long"][-1]))
+        seg_num += 1
+    with open(os.path.join(folder, "Turdata"), 'w') as f:
+        f.write("".join(turdata))
+
+    ruter = [RUTER_HEADER, "\n"]
+    for i in range(rutes):
+        ruter.append("Rute {}\n".format("uten navn" if i % 2 == 0 else "Merke {}".format(i)))
+        ruter.append("Rutetype {}\n".format(RUTE_TYPES[i % len(RUTE_TYPES)]))
+        ruter.append("Linjefarge {}\n".format(LINE_COLOURS[i % len(LINE_COLOURS)]))
+        ruter.append("Plottsett {}\n".format(2 ** int(rng.integers(0, 10))))
+        lats = START_POSITION[0] + rng.uniform(-60, 60, points_per_rute)
+        longs = START_POSITION[1] + rng.uniform(-60, 60, points_per_rute)
+        times = START_TIME + np.sort(rng.integers(0, 365 * 86400, points_per_rute))
+        icons = rng.integers(0, len(ICON_NAMES), points_per_rute)
+        for lat, long, timestamp, icon in zip(lats.tolist(), longs.tolist(), times.tolist(), icons.tolist()):
+            ruter.append("{:.6f} {:.6f} {} {}\n".format(lat, long, timestamp, ICON_NAMES[icon]))
+        ruter.append("\n")
+    with open(os.path.join(folder, "Ruter"), 'w') as f:
+        f.write("".join(ruter))
+
+    return {"segments": segments, "entries": segments * entries_per_segment, "rute_points": rutes * points_per_rute,
+            "segment_bytes": segments * entries_per_segment * SEGMENT_DTYPE.itemsize,
+            "turdata_bytes": os.path.getsize(os.path.join(folder, "Turdata")),
+            "ruter_bytes": os.path.getsize(os.path.join(folder, "Ruter"))}
+
+
+def main(argv=None):
+    """Command line entry point to write a synthetic Olex archive."""
+    parser = argparse.ArgumentParser(description="Write a synthetic Olex archive.")
+    parser.add_argument("folder", help="the folder the archive is written to")
+    parser.add_argument("--trips", type=int, default=3, help="the number of Tur Turs (default: 3)")
+    parser.add_argument("--segments", type=int, default=3,
+                        help="the number of segment files of each Tur Tur (default: 3)")
+    parser.add_argument("--entries", type=int, default=1000,
+                        help="the number of entries of each segment file (default: 1000)")
+    parser.add_argument("--rutes", type=int, default=10, help="the number of Rutes (default: 10)")
+    parser.add_argument("--points", type=int, default=20, help="the number of points of each Rute (default: 20)")
+    parser.add_argument("--orphans", type=int, default=0,
+                        help="the number of segment files not listed by any Tur Tur (default: 0)")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the random number generator (default: 0)")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    sizes = generate_archive(args.folder, args.trips, args.segments, args.entries, args.rutes, args.points,
+                             args.orphans, args.seed)
+    print("Wrote {} segment files with {} entries, and {} Rute points to {}".format(
+        sizes["segments"], sizes["entries"], sizes["rute_points"], args.folder))
+    return
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+from collections import OrderedDict
+import numpy as np
+from olexparser.segment_file import SegmentFile, SEGMENT_DTYPE
+from olexparser.diagnostics import Diagnostics
+
+#: A numpy structured dtype describing a record returned by a query: the segment number and index of the entry
+#: in its segment file, followed by the fields of :data:`SEGMENT_DTYPE<olexparser.segment_file.SEGMENT_DTYPE>`.
+QUERY_DTYPE = np.dtype([("seg_num", "<u4"), ("index", "<u4")] + SEGMENT_DTYPE.descr)
+
+#: The default number of sorted segment files kept in memory between queries.
+MAX_SEGMENTS = 64
+
+
+class TimeIndex:
+    """
+    A Class representing a time index over the entries of every segment file of an Olex archive.
+
+    The index is seeded from the smallest and largest time of each
+    :class:`TurTurSegmentSummary<olexparser.turtur_segment_summary.TurTurSegmentSummary>`, so no segment file is
+    read when the index is created. A query only opens the segment files whose time range overlaps the query.
+    The first time a segment file is opened its timestamps are sorted, and the entries in the query window are
+    then found with a binary search. At most max_segments sorted segment files are kept for later queries, the
+    least recently used ones are dropped first.
+
+    Segment files without a summary are memory mapped when the index is created to find their time range.
+
+    The warnings of the segment files are reported to the Diagnostics sink the first time each file is opened, not
+    again when it is opened after being dropped.
+
+    :param segment_paths: a dictionary with key:value - segment number:full file path of the segment file
+    :type segment_paths: dict
+    :param summaries: the TurTurSegmentSummary objects of the archive
+    :type summaries: iterable
+    :param cache: an optional parse cache used when segment files are opened
+    :type cache: olexparser.parse_cache.ParseCache
+    :param max_segments: the maximum number of sorted segment files kept in memory. Defaults to MAX_SEGMENTS
+    :type max_segments: int
+    :param diagnostics: an optional sink the warnings of the segment files are reported to
+    :type diagnostics: olexparser.diagnostics.Diagnostics
+    """
+
+    def __init__(self, segment_paths, summaries, cache=None, max_segments=MAX_SEGMENTS, diagnostics=None):
+        """A constructor method for the TimeIndex class.
+
+        :param segment_paths: a dictionary with key:value - segment number:full file path of the segment file
+        :type segment_paths: dict
+        :param summaries: the TurTurSegmentSummary objects of the archive
+        :type summaries: iterable
+        :param cache: an optional parse cache used when segment files are opened. Defaults to None
+        :type cache: olexparser.parse_cache.ParseCache
+        :param max_segments: the maximum number of sorted segment files kept in memory. Defaults to MAX_SEGMENTS
+        :type max_segments: int
+        :param diagnostics: an optional sink the warnings are reported to. Defaults to None
+        :type diagnostics: olexparser.diagnostics.Diagnostics
+        """
+        self.segment_paths = {int(seg_num): path for seg_num, path in segment_paths.items()}
+        self.cache = cache
+        self.max_segments = max_segments
+        self.sorted_segments = OrderedDict()
+
+        self.diagnostics = diagnostics if diagnostics is not None else Diagnostics(None, None)
+        self.opened_paths = set()
+
+        ranges = {}
+        for summary in summaries:
+            seg_num = summary.get_seg_num()
+            if seg_num in self.segment_paths and seg_num not in ranges:
+                ranges[seg_num] = (summary.get_time_start_int(), summary.get_time_end_int())
+        for seg_num, path in self.segment_paths.items():
+            if seg_num not in ranges:
+                segment = self.open_segment(path, use_mmap=True)
+                timestamps = segment.get_timestamps()
+                if len(timestamps) > 0:
+                    ranges[seg_num] = (int(timestamps.min()), int(timestamps.max()))
+                segment.close()
+
+        seg_nums = np.array(list(ranges.keys()), dtype=np.int64)
+        starts = np.array([r[0] for r in ranges.values()], dtype=np.int64)
+        ends = np.array([r[1] for r in ranges.values()], dtype=np.int64)
+        order = np.argsort(starts, kind="stable")
+        self.seg_nums = seg_nums[order]
+        self.starts = starts[order]
+        self.ends = ends[order]
+        return
+
+    def __len__(self):
+        """
+        :return: the number of segment files in the index
+        :rtype: int
+        """
+        return len(self.seg_nums)
+
+    def get_overlapping_segments(self, start, end):
+        """Returns the numbers of the segment files whose time range overlaps a time window.
+
+        :param start: the Unix timestamp at the start of the window (inclusive)
+        :type start: int
+        :param end: the Unix timestamp at the end of the window (inclusive)
+        :type end: int
+        :return: the segment numbers, ordered by the start time of the segment
+        :rtype: list
+        """
+        candidates = np.searchsorted(self.starts, end, side="right")
+        overlapping = self.ends[:candidates] >= start
+        return [int(seg_num) for seg_num in self.seg_nums[:candidates][overlapping]]
+
+    def open_segment(self, path, use_mmap=False):
+        """Internal method which opens a segment file, reporting its warnings only the first time it is opened.
+
+        :param path: the full file path of the segment file
+        :type path: str
+        :param use_mmap: memory map the file instead of using the parse cache. Defaults to False
+        :type use_mmap: bool
+        :return: the segment file
+        :rtype: SegmentFile
+        """
+        diagnostics = self.diagnostics if path not in self.opened_paths else Diagnostics(0, 0)
+        self.opened_paths.add(path)
+        if use_mmap:
+            return SegmentFile(path, use_mmap=True, diagnostics=diagnostics)
+        return SegmentFile(path, cache=self.cache, diagnostics=diagnostics)
+
+    def get_sorted_segment(self, seg_num):
+        """Internal method which opens a segment file and sorts its entries by time, unless it is still kept from
+        an earlier query.
+
+        :param seg_num: the segment number
+        :type seg_num: int
+        :return: the decoded entries, and the indexes which sort them by time
+        :rtype: tuple
+        """
+        if seg_num not in self.sorted_segments:
+            segment = self.open_segment(self.segment_paths[seg_num])
+            records = segment.get_records()
+            order = np.argsort(records["timestamp"], kind="stable")
+            self.sorted_segments[seg_num] = (records, order, records["timestamp"][order])
+            while len(self.sorted_segments) > max(self.max_segments, 1):
+                self.sorted_segments.popitem(last=False)
+        self.sorted_segments.move_to_end(seg_num)
+        records, order, sorted_timestamps = self.sorted_segments[seg_num]
+        return records, order, sorted_timestamps
+
+    def query(self, start, end):
+        """Returns every segment entry with a timestamp inside a time window.
+
+        :param start: the Unix timestamp at the start of the window (inclusive)
+        :type start: int
+        :param end: the Unix timestamp at the end of the window (inclusive)
+        :type end: int
+        :return: the matching entries ordered by time, as a numpy structured array of :data:`QUERY_DTYPE`
+        :rtype: numpy.ndarray
+        """
+        results = []
+        for seg_num in self.get_overlapping_segments(start, end):
+            records, order, sorted_timestamps = self.get_sorted_segment(seg_num)
+            first = np.searchsorted(sorted_timestamps, start, side="left")
+            last = np.searchsorted(sorted_timestamps, end, side="right")
+            indexes = order[first:last]
+            result = np.empty(len(indexes), dtype=QUERY_DTYPE)
+            result["seg_num"] = seg_num
+            result["index"] = indexes
+            for name in SEGMENT_DTYPE.names:
+                result[name] = records[name][indexes]
+            results.append(result)
+
+        if len(results) == 0:
+            return np.empty(0, dtype=QUERY_DTYPE)
+        result = np.concatenate(results)
+        return result[np.argsort(result["timestamp"], kind="stable")]
+
+    def get_warnings(self):
+        """
+        If a shared Diagnostics sink was given, only the warnings it kept are returned.
+
+        :return: a list of warnings generated by the segment files the TimeIndex opened
+        :rtype: list
+        """
+        return [diagnostic.message for diagnostic in self.diagnostics.get_diagnostics()
+                if diagnostic.file in self.opened_paths]
@@ -0,0 +1,373 @@
+import numpy as np
+from olexparser.segment_file import SegmentFile
+from olexparser.geo import get_distances, get_step_distances
+
+#: Steps slower than this speed, in knots, are counted as stationary time.
+STATIONARY_SPEED = 0.5
+
+#: Steps longer than this, in seconds, are counted as gap time instead of underway or stationary time, and their
+#: distance is not added to the total.
+MAX_STEP_GAP = 600
+
+#: Steps with an implied speed above this, in knots, are position jumps. No fishing vessel moves this fast, so
+#: a faster step is a bad position fix or an edited entry.
+MAX_SPEED = 40
+
+#: The edges, in knots, of the bins of the speed distribution. The last bin holds every faster step.
+SPEED_BINS = np.array([0, 0.5, 1, 2, 3, 4, 5, 6, 8, 10, 12, 15, 20, 30, np.inf])
+
+
+class TripStats:
+    """
+    A Class representing statistics of a track: its distance, speeds, duration and bounding box.
+
+    The statistics are computed from the decoded entries of segment files with :func:`get_segment_stats`, one
+    vectorised pass per segment file, without creating a
+    :class:`SegmentEntry<olexparser.segment_entry.SegmentEntry>` per entry.
+
+    The track is divided into steps between consecutive entries. A step longer than max_gap seconds is counted as
+    gap time, and its distance is not added. A step faster than speed_limit knots is a position jump, e.g. a bad
+    position fix, and is also counted as gap time without its distance. The other steps are counted as stationary
+    time if slower than stationary_speed knots, or as underway time. Steps whose time does not increase are ignored.
+
+    Statistics are aggregated with :meth:`add`. Adding the statistics of the next segment file of the same track
+    also counts the step between the two files. Statistics can be stored with :meth:`to_dict` and restored with
+    :meth:`from_dict`.
+
+    :param stationary_speed: the speed in knots below which a step is stationary. Defaults to
+                             :data:`STATIONARY_SPEED`
+    :type stationary_speed: float
+    :param max_gap: the longest step in seconds which is not a gap. Defaults to :data:`MAX_STEP_GAP`
+    :type max_gap: int
+    :param speed_limit: the highest speed in knots which is not a position jump. Defaults to :data:`MAX_SPEED`
+    :type speed_limit: float
+    """
+
+    def __init__(self, stationary_speed=STATIONARY_SPEED, max_gap=MAX_STEP_GAP, speed_limit=MAX_SPEED):
+        """A constructor method for the TripStats class.
+
+        :param stationary_speed: the speed in knots below which a step is stationary. Defaults to
+                                 STATIONARY_SPEED
+        :type stationary_speed: float
+        :param max_gap: the longest step in seconds which is not a gap. Defaults to MAX_STEP_GAP
+        :type max_gap: int
+        :param speed_limit: the highest speed in knots which is not a position jump. Defaults to MAX_SPEED
+        :type speed_limit: float
+        """
+        self.stationary_speed = stationary_speed
+        self.max_gap = max_gap
+        self.speed_limit = speed_limit
+
+        self.points = 0
+        self.distance = 0.0
+        self.underway_time = 0
+        self.stationary_time = 0
+        self.gap_time = 0
+        self.max_speed = 0.0
+        self.speed_times = np.zeros(len(SPEED_BINS) - 1, dtype=np.int64)
+
+        self.time_start = None
+        self.time_end = None
+        self.min_lat = None
+        self.min_long = None
+        self.max_lat = None
+        self.max_long = None
+
+        # the first and last entries, used to join the statistics of consecutive segment files
+        self.first = None
+        self.last = None
+        return
+
+    def add_records(self, records):
+        """Internal method which adds the steps between the entries of a segment file to the statistics.
+
+        :param records: the entries of the segment file, as a numpy structured array of
+                        :data:`SEGMENT_DTYPE<olexparser.segment_file.SEGMENT_DTYPE>`
+        :type records: numpy.ndarray
+        """
+        if len(records) == 0:
+            return
+        timestamps = records["timestamp"].astype(np.int64)
+        lats = records["lat"]
+        longs = records["long"]
+
+        self.points += len(records)
+        self.time_start = int(timestamps.min()) if self.time_start is None else min(self.time_start,
+                                                                                      int(timestamps.min()))
+        self.time_end = int(timestamps.max()) if self.time_end is None else max(self.time_end,
+                                                                                int(timestamps.max()))
+        self.min_lat = float(lats.min()) if self.min_lat is None else min(self.min_lat, float(lats.min()))
+        self.min_long = float(longs.min()) if self.min_long is None else min(self.min_long, float(longs.min()))
+        self.max_lat = float(lats.max()) if self.max_lat is None else max(self.max_lat, float(lats.max()))
+        self.max_long = float(longs.max()) if self.max_long is None else max(self.max_long, float(longs.max()))
+        if self.first is None:
+            self.first = (int(timestamps[0]), float(lats[0]), float(longs[0]))
+        self.last = (int(timestamps[-1]), float(lats[-1]), float(longs[-1]))
+
+        self.add_steps(np.diff(timestamps), get_step_distances(lats, longs))
+        return
+
+    def add_steps(self, durations, distances):
+        """Internal method which adds steps to the distance, times and speed distribution. Gaps and position
+        jumps only add to the gap time.
+
+        :param durations: the duration of each step in seconds
+        :type durations: numpy.ndarray
+        :param distances: the distance of each step in nautical miles
+        :type distances: numpy.ndarray
+        """
+        forward = durations > 0
+        durations = durations[forward]
+        distances = distances[forward]
+        speeds = distances / (durations / 3600)
+        gaps = (durations > self.max_gap) | (speeds > self.speed_limit)
+        self.gap_time += int(durations[gaps].sum())
+
+        durations = durations[~gaps]
+        distances = distances[~gaps]
+        speeds = speeds[~gaps]
+        if len(durations) == 0:
+            return
+        stationary = speeds < self.stationary_speed
+        self.distance += float(distances.sum())
+        self.stationary_time += int(durations[stationary].sum())
+        self.underway_time += int(durations[~stationary].sum())
+        self.max_speed = max(self.max_speed, float(speeds.max()))
+        bins = np.searchsorted(SPEED_BINS, speeds, side="right") - 1
+        self.speed_times += np.bincount(bins, weights=durations, minlength=len(self.speed_times)).astype(np.int64)
+        return
+
+    def add(self, other, connect=False):
+        """Adds the statistics of another track to these statistics.
+
+        :param other: the statistics to add
+        :type other: TripStats
+        :param connect: the other track continues this track, e.g. it is the next segment file of the same
+                        Tur Tur, so the step from the last entry of this track to the first entry of the other is
+                        also counted. Defaults to False
+        :type connect: bool
+        """
+        if other.points == 0:
+            return
+        if connect and self.last is not None:
+            self.add_steps(np.array([other.first[0] - self.last[0]]),
+                           get_distances([self.last[1]], [self.last[2]], [other.first[1]], [other.first[2]]))
+
+        self.points += other.points
+        self.distance += other.distance
+        self.underway_time += other.underway_time
+        self.stationary_time += other.stationary_time
+        self.gap_time += other.gap_time
+        self.max_speed = max(self.max_speed, other.max_speed)
+        self.speed_times += other.speed_times
+        if self.time_start is None:
+            self.time_start, self.time_end = other.time_start, other.time_end
+            self.min_lat, self.min_long = other.min_lat, other.min_long
+            self.max_lat, self.max_long = other.max_lat, other.max_long
+            self.first = other.first
+        else:
+            self.time_start = min(self.time_start, other.time_start)
+            self.time_end = max(self.time_end, other.time_end)
+            self.min_lat = min(self.min_lat, other.min_lat)
+            self.min_long = min(self.min_long, other.min_long)
+            self.max_lat = max(self.max_lat, other.max_lat)
+            self.max_long = max(self.max_long, other.max_long)
+        self.last = other.last
+        return
+
+    def get_duration(self):
+        """
+        :return: the number of seconds from the first to the last entry, or 0 if there are no entries
+        :rtype: int
+        """
+        if self.time_start is None:
+            return 0
+        return self.time_end - self.time_start
+
+    def get_mean_speed(self):
+        """
+        :return: the mean speed in knots over the underway and stationary time, or 0.0 if there is none
+        :rtype: float
+        """
+        moving_time = self.underway_time + self.stationary_time
+        if moving_time == 0:
+            return 0.0
+        return self.distance / (moving_time / 3600)
+
+    def get_bounding_box(self):
+        """
+        :return: the smallest latitude, smallest longitude, largest latitude and largest longitude as
+                 'Olex floats', or None if there are no entries
+        :rtype: tuple, None
+        """
+        if self.min_lat is None:
+            return None
+        return self.min_lat, self.min_long, self.max_lat, self.max_long
+
+    def get_speed_distribution(self):
+        """
+        :return: the edges of the speed bins in knots, and the number of seconds spent in each bin
+        :rtype: tuple
+        """
+        return SPEED_BINS.copy(), self.speed_times.copy()
+
+    def to_dict(self):
+        """
+        :return: the statistics, as a dictionary which can be serialised to JSON
+        :rtype: dict
+        """
+        return {"stationary_speed": self.stationary_speed, "max_gap": self.max_gap, "speed_limit": self.speed_limit,
+                "points": self.points,
+                "distance": self.distance, "duration": self.get_duration(), "underway_time": self.underway_time,
+                "stationary_time": self.stationary_time, "gap_time": self.gap_time, "max_speed": self.max_speed,
+                "speed_times": self.speed_times.tolist(), "time_start": self.time_start, "time_end": self.time_end,
+                "bounding_box": self.get_bounding_box(), "first": self.first, "last": self.last}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Creates TripStats from a dictionary returned by :meth:`to_dict`.
+
+        :param data: the statistics
+        :type data: dict
+        :return: the statistics
+        :rtype: TripStats
+        """
+        stats = cls(data["stationary_speed"], data["max_gap"], data["speed_limit"])
+        stats.points = data["points"]
+        stats.distance = data["distance"]
+        stats.underway_time = data["underway_time"]
+        stats.stationary_time = data["stationary_time"]
+        stats.gap_time = data["gap_time"]
+        stats.max_speed = data["max_speed"]
+        stats.speed_times = np.array(data["speed_times"], dtype=np.int64)
+        stats.time_start = data["time_start"]
+        stats.time_end = data["time_end"]
+        if data["bounding_box"] is not None:
+            stats.min_lat, stats.min_long, stats.max_lat, stats.max_long = data["bounding_box"]
+        stats.first = None if data["first"] is None else tuple(data["first"])
+        stats.last = None if data["last"] is None else tuple(data["last"])
+        return stats
+
+    def __str__(self):
+        """
+        :return: a description of the statistics
+        :rtype: str
+        """
+        s = "\nPoints: {}".format(self.points)
+        s = s + "\nDistance: {:.2f} nm".format(self.distance)
+        s = s + "\nDuration: {} s".format(self.get_duration())
+        s = s + "\nUnderway: {} s, stationary: {} s, gaps: {} s".format(self.underway_time, self.stationary_time,
+                                                                        self.gap_time)
+        s = s + "\nMean speed: {:.2f} kn, max speed: {:.2f} kn".format(self.get_mean_speed(), self.max_speed)
+        s = s + "\nBounding box: {}".format(self.get_bounding_box())
+        return s
+
+
+def get_stats_cache_kind(stationary_speed=STATIONARY_SPEED, max_gap=MAX_STEP_GAP, speed_limit=MAX_SPEED):
+    """
+    :param stationary_speed: the speed in knots below which a step is stationary. Defaults to STATIONARY_SPEED
+    :type stationary_speed: float
+    :param max_gap: the longest step in seconds which is not a gap. Defaults to MAX_STEP_GAP
+    :type max_gap: int
+    :param speed_limit: the highest speed in knots which is not a position jump. Defaults to MAX_SPEED
+    :type speed_limit: float
+    :return: the kind of parse cache entry the statistics of a segment file are stored as, see
+             :meth:`ParseCache.store<olexparser.parse_cache.ParseCache.store>`
+    :rtype: str
+    """
+    return "stats_{}_{}_{}".format(stationary_speed, max_gap, speed_limit)
+
+
+def get_segment_stats(file_path, stationary_speed=STATIONARY_SPEED, max_gap=MAX_STEP_GAP, speed_limit=MAX_SPEED,
+                      cache=None, diagnostics=None):
+    """Computes the statistics of a segment file.
+
+    The segment file is memory mapped. If a cache is given, the statistics are loaded from it while the segment
+    file is unchanged, and stored in it otherwise, unless the segment file reported a warning.
+
+    :param file_path: the full file path of the segment file
+    :type file_path: str
+    :param stationary_speed: the speed in knots below which a step is stationary. Defaults to STATIONARY_SPEED
+    :type stationary_speed: float
+    :param max_gap: the longest step in seconds which is not a gap. Defaults to MAX_STEP_GAP
+    :type max_gap: int
+    :param speed_limit: the highest speed in knots which is not a position jump. Defaults to MAX_SPEED
+    :type speed_limit: float
+    :param cache: an optional parse cache. Defaults to None
+    :type cache: olexparser.parse_cache.ParseCache
+    :param diagnostics: an optional sink the warnings of the segment file are reported to. Defaults to None
+    :type diagnostics: olexparser.diagnostics.Diagnostics
+    :return: the statistics of the segment file
+    :rtype: TripStats
+    """
+    cache_kind = get_stats_cache_kind(stationary_speed, max_gap, speed_limit)
+    if cache is not None:
+        cached = cache.load(file_path, cache_kind)
+        if cached is not None:
+            return TripStats.from_dict(cached)
+
+    stats = TripStats(stationary_speed, max_gap, speed_limit)
+    segment = SegmentFile(file_path, use_mmap=True, diagnostics=diagnostics)
+    stats.add_records(segment.get_records())
+    segment.close()
+    if cache is not None and segment.warning_count == 0:
+        cache.store(file_path, cache_kind, stats.to_dict())
+    return stats
+
+
+def get_turtur_stats(turtur, segment_paths, stationary_speed=STATIONARY_SPEED, max_gap=MAX_STEP_GAP,
+                     speed_limit=MAX_SPEED, cache=None, diagnostics=None):
+    """Computes the statistics of a Tur Tur, joining its segment files in the order of their summaries.
+
+    Summaries whose segment file was not found are skipped.
+
+    :param turtur: the Tur Tur
+    :type turtur: olexparser.turtur.TurTur
+    :param segment_paths: a dictionary with key:value - segment number:full file path of the segment file
+    :type segment_paths: dict
+    :param stationary_speed: the speed in knots below which a step is stationary. Defaults to STATIONARY_SPEED
+    :type stationary_speed: float
+    :param max_gap: the longest step in seconds which is not a gap. Defaults to MAX_STEP_GAP
+    :type max_gap: int
+    :param speed_limit: the highest speed in knots which is not a position jump. Defaults to MAX_SPEED
+    :type speed_limit: float
+    :param cache: an optional parse cache. Defaults to None
+    :type cache: olexparser.parse_cache.ParseCache
+    :param diagnostics: an optional sink the warnings of the segment files are reported to. Defaults to None
+    :type diagnostics: olexparser.diagnostics.Diagnostics
+    :return: the statistics of the Tur Tur
+    :rtype: TripStats
+    """
+    segment_paths = {int(seg_num): path for seg_num, path in segment_paths.items()}
+    stats = TripStats(stationary_speed, max_gap, speed_limit)
+    for summary in turtur.get_segment_summaries():
+        if summary.get_seg_num() in segment_paths:
+            stats.add(get_segment_stats(segment_paths[summary.get_seg_num()], stationary_speed, max_gap,
+                                        speed_limit, cache, diagnostics), connect=True)
+    return stats
+
+
+def get_turdata_stats(turdata, segment_paths, stationary_speed=STATIONARY_SPEED, max_gap=MAX_STEP_GAP,
+                      speed_limit=MAX_SPEED, cache=None, diagnostics=None):
+    """Computes the statistics of every Tur Tur of a Turdata file.
+
+    :param turdata: the Turdata file
+    :type turdata: olexparser.turdata_file.TurDataFile
+    :param segment_paths: a dictionary with key:value - segment number:full file path of the segment file
+    :type segment_paths: dict
+    :param stationary_speed: the speed in knots below which a step is stationary. Defaults to STATIONARY_SPEED
+    :type stationary_speed: float
+    :param max_gap: the longest step in seconds which is not a gap. Defaults to MAX_STEP_GAP
+    :type max_gap: int
+    :param speed_limit: the highest speed in knots which is not a position jump. Defaults to MAX_SPEED
+    :type speed_limit: float
+    :param cache: an optional parse cache. Defaults to None
+    :type cache: olexparser.parse_cache.ParseCache
+    :param diagnostics: an optional sink the warnings of the segment files are reported to. Defaults to None
+    :type diagnostics: olexparser.diagnostics.Diagnostics
+    :return: a dictionary with key:value - Tur Tur number:TripStats
+    :rtype: dict
+    """
+    return {tur_num: get_turtur_stats(turdata.get_turtur(tur_num), segment_paths, stationary_speed, max_gap,
+                                      speed_limit, cache, diagnostics)
+            for tur_num in turdata.get_tur_numbers()}
@@ -1,10 +1,17 @@
 import re
+import mmap
 from olexparser.turtur_segment_summary import TurTurSegmentSummary
 from olexparser.turtur import TurTur
+from olexparser.diagnostics import WarningReporter
+
+# Regular expressions used to identify Tur Turs and their segment summaries, one line at a time
+TUR_TUR_RE = re.compile(rb'Tur Tur (\d+)')
+TUR_TUR_LINE_RE = re.compile(rb'^Tur Tur (\d+)', re.MULTILINE)
+TUR_SEGMENT_SUMMARY_RE = re.compile(rb'\s*Segment (\d*) (\d*) ([-\d.]*) ([-\d.]*) ([-\d.]*) ([-\d.]*) (\d*) (\d*)')
 
 
 # noinspection GrazieInspection
-class TurDataFile:
+class TurDataFile(WarningReporter):
     """
     A Class used to represent a Turdata file.
 
@@ -14,24 +21,60 @@ class TurDataFile:
 
     :param full_path: The full path and filename for the Turdata file
     :type full_path: str
+    :param cache: an optional cache the parsed Tur Turs are loaded from and stored in
+    :type cache: olexparser.parse_cache.ParseCache
+    :param lazy: only index the byte offsets of the Tur Turs, and parse each Tur Tur the first time it is
+                 retrieved with :meth:`get_turtur`
+    :type lazy: bool
+    :param diagnostics: an optional sink the warnings are reported to, shared with other files. Each
+                        :class:`TurTur<olexparser.turtur.TurTur>` reports its warnings to the same sink
+    :type diagnostics: olexparser.diagnostics.Diagnostics
     """
 
-    def __init__(self, full_path):
+    def __init__(self, full_path, cache=None, lazy=False, diagnostics=None):
         """A constructor method for the TurDataFile
 
         :param full_path: the full path and filename for the Turdata file
         :type full_path: str
+        :param cache: an optional cache the parsed Tur Turs are loaded from and stored in. Defaults to None
+        :type cache: olexparser.parse_cache.ParseCache
+        :param lazy: only index the Tur Turs, parsing each one when first retrieved. Defaults to False
+        :type lazy: bool
+        :param diagnostics: an optional sink the warnings are reported to. Defaults to None
+        :type diagnostics: olexparser.diagnostics.Diagnostics
         """
 
         self.full_path = full_path
         self.tur_turs = {}
-
-        self.warnings = []
-
-        # Parse the Turdata file
-        self.read_tur_data_file()
+        self.tur_offsets = {}
+        self.lazy = lazy
+
+        self.set_diagnostics(diagnostics)
+
+        # Parse the Turdata file, unless it is still valid in the cache
+        cached = None
+        if cache is not None:
+            cached = cache.load(full_path, "turdata")
+        self.cached = cached is not None
+        if cached is not None:
+            self.tur_turs, self.tur_offsets = cached
+            for tur_num, turtur in self.tur_turs.items():
+                turtur.set_turdata_file(self.diagnostics, self.full_path, self.tur_offsets.get(tur_num))
+        elif lazy:
+            self.index_tur_data_file()
+        else:
+            self.read_tur_data_file()
+            if cache is not None and self.warning_count == 0:
+                cache.store(full_path, "turdata", (self.tur_turs, self.tur_offsets))
         return
 
+    def is_cached(self):
+        """
+        :return: True if the Tur Turs were loaded from the parse cache instead of reading the file, False otherwise
+        :rtype: bool
+        """
+        return self.cached
+
     def get_full_path(self):
         """Returns the full path of the TurData file
 
@@ -43,64 +86,169 @@ class TurDataFile:
     def get_tur_numbers(self):
         """Returns the keys from the dictionary of Tur Turs
 
+        In lazy mode the numbers are taken from the index, without parsing any Tur Turs.
+
         :return: the keys from the dictionary of Tur Turs
         :rtype: dict_keys
         """
+        if self.lazy:
+            return self.tur_offsets.keys()
         return self.tur_turs.keys()
 
-    def read_tur_data_file(self):
-        """Reads the Turdata file and identifies individual Tur Turs (Trips).
+    def index_tur_data_file(self):
+        """Internal method which records the byte offsets of each Tur Tur without parsing their segment summaries.
 
-        The entire file is read and regular expressions are used to identify Tur Turs in the file.
-        A TurTur object is created for each Tur Tur. It contains the Tur Tur number and a list of segment summaries.
-        The TurTur object added to the dict tur_turs with it's Tur Tur number as the key.
+        The file is memory mapped and only the "Tur Tur N" lines are searched for. Each Tur Tur ends where the
+        next one starts, or at the end of the file.
         """
+        try:
+            with open(self.full_path, 'rb') as f:
+                if f.seek(0, 2) == 0:
+                    return
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception as error:
+            self.add_warning(error, "turdata-read")
+            return
+
+        with data:
+            matches = [(int(match.group(1)), match.start()) for match in TUR_TUR_LINE_RE.finditer(data)]
+            for i, (tur_num, start) in enumerate(matches):
+                end = matches[i + 1][1] if i + 1 < len(matches) else len(data)
+                self.tur_offsets[tur_num] = (start, end)
+        return
 
-        # Regular expressions used to identify process Tur Turs
-        tur_tur_re = r'Tur Tur[^T]*'
-        tur_num_re = r'Tur Tur \d*'
-        tur_segment_summary_re = r'Segment (\d*) (\d*) ([-\d.]*) ([-\d.]*) ([-\d.]*) ([-\d.]*) (\d*) (\d*)'
+    def read_turtur(self, tur_num):
+        """Internal method which parses a single Tur Tur using the byte offsets recorded by
+        :meth:`index_tur_data_file`.
 
-        # Read the Turdata file
+        :param tur_num: the Tur Tur number
+        :type tur_num: int
+        """
+        start, end = self.tur_offsets[tur_num]
         try:
-            with open(self.full_path, 'r') as f:
-                tur_file = f.read()
+            with open(self.full_path, 'rb') as f:
+                f.seek(start)
+                data = f.read(end - start)
         except Exception as error:
-            self.warnings.append(error)
+            self.add_warning(error, "turdata-read", start)
+            self.tur_turs[tur_num] = TurTur(tur_num, [], self.diagnostics, self.full_path, (start, end))
             return
 
-        # Find all Tur Turs
-        tur_matches = re.findall(tur_tur_re, tur_file, re.DOTALL)
+        tur_segment_summaries = []
+        offset = start
+        for line in data.splitlines(keepends=True):
+            segment_summary = self.parse_segment_summary(line, offset)
+            if segment_summary is not None:
+                tur_segment_summaries.append(segment_summary)
+            offset += len(line)
+        self.tur_turs[tur_num] = TurTur(tur_num, tur_segment_summaries, self.diagnostics, self.full_path,
+                                        (start, end))
+        return
+
+    def read_tur_data_file(self, start_offset=0):
+        """Reads the Turdata file and identifies individual Tur Turs (Trips).
 
-        # Create a TurTur object for each identified Tur Tur
-        for i in tur_matches:
+        The file is read line by line in a single pass. A "Tur Tur N" line starts a new Tur Tur, and every
+        "Segment ..." line up to the next Tur Tur is parsed as one of its segment summaries.
+        A TurTur object is created for each Tur Tur. It contains the Tur Tur number and a list of segment summaries.
+        The TurTur object added to the dict tur_turs with it's Tur Tur number as the key, and the byte offsets of
+        the Tur Tur in the file are added to the dict tur_offsets.
 
-            # Determine the Tur Tur Number
-            tur_num = int(re.match(tur_num_re, i).group().strip("Tur Tur "))
+        The file is not loaded whole, only the segment summaries of the Tur Tur being read are collected at a time.
+        Every parsed Tur Tur is kept in tur_turs, and parsing can be resumed from the byte offset of any Tur Tur.
 
-            # Identify all the Segments in the Tur Tur
-            segment_summaries = re.findall(tur_segment_summary_re, i)
+        :param start_offset: the byte offset to start reading from. Defaults to 0
+        :type start_offset: int
+        """
+
+        try:
+            f = open(self.full_path, 'rb')
+        except Exception as error:
+            self.add_warning(error, "turdata-read")
+            return
 
-            # Create a TurTurSegmentSummary for each identified segment summary
+        with f:
+            f.seek(start_offset)
+            offset = start_offset
+            tur_num = None
+            tur_start = offset
             tur_segment_summaries = []
-            for summary in segment_summaries:
-                seg_num = int(summary[0])
-                num_entries = int(summary[1])
-                smallest_lat = float(summary[2])
-                smallest_long = float(summary[3])
-                largest_lat = float(summary[4])
-                largest_long = float(summary[5])
-                smallest_time = int(summary[6])
-                largest_time = int(summary[7])
-                segment_summary = TurTurSegmentSummary(seg_num, num_entries, smallest_lat, smallest_long, largest_lat,
-                                                       largest_long, smallest_time, largest_time)
-                tur_segment_summaries.append(segment_summary)
+            for line in f:
+                match = TUR_TUR_RE.match(line)
+                if match is not None:
+                    if tur_num is not None:
+                        self.add_turtur(tur_num, tur_segment_summaries, tur_start, offset)
+                    tur_num = int(match.group(1))
+                    tur_start = offset
+                    tur_segment_summaries = []
+                elif tur_num is not None:
+                    segment_summary = self.parse_segment_summary(line, offset)
+                    if segment_summary is not None:
+                        tur_segment_summaries.append(segment_summary)
+                offset += len(line)
+            if tur_num is not None:
+                self.add_turtur(tur_num, tur_segment_summaries, tur_start, offset)
+
+        return
 
-            # add the TurTur to the tur_turs dict
-            self.tur_turs[tur_num] = TurTur(tur_num, tur_segment_summaries)
+    def parse_segment_summary(self, line, offset):
+        """Internal method which parses a "Segment ..." line of the Turdata file.
 
+        :param line: a line of the Turdata file
+        :type line: bytes
+        :param offset: the byte offset of the line, used in warnings
+        :type offset: int
+        :return: the segment summary, or None if the line is not a segment summary
+        :rtype: TurTurSegmentSummary, None
+        """
+        match = TUR_SEGMENT_SUMMARY_RE.match(line)
+        if match is None:
+            return None
+        try:
+            summary = match.groups()
+            seg_num = int(summary[0])
+            num_entries = int(summary[1])
+            smallest_lat = float(summary[2])
+            smallest_long = float(summary[3])
+            largest_lat = float(summary[4])
+            largest_long = float(summary[5])
+            smallest_time = int(summary[6])
+            largest_time = int(summary[7])
+        except ValueError:
+            warn = "Warning, invalid Segment summary at offset {} of Turdata file {}".format(offset, self.full_path)
+            self.add_warning(warn, "turdata-summary", offset)
+            return None
+        summary = TurTurSegmentSummary(seg_num, num_entries, smallest_lat, smallest_long, largest_lat, largest_long,
+                                       smallest_time, largest_time)
+        for warn in summary.get_warnings():
+            self.add_warning(warn, "turdata-summary", offset)
+        return summary
+
+    def add_turtur(self, tur_num, tur_segment_summaries, start, end):
+        """Internal method which adds a parsed Tur Tur and records its byte offsets.
+
+        :param tur_num: the Tur Tur number
+        :type tur_num: int
+        :param tur_segment_summaries: the segment summaries of the Tur Tur
+        :type tur_segment_summaries: list
+        :param start: the byte offset of the "Tur Tur" line
+        :type start: int
+        :param end: the byte offset following the last line of the Tur Tur
+        :type end: int
+        """
+        self.tur_turs[tur_num] = TurTur(tur_num, tur_segment_summaries, self.diagnostics, self.full_path,
+                                        (start, end))
+        self.tur_offsets[tur_num] = (start, end)
         return
 
+    def get_tur_offsets(self):
+        """Returns the byte offsets of each Tur Tur in the Turdata file.
+
+        :return: a dictionary with key:value - Tur Tur number:(start offset, end offset)
+        :rtype: dict
+        """
+        return self.tur_offsets
+
     def get_turtur(self, number):
         """Returns the TurTur object identified by the Tur Tur number
 
@@ -110,6 +258,8 @@ class TurDataFile:
         :rtype: olexparser.turtur.TurTur
         """
 
+        if self.lazy and number not in self.tur_turs:
+            self.read_turtur(number)
         return self.tur_turs[number]
 
     def __str__(self):
@@ -121,9 +271,9 @@ class TurDataFile:
 
         s = "\nTurdata filepath: {}".format(self.full_path)
 
-        if len(self.tur_turs.keys()) > 0:
-            for i in self.tur_turs.keys():
-                s = s + self.tur_turs[i].__str__()
+        if len(self.get_tur_numbers()) > 0:
+            for i in self.get_tur_numbers():
+                s = s + self.get_turtur(i).__str__()
         else:
             s = s + "\nNo Tur Turs found in the this Turdata file."
         return s
@@ -133,21 +283,11 @@ class TurDataFile:
         print()
         print("**********")
         print("Turdata filepath: {}".format(self.full_path))
-        if len(self.tur_turs.keys()) > 0:
-            for i in self.tur_turs.keys():
-                self.tur_turs[i].print_turtur()
+        if len(self.get_tur_numbers()) > 0:
+            for i in self.get_tur_numbers():
+                self.get_turtur(i).print_turtur()
         else:
             print("No Tur Turs found in the this Turdata file.")
         print("**********")
         print()
         return
-
-    def get_warnings(self):
-        """
-        :return: a list of warnings generated by the TurDataFile, and it's child objects
-        :rtype: list
-        """
-        warn = self.warnings.copy()
-        for turtur in self.tur_turs.values():
-            warn.extend(turtur.get_warnings())
-        return warn
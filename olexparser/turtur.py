@@ -1,8 +1,10 @@
-from olexparser.segment_file import SegmentFile
+import os
+from olexparser.segment_file import SegmentFile, SEGMENT_ENTRY_SIZE
+from olexparser.diagnostics import WarningReporter
 
 
 # noinspection GrazieInspection
-class TurTur:
+class TurTur(WarningReporter):
     """
     A Class used to represent a Tur Tur (trip) from the Turdata file.
 
@@ -21,26 +23,86 @@ class TurTur:
     :type tur_num: int
     :param tur_segment_summaries: A list of TurTurSegmentSummaries.
     :type tur_segment_summaries: list
-
-    .. todo:: check that min/max values in summary match min/max in segment file
+    :param diagnostics: an optional sink the warnings are reported to, usually the one of the Turdata file
+    :type diagnostics: olexparser.diagnostics.Diagnostics
+    :param full_path: the full path of the Turdata file the Tur Tur was parsed from, if any
+    :type full_path: str, None
+    :param offsets: the (start, end) byte offsets of the Tur Tur in the Turdata file, if known. Warnings are
+                    reported at the start offset
+    :type offsets: tuple, None
+
+    The Diagnostics sink and the parse cache are not pickled, see :meth:`set_turdata_file`.
+
+    See :func:`olexparser.verify.verify_turdata` to check that the min/max values in the summaries match the
+    segment files.
     """
-    def __init__(self, tur_num, tur_segment_summaries):
+    def __init__(self, tur_num, tur_segment_summaries, diagnostics=None, full_path=None, offsets=None):
         """A constructor method for TurTur
 
         :param tur_num: the Tur Tur number as listed in the Turdata file
         :type tur_num: int
         :param tur_segment_summaries: A list of TurTurSegmentSummaries.
         :type tur_segment_summaries: list
+        :param diagnostics: an optional sink the warnings are reported to. Defaults to None
+        :type diagnostics: olexparser.diagnostics.Diagnostics
+        :param full_path: the full path of the Turdata file. Defaults to None
+        :type full_path: str, None
+        :param offsets: the (start, end) byte offsets of the Tur Tur in the Turdata file. Defaults to None
+        :type offsets: tuple, None
         """
 
         self.tur_num = tur_num
         self.segments_summaries = tur_segment_summaries
         self.segments = {}
+        self.segment_paths = {}
+        self.cache = None
+
+        self.set_turdata_file(diagnostics, full_path, offsets)
+
+        return
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["diagnostics"] = None
+        state["cache"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.cache = None
+        self.set_diagnostics(None)
+        return
 
-        self.warnings = []
+    def set_turdata_file(self, diagnostics, full_path, offsets):
+        """Internal method which reports the warnings of the TurTur to the sink of the Turdata file it is part of,
+        e.g. after it was loaded from a parse cache.
 
-        # self.parse_segment_files()
-        # self.check_sample_sizes()
+        :param diagnostics: the sink, or None to keep the warnings in a Diagnostics object of its own
+        :type diagnostics: olexparser.diagnostics.Diagnostics, None
+        :param full_path: the full path of the Turdata file, or None
+        :type full_path: str, None
+        :param offsets: the (start, end) byte offsets of the Tur Tur in the Turdata file, or None
+        :type offsets: tuple, None
+        """
+        self.full_path = full_path
+        self.offsets = offsets
+        self.set_diagnostics(diagnostics)
+        return
+
+    def add_warning(self, warn, code, offset=None):
+        """Internal method which reports a warning to the Diagnostics sink, at the start of the Tur Tur if no
+        offset is given.
+
+        :param warn: the warning string, or the exception raised
+        :type warn: str, Exception
+        :param code: a short identifier of the kind of warning
+        :type code: str
+        :param offset: the byte offset in the Turdata file the warning applies to. Defaults to None
+        :type offset: int, None
+        """
+        if offset is None and self.offsets is not None:
+            offset = self.offsets[0]
+        WarningReporter.add_warning(self, warn, code, offset)
         return
 
     def add_segment(self, seg_num, segment):
@@ -55,45 +117,104 @@ class TurTur:
         :param segment: a :class:`SegmentFile<olexparser.segment_file.SegmentFile>`
         :type segment: SegmentFile
         """
-        if seg_num in self.segments.keys():
+        if seg_num in self.segments.keys() or seg_num in self.segment_paths.keys():
             warn = "Warning, Segment {} already associated to Tur Tur {}".format(seg_num, self.tur_num)
-            self.warnings.append(warn)
+            self.add_warning(warn, "turtur-duplicate")
         else:
             self.segments[seg_num] = segment
         return
 
-    def check_sample_sizes(self):
+    def add_segment_path(self, seg_num, path, cache=None):
+        """
+        Associates a segment file to the TurTur without parsing it.
+
+        The :class:`SegmentFile<olexparser.segment_file.SegmentFile>` is only created the first time it is
+        retrieved with :meth:`get_segment`, and is then loaded from or stored in the parse cache.
+        Generates a warning if a segment file with seg_num is already associated to the TurTur.
+
+        :param seg_num: A number identifying the related Segment filename. i.e. if the segment number is 83 the
+                        filename will be "segment83_A".
+        :type seg_num: int
+        :param path: the full file path of the segment file
+        :type path: str
+        :param cache: an optional parse cache used when the segment file is parsed. Defaults to None
+        :type cache: olexparser.parse_cache.ParseCache
+        """
+        if seg_num in self.segments.keys() or seg_num in self.segment_paths.keys():
+            warn = "Warning, Segment {} already associated to Tur Tur {}".format(seg_num, self.tur_num)
+            self.add_warning(warn, "turtur-duplicate")
+        else:
+            self.segment_paths[seg_num] = path
+            if cache is not None:
+                self.cache = cache
+        return
+
+    def check_sample_sizes(self, segment_paths=None, add_warnings=True):
         """
         A method for checking if given size of the segment file in summary is the same as the actual size on disk.
 
-        Adds a warning if different.
+        Adds a warning if different, unless add_warnings is False. Segment files which have not been parsed yet are
+        not parsed, only their size is read. Summaries without an associated segment file, or one in segment_paths,
+        are skipped.
+
+        :param segment_paths: an optional dictionary with key:value - segment number:full file path, used for the
+                              segment files not associated to the TurTur. Defaults to None
+        :type segment_paths: dict
+        :param add_warnings: whether a warning is added to the TurTur for every size mismatch. Defaults to True
+        :type add_warnings: bool
+        :return: a dictionary with key:value - segment number:(expected size, actual size) for every segment file
+                 whose size is different
+        :rtype: dict
         """
+        segment_paths = {} if segment_paths is None else segment_paths
+        mismatches = {}
         for summary in self.segments_summaries:
             seg_num = summary.get_seg_num()
-            segment = self.segments[seg_num]
-            expected_size = summary.get_entries_num() * 16
-            actual_size = segment.get_size()
-            if segment.get_size() != expected_size:
-                warn = "Warning, Tur Tur expects Segment {} to have file size {}, actual size is {}".format(
-                    seg_num, expected_size, actual_size)
-                self.warnings.append(warn)
-        return
+            if seg_num in self.segments:
+                actual_size = self.segments[seg_num].get_size()
+            else:
+                path = self.segment_paths.get(seg_num, segment_paths.get(seg_num))
+                if path is None:
+                    continue
+                try:
+                    actual_size = os.path.getsize(path)
+                except OSError:
+                    continue
+            expected_size = summary.get_entries_num() * SEGMENT_ENTRY_SIZE
+            if actual_size != expected_size:
+                if add_warnings:
+                    warn = "Warning, Tur Tur expects Segment {} to have file size {}, actual size is {}".format(
+                        seg_num, expected_size, actual_size)
+                    self.add_warning(warn, "turtur-size")
+                mismatches[seg_num] = (expected_size, actual_size)
+        return mismatches
 
     def get_segment_numbers(self):
         """
         :return: The segment numbers of every :class:`SegmentFile<olexparser.segment_file.SegmentFile>` associated
-                 to the TurTur
+                 to the TurTur, whether it has been parsed or not
         :rtype: list
         """
-        return self.segments.keys()
+        return list(self.segments.keys()) + list(self.segment_paths.keys())
 
-    def get_segment(self, seg_num):
+    def get_segment(self, seg_num, cache=None, diagnostics=None):
         """
+        A segment file associated with :meth:`add_segment_path` is parsed the first time it is retrieved.
+
         :param seg_num: The segment number of the :class:`SegmentFile<olexparser.segment_file.SegmentFile>`
+        :param cache: an optional parse cache used when the segment file is parsed. Defaults to None, using the
+                      cache given to :meth:`add_segment_path`
+        :type cache: olexparser.parse_cache.ParseCache
+        :param diagnostics: an optional sink the warnings of the segment file are reported to. Defaults to None
+        :type diagnostics: olexparser.diagnostics.Diagnostics
         :return: The :class:`SegmentFile<olexparser.segment_file.SegmentFile>` with the provided segment number.
                  Returns None if no SegmentFile with seg_number is associated to the TurTur
         :rtype: SegmentFile, None
         """
+        if seg_num in self.segment_paths.keys():
+            self.segments[seg_num] = SegmentFile(self.segment_paths.pop(seg_num),
+                                                 cache=cache if cache is not None else self.cache,
+                                                 diagnostics=diagnostics)
         if seg_num in self.segments.keys():
             return self.segments[seg_num]
         else:
@@ -148,12 +269,13 @@ class TurTur:
 
     def get_warnings(self):
         """
-        :return: a list of warnings generated by the TurTur, and it's child objects
+        The warnings of the segment summaries are reported by the Turdata file, within the byte offsets of the
+        TurTur. The warnings of its segment files are reported by each
+        :class:`SegmentFile<olexparser.segment_file.SegmentFile>`.
+
+        :return: a list of warnings reported for the TurTur and its segment summaries
         :rtype: list
         """
-        warn = self.warnings.copy()
-        for seg_sum in self.segments_summaries:
-            warn.extend(seg_sum.get_warnings())
-        for seg in self.segments.values():
-            warn.extend(seg.get_warnings())
-        return warn
+        return [diagnostic.message for diagnostic in self.diagnostics.get_diagnostics(file=self.full_path)
+                if self.offsets is None or
+                (diagnostic.offset is not None and self.offsets[0] <= diagnostic.offset < self.offsets[1])]
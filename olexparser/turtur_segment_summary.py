@@ -1,7 +1,8 @@
 import olexparser.convert as convert
+from olexparser.diagnostics import WarningList
 
 
-class TurTurSegmentSummary:
+class TurTurSegmentSummary(WarningList):
     """
     A Class representing a Tur Tur Segment Summary.
 
@@ -43,9 +44,14 @@ class TurTurSegmentSummary:
     :param largest_time: A Unix Timestamp of the last entry in the segment file.
     :type largest_time: int
 
+    TurTurSegmentSummary uses __slots__, keeping the memory use of each summary small.
+
     .. todo:: Determine how a segment file becomes 0 bytes
     """
 
+    __slots__ = ("seg_num", "num_entries", "smallest_lat", "smallest_long", "largest_lat", "largest_long",
+                 "smallest_time", "largest_time", "warnings")
+
     def __init__(self, seg_num, num_entries, smallest_lat, smallest_long, largest_lat, largest_long, smallest_time,
                  largest_time):
         """A constructor method for the TurTurSegmentSummary.
@@ -69,7 +75,7 @@ class TurTurSegmentSummary:
         :param largest_time: A Unix Timestamp of the last entry in the segment file.
         :type largest_time: int
         """
-        self.warnings = []
+        self.warnings = None
 
         self.seg_num = seg_num
         self.num_entries = num_entries
@@ -88,51 +94,36 @@ class TurTurSegmentSummary:
         :return: A description of the contents of the TurTurSegmentSummary
         :rtype: str
         """
-
-        s = "\nSegment number: {}".format(self.seg_num)
-        s = s + "\nNumber of entries in the segment file: {}".format(self.num_entries)
-        s = s + "\nSmallest Latitude float: {}  Starting Latitude coordinate: {}".format(
-            self.smallest_lat, convert.get_lat_dmm(self.smallest_lat))
-        s = s + "\nSmallest Longitude float: {}  Starting Longitude coordinate: {}".format(
-            self.smallest_long, convert.get_long_dmm(self.smallest_long))
-        s = s + "\nLargest Latitude float: {}  End Latitude coordinate: {}".format(
-            self.largest_lat, convert.get_lat_dmm(self.largest_lat))
-        s = s + "\nLargest Longitude float: {}  End Longitude coordinate: {}".format(
-            self.largest_long, convert.get_long_dmm(self.largest_long))
-        s = s + "\nSmallest Unix Timestamp: {} Starting time UTC: {}".format(
-            self.smallest_time, convert.get_timestamp_str_from_int(self.smallest_time))
-        s = s + "\nLargest Unix Timestamp: {} End time UTC: {}".format(
-            self.largest_time, convert.get_timestamp_str_from_int(self.largest_time))
-        return s
-
-    def get_warnings(self):
-        """
-        :return: a list of warnings generated by the TurTurSegmentSummary
-        :rtype: list
-        """
-        return self.warnings.copy()
+        return "".join("\n" + line for line in self.describe())
 
     def print_segment_summary(self):
         """Prints a description of the contents of the TurTurSegmentSummary.
         """
         print()
-        print("Segment number: {}".format(self.seg_num))
-        print("Number of entries in the segment file: {}".format(self.num_entries))
-        print("Smallest Latitude float: {}  Starting Latitude coordinate: {}".format(
-            self.smallest_lat, convert.get_lat_dmm(self.smallest_lat)))
-        print("Smallest Longitude float: {}  Starting Longitude coordinate: {}".format(
-            self.smallest_long, convert.get_long_dmm(self.smallest_long)))
-        print("Largest Latitude float: {}  End Latitude coordinate: {}".format(
-            self.largest_lat, convert.get_lat_dmm(self.largest_lat)))
-        print("Largest Longitude float: {}  End Longitude coordinate: {}".format(
-            self.largest_long, convert.get_long_dmm(self.largest_long)))
-        print("Smallest Unix Timestamp: {} Starting time UTC: {}".format(
-            self.smallest_time, convert.get_timestamp_str_from_int(self.smallest_time)))
-        print("Largest Unix Timestamp: {} End time UTC: {}".format(
-            self.largest_time, convert.get_timestamp_str_from_int(self.largest_time)))
+        for line in self.describe():
+            print(line)
         print()
         return
 
+    def describe(self):
+        """Internal method which describes the TurTurSegmentSummary, converting its extents in batches.
+
+        :return: the description lines
+        :rtype: list
+        """
+        start_lat, end_lat = convert.get_lat_dmm_strs([self.smallest_lat, self.largest_lat])
+        start_long, end_long = convert.get_long_dmm_strs([self.smallest_long, self.largest_long])
+        start_time, end_time = convert.get_timestamp_strs_from_ints([self.smallest_time, self.largest_time]).tolist()
+        return ["Segment number: {}".format(self.seg_num),
+                "Number of entries in the segment file: {}".format(self.num_entries),
+                "Smallest Latitude float: {}  Starting Latitude coordinate: {}".format(self.smallest_lat, start_lat),
+                "Smallest Longitude float: {}  Starting Longitude coordinate: {}".format(self.smallest_long,
+                                                                                       start_long),
+                "Largest Latitude float: {}  End Latitude coordinate: {}".format(self.largest_lat, end_lat),
+                "Largest Longitude float: {}  End Longitude coordinate: {}".format(self.largest_long, end_long),
+                "Smallest Unix Timestamp: {} Starting time UTC: {}".format(self.smallest_time, start_time),
+                "Largest Unix Timestamp: {} End time UTC: {}".format(self.largest_time, end_time)]
+
     def get_seg_num(self):
         """
         :return: the segment number
@@ -0,0 +1,143 @@
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+from olexparser.segment_file import SegmentFile
+
+#: The Turdata file rounds the extents in a segment summary to 2 decimal places, so latitudes and longitudes are
+#: compared with this tolerance (in minutes of arc) by default.
+POSITION_TOLERANCE = 0.01
+
+
+def summary_to_tuple(tur_num, summary, file_path):
+    """Internal function which packs a segment summary into a tuple that is cheap to send to a worker process.
+
+    :param tur_num: the Tur Tur number the summary belongs to
+    :type tur_num: int
+    :param summary: the segment summary
+    :type summary: olexparser.turtur_segment_summary.TurTurSegmentSummary
+    :param file_path: the full file path of the segment file, or None if it was not found
+    :type file_path: str, None
+    :return: the summary values
+    :rtype: tuple
+    """
+    return (tur_num, summary.get_seg_num(), summary.get_entries_num(), summary.get_lat_start_float(),
+            summary.get_long_start_float(), summary.get_lat_end_float(), summary.get_long_end_float(),
+            summary.get_time_start_int(), summary.get_time_end_int(), file_path)
+
+
+def verify_segment(summary, tolerance=POSITION_TOLERANCE):
+    """Compares a segment summary from the Turdata file to the segment file it describes.
+
+    The number of entries, the smallest and largest latitude and longitude, and the smallest and largest time are
+    checked. The segment file is memory mapped and reduced with numpy, so it is never copied into memory.
+    The file size is checked by :meth:`TurTur.check_sample_sizes<olexparser.turtur.TurTur.check_sample_sizes>`.
+
+    :param summary: the summary values, as returned by :func:`summary_to_tuple`
+    :type summary: tuple
+    :param tolerance: the largest allowed difference between latitudes or longitudes. Defaults to
+                      :data:`POSITION_TOLERANCE`
+    :type tolerance: float
+    :return: a list of discrepancies, each a dictionary with the keys tur_num, seg_num, file, check, expected
+             and actual
+    :rtype: list
+    """
+    tur_num, seg_num, num_entries, min_lat, min_long, max_lat, max_long, min_time, max_time, file_path = summary
+    discrepancies = []
+
+    def add(check, expected, actual):
+        discrepancies.append({"tur_num": tur_num, "seg_num": seg_num, "file": file_path, "check": check,
+                              "expected": expected, "actual": actual})
+
+    if file_path is None or not os.path.isfile(file_path):
+        add("file", "segment{}_A".format(seg_num), None)
+        return discrepancies
+
+    segment = SegmentFile(file_path, use_mmap=True)
+    if len(segment) != num_entries:
+        add("entries", num_entries, len(segment))
+
+    lats = segment.get_lats()
+    if len(segment) > 0 and len(lats) == 0:
+        # the segment file could not be memory mapped
+        add("read", len(segment), 0)
+    elif len(segment) > 0:
+        longs = segment.get_longs()
+        timestamps = segment.get_timestamps()
+        positions = (("min_lat", min_lat, float(lats.min())), ("max_lat", max_lat, float(lats.max())),
+                     ("min_long", min_long, float(longs.min())), ("max_long", max_long, float(longs.max())))
+        for check, expected, actual in positions:
+            if abs(expected - actual) > tolerance:
+                add(check, expected, actual)
+        times = (("min_time", min_time, int(timestamps.min())), ("max_time", max_time, int(timestamps.max())))
+        for check, expected, actual in times:
+            if expected != actual:
+                add(check, expected, actual)
+    segment.close()
+    return discrepancies
+
+
+def verify_turdata(turdata, segment_paths, jobs=1, tolerance=POSITION_TOLERANCE):
+    """Compares every segment summary in a Turdata file to the segment file it describes.
+
+    See :func:`verify_segment` for the checks made, and :meth:`TurTur.check_sample_sizes
+    <olexparser.turtur.TurTur.check_sample_sizes>` for the file size check. No warnings are added to the TurTur.
+    A segment whose file size is wrong is reported once as a file_size discrepancy, not again as an entries
+    discrepancy. With jobs greater than 1 the segments are checked in a process pool. The discrepancies are always
+    reported in Tur Tur order, then in the order of the summaries.
+
+    :param turdata: the parsed Turdata file
+    :type turdata: olexparser.turdata_file.TurDataFile
+    :param segment_paths: a dictionary with key:value - segment number:full file path of the segment file
+    :type segment_paths: dict
+    :param jobs: the number of processes used to check segments. Defaults to 1
+    :type jobs: int
+    :param tolerance: the largest allowed difference between latitudes or longitudes. Defaults to
+                      :data:`POSITION_TOLERANCE`
+    :type tolerance: float
+    :return: a report with the keys turdata, segments_checked and discrepancies
+    :rtype: dict
+    """
+    segment_paths = {int(seg_num): path for seg_num, path in segment_paths.items()}
+    summaries = []
+    size_discrepancies = []
+    for tur_num in sorted(turdata.get_tur_numbers()):
+        turtur = turdata.get_turtur(tur_num)
+        mismatches = turtur.check_sample_sizes(segment_paths, add_warnings=False)
+        for summary in turtur.get_segment_summaries():
+            seg_num = summary.get_seg_num()
+            summaries.append(summary_to_tuple(tur_num, summary, segment_paths.get(seg_num)))
+            discrepancies = []
+            if seg_num in mismatches:
+                discrepancies.append({"tur_num": tur_num, "seg_num": seg_num, "file": segment_paths.get(seg_num),
+                                      "check": "file_size", "expected": mismatches[seg_num][0],
+                                      "actual": mismatches[seg_num][1]})
+            size_discrepancies.append(discrepancies)
+
+    tolerances = [tolerance] * len(summaries)
+    if jobs > 1 and len(summaries) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            chunk_size = max(1, len(summaries) // (jobs * 4))
+            results = list(executor.map(verify_segment, summaries, tolerances, chunksize=chunk_size))
+    else:
+        results = list(map(verify_segment, summaries, tolerances))
+
+    report = {"turdata": turdata.get_full_path(), "segments_checked": len(summaries), "discrepancies": []}
+    for discrepancies, segment_discrepancies in zip(size_discrepancies, results):
+        if discrepancies:
+            segment_discrepancies = [discrepancy for discrepancy in segment_discrepancies
+                                     if discrepancy["check"] != "entries"]
+        report["discrepancies"].extend(discrepancies + segment_discrepancies)
+    return report
+
+
+def write_report(reports, file_path):
+    """Writes verification reports to a JSON file.
+
+    :param reports: the reports returned by :func:`verify_turdata`
+    :type reports: list
+    :param file_path: the full path of the JSON file
+    :type file_path: str
+    """
+    with open(file_path, 'w') as f:
+        json.dump(reports, f, indent=2)
+    return
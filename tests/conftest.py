@@ -0,0 +1,17 @@
+import pytest
+from olexparser.synthetic import generate_archive
+
+
+@pytest.fixture
+def archive_folder(tmp_path):
+    """A small synthetic Olex archive with three Tur Turs of two segment files each, and one orphan."""
+    folder = str(tmp_path / "archive")
+    generate_archive(folder, trips=3, segments_per_trip=2, entries_per_segment=50, rutes=4, points_per_rute=5,
+                     orphans=1)
+    return folder
+
+
+def read_all_records(archive):
+    """Internal function which decodes every segment file of an archive into a list of (segment number, records)."""
+    from olexparser.segment_file import SegmentFile
+    return [(seg_num, SegmentFile(path).get_records()) for seg_num, path in sorted(archive.segment_files.items())]
@@ -0,0 +1,37 @@
+import numpy as np
+from olexparser.anomalies import classify_steps, find_anomalies, ANOMALY_KINDS
+from olexparser.segment_file import SEGMENT_DTYPE
+
+
+def test_gap_after_backwards_step():
+    kinds, values = classify_steps(np.array([110, 105, 2000]), np.array([3600, 3600, 3600.1]), np.array([0, 0, 0]))
+    assert [ANOMALY_KINDS[kind] for kind in kinds] == ["backwards", "gap"]
+    assert values.tolist() == [5, 1890]
+
+
+def test_bad_fix_is_a_jump():
+    records = np.zeros(4, dtype=SEGMENT_DTYPE)
+    records["timestamp"] = [0, 60, 120, 180]
+    records["lat"] = [3600, 3600.1, 3700, 3600.3]
+    anomalies = find_anomalies(records, seg_num=7)
+    assert len(anomalies) == 1
+    assert ANOMALY_KINDS[anomalies["kind"][0]] == "jump"
+    assert anomalies["seg_start"][0] == 7
+    assert (anomalies["index_start"][0], anomalies["index_end"][0]) == (1, 3)
+
+
+def test_speed_after_backwards_step_is_measured_from_latest_entry():
+    timestamps = np.array([0, 3600, 1800, 3660])
+    lats = np.array([3600, 3610, 3600, 3610.1])
+    kinds, values = classify_steps(timestamps, lats, np.zeros(4), max_gap=7200)
+    assert [ANOMALY_KINDS[kind] if kind >= 0 else None for kind in kinds] == [None, "backwards", None]
+
+    # continuing a track whose latest entry is known, or unknown
+    kinds, values = classify_steps(timestamps[2:], lats[2:], np.zeros(2), 7200, time_max=3600,
+                                   latest_position=(3610, 0))
+    assert kinds.tolist() == [-1]
+    kinds, values = classify_steps(timestamps[2:], lats[2:], np.zeros(2), 7200, time_max=3600)
+    assert kinds.tolist() == [-1]
+    kinds, values = classify_steps(timestamps[2:], lats[2:], np.zeros(2), 7200, time_max=3600,
+                                   latest_position=(3500, 0))
+    assert ANOMALY_KINDS[kinds[0]] == "jump"
@@ -0,0 +1,34 @@
+import os
+from olexparser.archive import OlexArchive
+from olexparser.parse_cache import ParseCache
+
+
+def test_association_is_lazy(archive_folder, tmp_path):
+    cache = ParseCache(str(tmp_path / "cache"))
+    with OlexArchive(archive_folder, cache) as archive:
+        archive.parse()
+        # only the orphan segment file is parsed when associating
+        assert sorted(archive.segment_files_parsed) == [archive.segment_files[7]]
+        assert not cache.contains(archive.segment_files[1], "segment")
+
+        turtur = archive.get_turdata_files()[0].get_turtur(1)
+        assert sorted(turtur.get_segment_numbers()) == [1, 2]
+        segment = turtur.get_segment(1)
+        assert len(segment) == 50
+        assert not segment.is_cached()
+        assert cache.contains(archive.segment_files[1], "segment")
+
+    with OlexArchive(archive_folder, cache) as archive:
+        assert archive.get_segment(1).is_cached()
+        assert not archive.get_segment(2).is_cached()
+        assert os.path.samefile(archive.get_segment(2).get_full_path(), archive.segment_files[2])
+
+
+def test_parse_twice(archive_folder):
+    with OlexArchive(archive_folder) as archive:
+        archive.parse(jobs=2)
+        warnings = archive.get_warnings()
+        archive.parse(jobs=2)
+        assert archive.get_warnings() == warnings
+        assert len(warnings) == 1
+        assert "not associated with a Tur Tur" in warnings[0]
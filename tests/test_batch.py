@@ -0,0 +1,70 @@
+import os
+import json
+import multiprocessing
+import pytest
+import olexparser.batch as batch
+from olexparser.synthetic import generate_archive
+
+real_process_archive = batch.process_archive
+
+
+def crash_on_folder(folder, *args):
+    """Kills the worker process for the archive named crash, and processes the other archives."""
+    if os.path.basename(folder) == "crash":
+        os._exit(1)
+    return real_process_archive(folder, *args)
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="the patched process_archive only reaches worker processes started with fork")
+def test_crash_is_isolated(tmp_path, monkeypatch):
+    folders = []
+    for name in ("first", "crash", "second", "third"):
+        folders.append(str(tmp_path / name))
+        generate_archive(folders[-1], trips=1, segments_per_trip=1, entries_per_segment=10, rutes=1,
+                         points_per_rute=2)
+    monkeypatch.setattr(batch, "process_archive", crash_on_folder)
+
+    for jobs in (1, 3):
+        summary = batch.run_batch(folders, str(tmp_path / "out{}".format(jobs)), jobs=jobs)
+        assert [result["status"] for result in summary["results"]] == ["ok", "failed", "ok", "ok"]
+        assert set(summary["results"][1]) == set(summary["results"][0]) - {"trips", "segments", "points",
+                                                                            "time_start", "time_end"} | {"error"}
+        assert summary["results"][1]["warning_counts"] == {}
+        assert summary["failed"] == 1
+        assert summary["trips"] == 3
+
+
+def test_output_names_are_unique(tmp_path):
+    folders = [str(tmp_path / "a" / "archive"), str(tmp_path / "b" / "archive")]
+    names = batch.get_output_names(folders)
+    assert len(set(names.values())) == 2
+    assert batch.get_output_names(folders[:1]) == {folders[0]: names[folders[0]]}
+
+
+def test_batch_outputs(tmp_path, capsys):
+    folders = []
+    for name in ("first", "second"):
+        folders.append(str(tmp_path / "archives" / name))
+        generate_archive(folders[-1], trips=2, segments_per_trip=1, entries_per_segment=10, rutes=1,
+                         points_per_rute=2)
+    output = str(tmp_path / "out")
+    argv = [str(tmp_path / "archives" / "*"), "-o", output, "--cache-dir", str(tmp_path / "cache"), "--gpx",
+            "--profile"]
+    summary = batch.main(argv)
+    assert capsys.readouterr().out.splitlines() == ["Processed 2 archives, 0 failed: 4 trips, 40 points"]
+    assert [result["folder"] for result in summary["results"]] == folders
+    assert (summary["failed"], summary["trips"], summary["points"]) == (0, 4, 40)
+    assert summary["time_start"] == min(result["time_start"] for result in summary["results"])
+    with open(os.path.join(output, "summary.json")) as f:
+        assert json.load(f) == summary
+
+    names = batch.get_output_names(folders)
+    for folder in folders:
+        files = sorted(os.listdir(os.path.join(output, names[folder])))
+        assert files == ["profile.json", "summary.json", "tracks.gpx"]
+        assert os.path.isdir(os.path.join(str(tmp_path / "cache"), names[folder]))
+
+    # a second run gives the same totals from the parse cache
+    again = batch.run_batch(folders, output, jobs=2, cache_dir=str(tmp_path / "cache"))
+    assert (again["trips"], again["points"]) == (4, 40)
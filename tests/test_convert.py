@@ -0,0 +1,30 @@
+import numpy as np
+import olexparser.convert as convert
+from olexparser.archive import OlexArchive
+from olexparser.rute_entry import RuteEntry
+from conftest import read_all_records
+
+
+def test_dmm_strs_match_scalar(archive_folder):
+    with OlexArchive(archive_folder) as archive:
+        records = np.concatenate([records for seg_num, records in read_all_records(archive)])
+    values = np.concatenate([records["lat"].astype(np.float64), records["long"].astype(np.float64),
+                             [0.0, 60.5, -60.5, 3600.0, -0.25, 3659.999, 6.432 + 60, -5400.125]])
+    values = np.concatenate([values, values.astype(np.float32).astype(np.float64)])
+    assert convert.get_lat_dmm_strs(values) == [convert.get_lat_dmm(value) for value in values.tolist()]
+    assert convert.get_long_dmm_strs(values) == [convert.get_long_dmm(value) for value in values.tolist()]
+    assert convert.get_lat_dmm_strs([60.5]) == ["1'0.5 N"]
+
+
+def test_timestamp_strs_match_scalar():
+    times = np.array([0, 1417854557, 2 ** 31 - 1, 2 ** 32 - 1], dtype=np.uint32)
+    assert convert.get_timestamp_strs_from_ints(times).tolist() == \
+        [str(convert.get_timestamp_str_from_int(t)) for t in times.tolist()]
+    assert convert.get_datetimes_from_ints(times) == [convert.get_timestamp_str_from_int(t) for t in times.tolist()]
+    np.testing.assert_array_equal(convert.get_lat_or_long_dd_array(times),
+                                  [convert.get_lat_or_long_dd(t) for t in times.tolist()])
+
+
+def test_rute_entry_longitude_hemisphere():
+    entry = RuteEntry(60.5, -60.5, 0, "Brunsirkel")
+    assert "Rute Entry Longitude float: -60.5 Longitude coordinate: 1'0.5 W" in entry.describe()
@@ -0,0 +1,57 @@
+from olexparser.diagnostics import Diagnostics, WarningReporter, ERROR, WARNING
+
+
+class Reporter(WarningReporter):
+    def __init__(self, path, diagnostics=None):
+        self.full_path = path
+        self.set_diagnostics(diagnostics)
+
+
+def test_bounded_storage_keeps_exact_counts():
+    diagnostics = Diagnostics(max_stored=5, max_per_code=3)
+    for i in range(10):
+        diagnostics.report("a", "a{}".format(i), "file_a", i)
+    for i in range(4):
+        diagnostics.report("b", ValueError(i))
+    assert len(diagnostics) == 14
+    assert diagnostics.get_counts() == {"a": 10, "b": 4}
+    assert diagnostics.get_count("a") == 10
+    assert [str(d.message) for d in diagnostics.get_diagnostics()] == ["a0", "a1", "a2", "0", "1"]
+    assert diagnostics.get_dropped() == 9
+    assert diagnostics.get_severity_counts()[WARNING] == 10
+    assert diagnostics.get_severity_counts()[ERROR] == 4
+    assert diagnostics.has_errors()
+    assert [d.offset for d in diagnostics.get_diagnostics(file="file_a")] == [0, 1, 2]
+
+    data = diagnostics.to_dict()
+    assert (data["total"], data["dropped"], len(data["diagnostics"])) == (14, 9, 5)
+
+
+def test_unbounded_storage():
+    diagnostics = Diagnostics(None, None)
+    for i in range(2000):
+        diagnostics.report("a", "a")
+    assert len(diagnostics.get_diagnostics()) == 2000
+    assert not diagnostics.has_errors()
+
+
+def test_reporters_share_a_sink(capsys):
+    diagnostics = Diagnostics()
+    first = Reporter("first", diagnostics)
+    second = Reporter("second", diagnostics)
+    first.add_warning("one", "x", 16)
+    second.add_warning("two", "x")
+    second.add_warning("three", "y")
+    assert first.get_warnings() == ["one"]
+    assert second.get_warnings() == ["two", "three"]
+    assert (first.warning_count, second.warning_count) == (1, 2)
+
+    own = Reporter("own")
+    own.add_warning("four", "x")
+    assert own.get_warnings() == ["four"]
+    assert len(diagnostics) == 3
+
+    diagnostics.print_diagnostics()
+    out = capsys.readouterr().out.splitlines()
+    assert out == ["[warning] x: one (first at offset 16)", "[warning] x: two (second)",
+                   "[warning] y: three (second)", "x: 2", "y: 1"]
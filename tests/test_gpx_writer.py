@@ -0,0 +1,31 @@
+import io
+import os
+import gpxpy
+import numpy as np
+from olexparser.archive import OlexArchive
+from olexparser.diagnostics import Diagnostics
+from olexparser.gpx_writer import write_turdata_gpx
+from olexparser.segment_file import SegmentFile
+
+
+def test_every_point_is_written(archive_folder):
+    with OlexArchive(archive_folder) as archive:
+        with open(archive.segment_files[3], 'ab') as f:
+            f.write(b"\0\0\0")
+        diagnostics = Diagnostics()
+        f = io.StringIO()
+        write_turdata_gpx(f, archive.get_turdata_files(), archive.get_segment_paths(), chunk_size=16,
+                          diagnostics=diagnostics)
+        gpx = gpxpy.parse(f.getvalue())
+
+        assert [track.name for track in gpx.tracks] == ["Tur Tur 1", "Tur Tur 2", "Tur Tur 3"]
+        assert [len(track.segments) for track in gpx.tracks] == [2, 2, 2]
+        records = SegmentFile(archive.segment_files[3]).get_records()
+        points = gpx.tracks[1].segments[0].points
+        assert len(points) == 50
+        np.testing.assert_allclose([point.latitude for point in points], records["lat"] / 60, atol=1e-6)
+        np.testing.assert_allclose([point.longitude for point in points], records["long"] / 60, atol=1e-6)
+        assert [int(point.time.timestamp()) for point in points] == records["timestamp"].tolist()
+
+        assert diagnostics.get_counts() == {"segment-size": 1}
+        assert os.path.samefile(diagnostics.get_diagnostics()[0].file, archive.segment_files[3])
@@ -0,0 +1,20 @@
+import olexparser.main as main
+
+
+def test_print_all_prints_each_warning_once(archive_folder, capsys):
+    archive = main.main([archive_folder])
+    archive.print_all()
+    out = capsys.readouterr().out
+    assert out.count("is not associated with a Tur Tur") == 1
+
+
+def test_module_functions(archive_folder, capsys):
+    archive = main.walk_folder(archive_folder)
+    assert main.current_archive is archive
+    gpx = main.parsed_turdata_data_to_gpx()
+    assert [track.name for track in gpx.tracks] == ["Tur Tur 1", "Tur Tur 2", "Tur Tur 3"]
+    main.print_turdatas()
+    main.print_warnings()
+    out = capsys.readouterr().out
+    assert "Tur Tur Number: 3" in out
+    assert "is not associated with a Tur Tur" in out
@@ -0,0 +1,34 @@
+import os
+from olexparser.diagnostics import Diagnostics
+from olexparser.manifest import Manifest
+
+
+def test_scan_compares_against_the_previous_run(archive_folder, tmp_path):
+    paths = sorted(os.path.join(archive_folder, name) for name in os.listdir(archive_folder))
+    manifest = Manifest(str(tmp_path / "manifest.json"), use_hash=True)
+    manifest.scan(paths)
+    assert manifest.get_new_files() == paths
+    manifest.save()
+
+    # touched but unchanged, changed, and removed files
+    stat = os.stat(paths[0])
+    os.utime(paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    with open(paths[1], 'ab') as f:
+        f.write(b"\n")
+    manifest = Manifest(str(tmp_path / "manifest.json"), use_hash=True)
+    manifest.scan(paths[:-1])
+    assert manifest.get_new_files() == []
+    assert manifest.get_changed_files() == [paths[1]]
+    assert manifest.get_unchanged_files() == [paths[0]] + paths[2:-1]
+    assert manifest.get_removed_files() == [os.path.abspath(paths[-1])]
+
+
+def test_warnings_are_reported(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    with open(path, 'w') as f:
+        f.write("{")
+    diagnostics = Diagnostics()
+    manifest = Manifest(path, diagnostics=diagnostics)
+    manifest.scan([str(tmp_path / "missing")])
+    assert diagnostics.get_counts() == {"manifest-read": 1, "manifest-scan": 1}
+    assert len(manifest.get_warnings()) == 2
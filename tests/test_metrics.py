@@ -0,0 +1,46 @@
+import json
+from olexparser.archive import OlexArchive
+from olexparser.metrics import Metrics
+
+
+def test_stages_are_measured(tmp_path):
+    metrics = Metrics(trace_memory=True)
+    with metrics.stage("outer") as outer:
+        outer.add(records=1)
+        with metrics.stage("inner", "file") as inner:
+            data = bytearray(1 << 20)
+            inner.add(len(data), 2)
+        del data
+    totals = metrics.get_stage_totals()
+    assert totals["inner"]["runs"] == 1
+    assert (totals["inner"]["bytes_read"], totals["inner"]["records"]) == (1 << 20, 2)
+    assert totals["inner"]["peak_memory"] >= 1 << 20
+    assert totals["outer"]["peak_memory"] >= totals["inner"]["peak_memory"]
+    assert totals["outer"]["wall_time"] >= totals["inner"]["wall_time"]
+    assert [record.stage for record in metrics.get_slowest_files()] == ["inner"]
+
+    path = str(tmp_path / "profile.json")
+    metrics.save(path)
+    with open(path) as f:
+        data = json.load(f)
+    assert [record["file"] for record in data["files"]] == ["file"]
+    assert set(data["stages"]) == {"outer", "inner"}
+
+
+def test_disabled_metrics_measure_nothing():
+    metrics = Metrics(enabled=False)
+    with metrics.stage("stage", "file") as record:
+        record.add(10, 1)
+    assert metrics.get_records() == []
+    assert metrics.get_stage_totals() == {}
+
+
+def test_archive_stages(archive_folder):
+    metrics = Metrics()
+    with OlexArchive(archive_folder, metrics=metrics) as archive:
+        archive.parse()
+    totals = metrics.get_stage_totals()
+    assert {"discovery", "turdata", "ruter", "association"} <= set(totals)
+    assert totals["turdata"]["bytes_read"] > 0
+    # one record for every Rute Data point
+    assert totals["ruter"]["records"] == 4 * 5
@@ -0,0 +1,78 @@
+import os
+from olexparser.parse_cache import ParseCache
+from olexparser.diagnostics import Diagnostics
+from olexparser.segment_file import SegmentFile
+from olexparser.turdata_file import TurDataFile
+from olexparser.trip_stats import get_segment_stats, get_stats_cache_kind
+
+
+def test_segment_cache_invalidation(archive_folder, tmp_path):
+    path = os.path.join(archive_folder, "segment1_A")
+    cache = ParseCache(str(tmp_path / "cache"))
+    assert not SegmentFile(path, cache=cache).is_cached()
+    assert SegmentFile(path, cache=cache).is_cached()
+
+    # a changed file is parsed again
+    with open(path, 'rb') as f:
+        entry = f.read(16)
+    with open(path, 'ab') as f:
+        f.write(entry)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    segment = SegmentFile(path, cache=cache)
+    assert not segment.is_cached()
+    assert len(segment) == 51
+
+    # the entry of the old content is only removed by eviction or invalidation
+    assert cache.invalidate(path) == 2
+    assert not SegmentFile(path, cache=cache).is_cached()
+
+
+def test_cache_survives_reopening(archive_folder, tmp_path):
+    path = os.path.join(archive_folder, "Turdata")
+    with ParseCache(str(tmp_path / "cache")) as cache:
+        expected = str(TurDataFile(path, cache=cache))
+    turdata = TurDataFile(path, cache=ParseCache(str(tmp_path / "cache")))
+    assert turdata.is_cached()
+    assert str(turdata) == expected
+
+
+def test_stats_cache_kind(archive_folder, tmp_path):
+    path = os.path.join(archive_folder, "segment1_A")
+    cache = ParseCache(str(tmp_path / "cache"))
+    get_segment_stats(path, cache=cache)
+    assert cache.contains(path, get_stats_cache_kind())
+    assert not cache.contains(path, get_stats_cache_kind(speed_limit=20))
+    assert get_segment_stats(path, speed_limit=20, cache=cache).speed_limit == 20
+
+
+def test_warnings_are_reported(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    (cache_dir / "index.json").write_text("{")
+    diagnostics = Diagnostics()
+    cache = ParseCache(str(cache_dir), diagnostics=diagnostics)
+    assert diagnostics.get_counts() == {"cache-index": 1}
+    assert len(cache.get_warnings()) == 1
+
+
+def test_shared_cache_directory(archive_folder, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    first = ParseCache(cache_dir)
+    second = ParseCache(cache_dir)
+    paths = [os.path.join(archive_folder, "segment{}_A".format(seg_num)) for seg_num in (1, 2, 3)]
+    SegmentFile(paths[0], cache=first)
+    SegmentFile(paths[1], cache=second)
+    SegmentFile(paths[2], cache=second)
+    first.flush()
+    second.flush()
+    assert [ParseCache(cache_dir).contains(path, "segment") for path in paths] == [True, True, True]
+
+    # an entry removed by one process is not brought back by another
+    first.invalidate(paths[0])
+    first.flush()
+    second.flush()
+    third = ParseCache(cache_dir)
+    assert [third.contains(path, "segment") for path in paths] == [False, True, True]
+    assert SegmentFile(paths[1], cache=third).is_cached()
+    assert third.get_warnings() == []
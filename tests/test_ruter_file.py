@@ -0,0 +1,56 @@
+import os
+import pickle
+import numpy as np
+from olexparser.ruter_file import RuterFile
+
+
+def test_columnar_parity(archive_folder):
+    path = os.path.join(archive_folder, "Ruter")
+    rutes = RuterFile(path).get_rutes()
+    columnar = RuterFile(path, columnar=True).get_rutes()
+    assert len(rutes) == len(columnar) == 4
+    for rute, other in zip(rutes, columnar):
+        assert rute.get_rute_name() == other.get_rute_name()
+        assert rute.get_plottsett() == other.get_plottsett()
+        assert rute.get_offset() == other.get_offset()
+        np.testing.assert_array_equal(rute.get_lats(), other.get_lats())
+        np.testing.assert_array_equal(rute.get_longs(), other.get_longs())
+        np.testing.assert_array_equal(rute.get_timestamps(), other.get_timestamps())
+        assert list(rute.get_icon_names()) == list(other.get_icon_names())
+        assert str(rute) == str(other)
+
+
+def test_crlf_parity(archive_folder, tmp_path):
+    path = os.path.join(archive_folder, "Ruter")
+    crlf_path = str(tmp_path / "Ruter")
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(crlf_path, 'wb') as f:
+        f.write(data.replace(b"\n", b"\r\n"))
+    ruter = RuterFile(crlf_path)
+    assert ruter.get_warnings() == []
+    assert [str(rute) for rute in ruter.get_rutes()] == [str(rute) for rute in RuterFile(path).get_rutes()]
+
+
+def test_latin1_names_and_offsets(tmp_path):
+    text = "Ferdig forenklet\n\nRute Blåbærøya\nRutetype Punkt\nLinjefarge Gul\nPlottsett 256\n" \
+           "2930.770269 -3285.741326 1418551564 Brunsirkel\n\n" \
+           "Rute Ørland\nRutetype Punkt\nLinjefarge Gul\nPlottsett 256\n" \
+           "3014.298654 -3203.238529 1434930078 Kryss\n"
+    for encoding in ("latin-1", "cp1252", "utf-8"):
+        data = text.encode(encoding)
+        path = str(tmp_path / "Ruter_{}".format(encoding))
+        with open(path, 'wb') as f:
+            f.write(data)
+        ruter = RuterFile(path)
+        assert ruter.get_warnings() == []
+        rutes = ruter.get_rutes()
+        assert [rute.get_rute_name() for rute in rutes] == ["Blåbærøya", "Ørland"]
+        assert [rute.get_offset() for rute in rutes] == [data.index("Rute Blå".encode(encoding)),
+                                                         data.index("Rute Ørl".encode(encoding))]
+
+
+def test_rute_slots_and_pickle(archive_folder):
+    rutes = RuterFile(os.path.join(archive_folder, "Ruter"), columnar=True).get_rutes()
+    assert not hasattr(rutes[0], "__dict__")
+    assert [str(rute) for rute in pickle.loads(pickle.dumps(rutes))] == [str(rute) for rute in rutes]
@@ -0,0 +1,85 @@
+import os
+import asyncio
+import threading
+import numpy as np
+from olexparser.segment_file import SegmentFile, SEGMENT_ENTRY_SIZE
+
+
+def test_partial_record_held_back(archive_folder):
+    path = os.path.join(archive_folder, "segment1_A")
+    segment = SegmentFile(path)
+    records = segment.get_records().copy()
+    assert len(segment) == 50
+    assert len(segment.read_new_entries()) == 0
+
+    data = records[:2].tobytes()
+    with open(path, 'ab') as f:
+        f.write(data[:SEGMENT_ENTRY_SIZE + 5])
+    new = segment.read_new_entries()
+    np.testing.assert_array_equal(new, records[:1])
+
+    with open(path, 'ab') as f:
+        f.write(data[SEGMENT_ENTRY_SIZE + 5:])
+    new = segment.read_new_entries()
+    np.testing.assert_array_equal(new, records[1:2])
+    assert len(segment.read_new_entries()) == 0
+
+
+def test_partial_record_warning(archive_folder):
+    path = os.path.join(archive_folder, "segment1_A")
+    with open(path, 'ab') as f:
+        f.write(b"\0\0\0")
+    segment = SegmentFile(path)
+    assert len(segment) == 50
+    assert len(segment.get_warnings()) == 1
+
+
+def test_follow_and_watch(archive_folder):
+    path = os.path.join(archive_folder, "segment1_A")
+    segment = SegmentFile(path)
+    records = segment.get_records().copy()
+
+    def append():
+        for i in range(3):
+            with open(path, 'ab') as f:
+                f.write(records[i:i + 1].tobytes())
+
+    append()
+    batches = []
+    for entries in segment.follow(interval=0.01, stop=lambda: len(batches) > 0):
+        batches.append(entries)
+    np.testing.assert_array_equal(np.concatenate(batches), records[:3])
+
+    done = threading.Event()
+    batches = []
+
+    def callback(entries):
+        batches.append(entries)
+        if sum(len(batch) for batch in batches) == 3:
+            done.set()
+
+    watcher = threading.Thread(target=segment.watch, args=(callback, 0.01, done.is_set))
+    watcher.start()
+    append()
+    watcher.join(timeout=10)
+    assert not watcher.is_alive()
+    np.testing.assert_array_equal(np.concatenate(batches), records[:3])
+
+
+def test_afollow_and_truncation(archive_folder):
+    path = os.path.join(archive_folder, "segment1_A")
+    segment = SegmentFile(path)
+    records = segment.get_records().copy()
+    with open(path, 'wb') as f:
+        f.write(records[:2].tobytes())
+
+    async def collect():
+        batches = []
+        async for entries in segment.afollow(interval=0.01, stop=lambda: len(batches) > 0):
+            batches.append(entries)
+        return batches
+
+    # the file became shorter, so it is read again from the start
+    batches = asyncio.run(collect())
+    np.testing.assert_array_equal(np.concatenate(batches), records[:2])
+    assert len(segment.get_warnings()) == 1
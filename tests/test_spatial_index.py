@@ -0,0 +1,54 @@
+import numpy as np
+from olexparser.archive import OlexArchive
+from olexparser.diagnostics import Diagnostics
+from olexparser.geo import get_distances
+from olexparser.spatial_index import SpatialIndex
+from conftest import read_all_records
+
+
+def brute_force(all_records, inside):
+    return sorted((seg_num, index) for seg_num, records in all_records
+                  for index in np.flatnonzero(inside(records)).tolist())
+
+
+def test_query_bbox_matches_scan(archive_folder):
+    with OlexArchive(archive_folder) as archive:
+        all_records = read_all_records(archive)
+        lats = np.concatenate([records["lat"] for seg_num, records in all_records])
+        longs = np.concatenate([records["long"] for seg_num, records in all_records])
+        index = SpatialIndex(archive.segment_files, [summary for tur_num, summary, path in
+                                                     archive.get_segment_index().values()], cell_size=0.05)
+        boxes = [(float(lats.min()), float(longs.min()), float(lats.max()), float(longs.max())),
+                 (float(np.median(lats)), float(np.median(longs)), float(lats.max()), float(longs.max())),
+                 (0.0, 0.0, 1.0, 1.0)]
+        for min_lat, min_long, max_lat, max_long in boxes:
+            hits = index.query_bbox(min_lat, min_long, max_lat, max_long)
+            expected = brute_force(all_records, lambda r: (r["lat"] >= min_lat) & (r["lat"] <= max_lat) &
+                                   (r["long"] >= min_long) & (r["long"] <= max_long))
+            assert sorted(zip(hits["seg_num"].tolist(), hits["index"].tolist())) == expected
+        assert len(index.query_bbox(*boxes[0])) == len(lats)
+
+
+def test_query_radius_matches_scan(archive_folder):
+    with OlexArchive(archive_folder) as archive:
+        all_records = read_all_records(archive)
+        index = archive.get_spatial_index()
+        centre = all_records[3][1][25]
+        lat, long = float(centre["lat"]), float(centre["long"])
+        for radius in (0.05, 0.5, 5):
+            hits = index.query_radius(lat, long, radius)
+            expected = brute_force(all_records, lambda r: get_distances(lat, long, r["lat"], r["long"]) <= radius)
+            assert sorted(zip(hits["seg_num"].tolist(), hits["index"].tolist())) == expected
+            assert (4, 25) in expected
+
+
+def test_warnings_reported_once(archive_folder):
+    with OlexArchive(archive_folder) as archive:
+        with open(archive.segment_files[7], 'ab') as f:
+            f.write(b"\0\0\0")
+        diagnostics = Diagnostics()
+        index = SpatialIndex(archive.segment_files, [], max_segments=1, diagnostics=diagnostics)
+        for i in range(3):
+            index.query_bbox(-90 * 60, -180 * 60, 90 * 60, 180 * 60)
+        assert diagnostics.get_counts() == {"segment-size": 1}
+        assert len(index.get_warnings()) == 1
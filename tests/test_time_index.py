@@ -0,0 +1,36 @@
+import numpy as np
+from olexparser.archive import OlexArchive
+from olexparser.diagnostics import Diagnostics
+from olexparser.time_index import TimeIndex
+from conftest import read_all_records
+
+
+def test_query_matches_scan(archive_folder):
+    with OlexArchive(archive_folder) as archive:
+        index = archive.get_time_index()
+        assert len(index) == 7
+        all_records = read_all_records(archive)
+        start = int(all_records[1][1]["timestamp"][10])
+        end = int(all_records[4][1]["timestamp"][20])
+        for window in ((start, end), (start, start), (0, 1), (0, 2 ** 32 - 1)):
+            result = index.query(*window)
+            expected = sorted((int(ts), seg_num, index) for seg_num, records in all_records
+                              for index, ts in enumerate(records["timestamp"].tolist())
+                              if window[0] <= ts <= window[1])
+            assert [(int(ts), int(seg), int(i)) for ts, seg, i in
+                    zip(result["timestamp"], result["seg_num"], result["index"])] == expected
+            assert np.all(np.diff(result["timestamp"].astype(np.int64)) >= 0)
+
+
+def test_warnings_reported_once(archive_folder):
+    with OlexArchive(archive_folder) as archive:
+        path = archive.segment_files[7]
+        with open(path, 'ab') as f:
+            f.write(b"\0\0\0")
+        summaries = [summary for tur_num, summary, path in archive.get_segment_index().values()]
+        diagnostics = Diagnostics()
+        index = TimeIndex(archive.segment_files, summaries, max_segments=1, diagnostics=diagnostics)
+        for i in range(3):
+            index.query(0, 2 ** 32 - 1)
+        assert diagnostics.get_counts() == {"segment-size": 1}
+        assert len(index.get_warnings()) == 1
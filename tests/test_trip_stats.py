@@ -0,0 +1,34 @@
+import numpy as np
+from olexparser.segment_file import SEGMENT_DTYPE
+from olexparser.trip_stats import TripStats
+
+
+def make_records(timestamps, lats, longs):
+    records = np.zeros(len(timestamps), dtype=SEGMENT_DTYPE)
+    records["timestamp"] = timestamps
+    records["lat"] = lats
+    records["long"] = longs
+    return records
+
+
+def test_bad_fix_is_excluded():
+    # 0.1 minutes of latitude every minute is 6 knots, the entry at 3700 is a bad fix
+    good = make_records([0, 60, 120, 180], [3600, 3600.1, 3600.2, 3600.3], 600)
+    bad = make_records([0, 60, 120, 180], [3600, 3600.1, 3700, 3600.3], 600)
+    good_stats = TripStats()
+    good_stats.add_records(good)
+    bad_stats = TripStats()
+    bad_stats.add_records(bad)
+
+    assert bad_stats.max_speed < 7
+    assert abs(bad_stats.distance - 0.1) < 1e-3
+    assert bad_stats.gap_time == 120
+    assert bad_stats.underway_time == 60
+    assert abs(good_stats.distance - 0.3) < 1e-3
+
+
+def test_dict_round_trip():
+    stats = TripStats(speed_limit=20)
+    stats.add_records(make_records([0, 60, 120], [3600, 3600.1, 3600.2], 600))
+    restored = TripStats.from_dict(stats.to_dict())
+    assert restored.to_dict() == stats.to_dict()
@@ -0,0 +1,26 @@
+import os
+from olexparser.turdata_file import TurDataFile
+
+
+def test_capital_t_inside_a_tur_tur(archive_folder):
+    # lines of a Tur Tur starting with a capital T must not end the Tur Tur
+    path = os.path.join(archive_folder, "Turdata")
+    with open(path) as f:
+        lines = f.readlines()
+    lines.insert(1, "Tittel Tokt Tromsø\n")
+    with open(path, 'w') as f:
+        f.writelines(lines)
+
+    for lazy in (False, True):
+        turdata = TurDataFile(path, lazy=lazy)
+        assert sorted(turdata.get_tur_numbers()) == [1, 2, 3]
+        assert [summary.get_seg_num() for summary in turdata.get_turtur(1).get_segment_summaries()] == [1, 2]
+        assert turdata.get_warnings() == []
+
+
+def test_lazy_matches_eager(archive_folder):
+    path = os.path.join(archive_folder, "Turdata")
+    eager = TurDataFile(path)
+    lazy = TurDataFile(path, lazy=True)
+    for tur_num in eager.get_tur_numbers():
+        assert str(lazy.get_turtur(tur_num)) == str(eager.get_turtur(tur_num))
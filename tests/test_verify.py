@@ -0,0 +1,27 @@
+import os
+from olexparser.archive import OlexArchive
+from olexparser.verify import verify_turdata
+
+
+def test_clean_archive(archive_folder):
+    with OlexArchive(archive_folder) as archive:
+        archive.parse()
+        turdata = archive.get_turdata_files()[0]
+        report = verify_turdata(turdata, archive.get_segment_paths())
+        assert report["segments_checked"] == 6
+        assert report["discrepancies"] == []
+        assert report == verify_turdata(turdata, archive.get_segment_paths(), jobs=2)
+
+
+def test_size_mismatch_reported_once(archive_folder):
+    with open(os.path.join(archive_folder, "segment3_A"), 'r+b') as f:
+        f.truncate(16 * 40)
+    with OlexArchive(archive_folder) as archive:
+        archive.parse()
+        turdata = archive.get_turdata_files()[0]
+        turtur = turdata.get_turtur(2)
+        warnings = turtur.get_warnings()
+        report = verify_turdata(turdata, archive.get_segment_paths())
+        assert turtur.get_warnings() == warnings
+        assert [(d["seg_num"], d["check"], d["expected"], d["actual"]) for d in report["discrepancies"]
+                if d["check"] in ("file_size", "entries")] == [(3, "file_size", 16 * 50, 16 * 40)]